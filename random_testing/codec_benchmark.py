@@ -0,0 +1,78 @@
+import json
+import timeit
+
+from speech_recognition.utils.message_codec import JsonCodec, MessageCodec
+
+# Message shapes sent to and received from the server
+MESSAGES = {
+    "audio_request": {
+        "type": "GENERATE_AUDIO_REQUEST",
+        "message": {"text": "Bitte nennen Sie Ihr Geburtsdatum.", "request_id": "42"},
+    },
+    "audio_success": {
+        "type": "GENERATE_AUDIO_SUCCESS",
+        "message": {
+            "text": "Successfully generated audio file: audio-1f3c.wav",
+            "request_id": "42",
+            "file": "audio-1f3c.wav",
+        },
+        "message_id": "9b7e6f1c2d3a4b5c6d7e8f9a0b1c2d3e",
+    },
+    "person_data": {
+        "type": "EXTRACT_DATA_FROM_AUDIO_SUCCESS",
+        "message": {
+            "text": {
+                "firstName": "Max",
+                "lastName": "Mustermann",
+                "dateOfBirth": "15.07.1999",
+                "sex": "M",
+                "phoneNumber": "0176 12345678",
+                "email": "max.mustermann@gmail.com",
+            }
+        },
+        "message_id": "9b7e6f1c2d3a4b5c6d7e8f9a0b1c2d3e",
+    },
+    "long_transcript": {
+        "type": "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED",
+        "message": {"text": "Mein Name ist Max Mustermann. " * 2000},
+    },
+}
+
+NUMBER = 20000
+
+
+class StdlibJsonCodec(JsonCodec):
+    """JSON codec forced to the standard library, as used before orjson."""
+
+    name = "json (stdlib)"
+
+    def encode(self, message: dict) -> str:
+        return json.dumps(message)
+
+    def decode(self, raw: str | bytes) -> dict:
+        return json.loads(raw)
+
+
+def main():
+    codecs = [StdlibJsonCodec(), JsonCodec()]
+    try:
+        codecs.append(MessageCodec.create("msgpack"))
+    except ImportError as e:
+        print(f"Skipping msgpack: {e}")
+
+    for shape, message in MESSAGES.items():
+        number = NUMBER if shape != "long_transcript" else NUMBER // 100
+        print(f"\n{shape}")
+        for codec in codecs:
+            encoded = codec.encode(message)
+            encode = timeit.timeit(lambda: codec.encode(message), number=number)
+            decode = timeit.timeit(lambda: codec.decode(encoded), number=number)
+            print(
+                f"  {codec.name:<14} {len(encoded):>7} bytes  "
+                f"encode {encode / number * 1e6:8.2f} us  "
+                f"decode {decode / number * 1e6:8.2f} us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import time
+
+from speech_recognition import config, LLMService
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+# German personal data transcripts, the answers mostly copy spans of them
+TRANSCRIPTS = [
+    "Hallo, mein Name ist Max Mustermann, ich bin am 15. Juli 1999 geboren. "
+    "Meine Telefonnummer ist 0176 12345678 und meine E-Mail ist max.mustermann@gmail.com.",
+    "Guten Tag, hier spricht Erika Musterfrau, geboren am 3. März 1985, "
+    "erreichbar unter 030 98765432, E-Mail erika punkt musterfrau at web punkt de.",
+    "Mein Nachname ist Hagel, mein Vorname ist Philipp, Geschlecht ist männlich, "
+    "Geburtsdatum 15.07.1999, Telefonnummer 0221 445566, E-Mail philipp at familie-hagel punkt de.",
+    "Ja hallo, ich bin die Sabine Schneider, weiblich, mein Geburtstag ist der "
+    "erste Januar neunzehnhundertneunzig, meine Nummer ist 0151 2233445566.",
+    "Hier ist Jonas Becker, Geburtsdatum 24.12.2001, Handy 0160 7788990, "
+    "Mail jonas.becker@t-online.de, ich bin männlich.",
+    "Mein Name ist Aylin Yilmaz, ich bin am zwölften Mai zweitausend geboren, "
+    "meine E-Mail-Adresse lautet aylin punkt yilmaz at gmx punkt net.",
+]
+
+REPEATS = 3
+# Compared to generating without prompt lookup, also if it's disabled in the config
+LOOKUP_TOKENS = config.LLM_PROMPT_LOOKUP_TOKENS or 10
+
+
+def run(service: LLMService, metrics: MetricsHelper) -> tuple[float, float]:
+    metrics.reset()
+    t0 = time.time()
+    for _ in range(REPEATS):
+        for transcript in TRANSCRIPTS:
+            service.generate_json_response(transcript, RequestType.PERSON_DATA)
+    elapsed = time.time() - t0
+    return metrics.get("llm_tokens_generated_person_data"), elapsed
+
+
+def main():
+    # Let the LLM generate every field of every request
+    config.LLM_RULE_BASED_PERSON_DATA = False
+    config.LLM_CACHE_ENABLED = False
+    config.LLM_CONTINUOUS_BATCHING = False
+
+    service = LLMService()
+    metrics = MetricsHelper()
+
+    # Warm up
+    service.generate_json_response(TRANSCRIPTS[0], RequestType.PERSON_DATA)
+
+    results = {}
+    for lookup_tokens in [0, LOOKUP_TOKENS]:
+        config.LLM_PROMPT_LOOKUP_TOKENS = lookup_tokens
+        tokens, elapsed = run(service, metrics)
+        results[lookup_tokens] = tokens / elapsed
+        print(
+            f"prompt_lookup_num_tokens={lookup_tokens}: {tokens:.0f} tokens "
+            f"in {elapsed:.2f}s, {tokens / elapsed:.1f} tokens/s"
+        )
+
+    print(f"Speedup: {results[LOOKUP_TOKENS] / results[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,59 @@ import logging
 
 # WebSocket settings
 WEBSOCKET_URI = "ws://localhost:8080"
+# Maximum number of messages buffered while disconnected, they are sent in order
+# after reconnecting. When full, the oldest message is dropped
+WEBSOCKET_OUTBOX_MAX_MESSAGES = 1000
+# File to persist the buffered messages to across restarts, None keeps them in memory only
+WEBSOCKET_OUTBOX_FILE = None
+# Delay in seconds before the first reconnect attempt, doubled after every failed
+# attempt up to the maximum and randomized by up to half
+WEBSOCKET_RECONNECT_BASE_SECONDS = 1
+WEBSOCKET_RECONNECT_MAX_SECONDS = 60
+# Codec offered to the server as WebSocket subprotocol, available: "json", "msgpack".
+# msgpack requires the msgpack package, the server may still choose "json"
+WEBSOCKET_CODEC = "json"
+# Messages larger than this many bytes are serialized and parsed in a worker thread
+WEBSOCKET_OFFLOAD_BYTES = 64 * 1024
+# Run an embedded WebSocket server instead of connecting to WEBSOCKET_URI, so several
+# clients can submit jobs directly. Results are sent back to the client of the request,
+# and the queued jobs of the clients are processed in turn
+WEBSOCKET_SERVER_ENABLED = False
+WEBSOCKET_SERVER_HOST = "0.0.0.0"
+WEBSOCKET_SERVER_PORT = 8765
+# Pull jobs instead of being sent all of them, for several nodes sharing one server.
+# The free capacity per stage is advertised as WORK_CREDITS and the server only sends
+# that many jobs, so they go to idle nodes. Only used when connecting to WEBSOCKET_URI
+CLUSTER_PULL_MODE = False
+# Jobs per stage accepted beyond the number of workers, so the workers don't wait
+# for the next job to be sent when they finish one
+CLUSTER_PREFETCH_JOBS = 1
 
 # Audio directories
 # Make sure that in and out don't point to the same folder
 AUDIO_IN_DIR = r"/home/anel/PycharmProjects/speech_recognition/data/in"
 AUDIO_OUT_DIR = r"/home/anel/PycharmProjects/speech_recognition/data/out"
+# Seconds the size and modification time of a new file in AUDIO_IN_DIR must stay
+# unchanged before it is processed. Only used on platforms that don't report when
+# a written file is closed, i.e. not on Linux, where files are processed once their
+# writer closed them. Files moved into AUDIO_IN_DIR, e.g. written as "<name>.part"
+# and renamed when complete, are processed right away on all platforms
+FILE_STABLE_SECONDS = 1
+# Queue the files left unprocessed in AUDIO_IN_DIR at startup, e.g. dropped during a
+# restart. They are queued one at a time while no other requests are waiting
+AUDIO_IN_BACKLOG_SCAN = True
+# Order the backlog is queued in, available: "oldest", "newest" (by modification time),
+# "type" (commands first, then person data, each oldest first)
+AUDIO_IN_BACKLOG_ORDER = "oldest"
+# File recording the processed files of AUDIO_IN_DIR, so they aren't processed again
+# after a restart. None keeps it in memory only
+AUDIO_IN_INDEX_FILE = (
+    r"/home/anel/PycharmProjects/speech_recognition/data/processed.jsonl"
+)
+# Attempts at a file of AUDIO_IN_DIR failing with an error that may go away, e.g. a
+# model crash, before it is given up. It is retried after every restart until then,
+# None retries it forever
+AUDIO_IN_MAX_ATTEMPTS = 3
 
 
 # TTS (Text-to-Speech) settings
@@ -16,18 +64,126 @@ PIPER_DIR = r"C:\Users\dervi\Desktop\piper"
 # Voice model name for Piper
 # If it's not inside the PIPER_DIR, provide the full absolute path
 VOICE_NAME = "de_DE-thorsten-high.onnx"
-# VOICE_NAME = "Thorsten-Voice_Hessisch_Piper_high-Oct2023.onnx"
+# Voices selectable by id with the "voice" field of GENERATE_AUDIO_REQUEST,
+# requests without it use VOICE_NAME
+TTS_VOICES = {
+    "thorsten": "de_DE-thorsten-high.onnx",
+    "hessisch": "Thorsten-Voice_Hessisch_Piper_high-Oct2023.onnx",
+}
+# Maximum number of voices kept loaded, each with up to TTS_WORKERS Piper processes.
+# The processes of the least recently used voice are stopped first
+TTS_MAX_LOADED_VOICES = 2
 # Directory where generated audio files are stored
 GENERATE_AUDIO_DIR = r"/home/anel/PycharmProjects/speech_recognition/data/generated"
+# Seconds a generated audio file is kept in GENERATE_AUDIO_DIR before it is deleted,
+# every request writes its own file. None keeps them
+GENERATE_AUDIO_MAX_AGE_SECONDS = 3600
+# Seconds to wait for Piper to synthesize a text before it is restarted
+TTS_TIMEOUT_SECONDS = 60
+# Number of texts synthesized in parallel, each by its own Piper process
+# and audio generation worker. Piper uses about one CPU core per process
+TTS_WORKERS = 2
+# Split texts into sentences and send each sentence's audio as GENERATE_AUDIO_PART
+# message with a sequence number as soon as it is ready, so playback can start early
+TTS_STREAM_SENTENCES = True
+# Synthesize all sentences of a text in parallel across the Piper processes
+# instead of one sentence ahead of the delivery
+TTS_SENTENCE_FAN_OUT = True
+# Send the generated audio as binary WebSocket frames along with the messages,
+# so the consumer doesn't need access to GENERATE_AUDIO_DIR
+TTS_SEND_AUDIO = False
+# Compress the audio sent as binary frames, available: None (WAV), "flac", "opus"
+TTS_AUDIO_CODEC = "flac"
+# Number of audio files compressed in parallel
+TTS_AUDIO_ENCODER_WORKERS = 2
+# Directory where generated audio is cached by text and voice, so repeated prompts
+# aren't synthesized again. None disables the cache
+TTS_CACHE_DIR = r"/home/anel/PycharmProjects/speech_recognition/data/tts_cache"
+# Maximum size of the cache in MB, the least recently used files are evicted first
+TTS_CACHE_MAX_MB = 512
+# Phrases rendered into the cache at startup while no requests are waiting,
+# so they are served instantly on their first use
+TTS_PREWARM_PHRASES = [
+    "Bitte nennen Sie Ihren Vornamen und Nachnamen.",
+    "Bitte nennen Sie Ihr Geburtsdatum.",
+    "Bitte nennen Sie Ihre E-Mail-Adresse.",
+    "Bitte nennen Sie Ihre Telefonnummer.",
+    "Ist das korrekt?",
+    "Vielen Dank.",
+]
+
+# Number of audio files processed concurrently, each by its own extraction worker.
+# Results are sent as soon as they are ready and matched to the requests by their id
+STT_WORKERS = 2
 
 # ASR (Automatic Speech Recognition) settings
 # Default: openai/whisper-large-v3-turbo
 ASR_MODEL_NAME = "openai/whisper-large-v3-turbo"
 ASR_LANGUAGE = "german"
+# Maximum length in seconds of the segments the audio is split into at pauses,
+# when it is transcribed segment by segment to overlap ASR with the LLM prefill
+ASR_SEGMENT_MAX_SECONDS = 30
 
 # LLM (Large Language Model) settings
 # Default: Qwen/Qwen2.5-0.5B-Instruct
 LLM_MODEL_NAME = "Qwen/Qwen2.5-0.5B-Instruct"
+# Backend running the LLM, available: "transformers", "llama_cpp"
+# llama_cpp runs a quantized GGUF model on the CPU and requires llama-cpp-python
+LLM_BACKEND = "transformers"
+# Path of the local GGUF model file used by the llama_cpp backend
+LLM_GGUF_MODEL_PATH = r"models/qwen2.5-1.5b-instruct-q8_0.gguf"
+# Number of CPU threads for llama_cpp, None lets llama.cpp decide
+LLM_GGUF_THREADS = None
+# Context size in tokens for llama_cpp
+LLM_GGUF_CONTEXT_SIZE = 2048
+# Size in bytes of the llama_cpp prompt cache reusing the evaluated system prompts
+LLM_GGUF_PROMPT_CACHE_BYTES = 256 * 1024 * 1024
+# Answer unambiguous COMMAND transcripts ("ja", "nein", "auf keinen Fall")
+# with a rule-based classifier and only ask the LLM for ambiguous ones
+LLM_RULE_BASED_COMMANDS = True
+# Fill the structured PERSON_DATA fields (email, phone, date of birth, sex, names)
+# with rules first and only ask the LLM for the fields the rules could not fill
+LLM_RULE_BASED_PERSON_DATA = True
+# Decode concurrent LLM requests together in one batch, new requests join
+# the running batch at token boundaries and finished ones leave immediately
+LLM_CONTINUOUS_BATCHING = False
+# Maximum number of sequences decoded together with continuous batching
+LLM_MAX_BATCH_SIZE = 8
+# Transcribe the audio segment by segment and prefill the finalized segments into
+# the LLM's KV cache while the next ones are transcribed, so only the last segment
+# and the generation remain when ASR ends. Not used with llama_cpp or continuous batching
+LLM_OVERLAP_PREFILL = False
+# Maximum number of tokens the LLM may generate, per request type. Generation also
+# stops early once the JSON object is closed or the output starts repeating itself
+LLM_MAX_NEW_TOKENS = {"PERSON_DATA": 192, "COMMAND": 32}
+# Number of tokens drafted from the prompt for prompt lookup decoding, the model
+# verifies a whole draft in one forward pass. Speeds up copying names, emails and
+# numbers from the transcript. 0 disables it, it isn't used with continuous batching
+LLM_PROMPT_LOOKUP_TOKENS = 10
+# Send each PERSON_DATA field as EXTRACT_DATA_FROM_AUDIO_PARTIAL message
+# as soon as it is generated, before the final EXTRACT_DATA_FROM_AUDIO_SUCCESS
+LLM_STREAM_PARTIAL_RESULTS = True
+# Cache LLM results for repeated transcripts ("Ja, bitte."), keyed by request type,
+# normalized transcript, model name and prompt version
+LLM_CACHE_ENABLED = True
+LLM_CACHE_MAX_ENTRIES = 10000
+# Time in seconds after which a cached result expires
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+# JSON lines file to persist the cache to across restarts, None keeps it in memory only
+LLM_CACHE_FILE = None
+
+# Memory settings
+# Unload the ASR or LLM model after it wasn't used for this many seconds,
+# it's reloaded on the next request. None keeps the models loaded
+MODEL_IDLE_UNLOAD_SECONDS = 30 * 60
+# Pause taking new audio extraction requests while the resident memory of the
+# process is above this many MB, idle models are unloaded first. Should be well
+# above the memory the loaded models need. None to disable
+MEMORY_HIGH_WATERMARK_MB = None
+# Return freed heap memory to the OS after a job grew the process by this many MB
+MEMORY_TRIM_THRESHOLD_MB = 256
+# Seconds between two checks for idle models and while the intake is paused
+MEMORY_CHECK_INTERVAL_SECONDS = 10
 
 # Logging settings available: DEBUG, INFO, WARNING, ERROR
 LOG_LEVEL = logging.DEBUG
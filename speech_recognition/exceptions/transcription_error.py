@@ -3,13 +3,18 @@ class TranscriptionError(Exception):
 
     Attributes:
         message (str): Explanation of the error.
+        permanent (bool): Whether transcribing the same audio again would fail again,
+            e.g. because its format isn't supported.
     """
 
-    def __init__(self, message: str) -> None:
+    def __init__(self, message: str, permanent: bool = False) -> None:
         """Initialize TranscriptionError.
 
         Args:
             message (str): Error message to describe the exception.
+            permanent (bool): Whether the error doesn't go away on a retry.
+                Defaults to False.
         """
         self.message = message
+        self.permanent = permanent
         super().__init__(self.message)
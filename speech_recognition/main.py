@@ -12,9 +12,17 @@ from speech_recognition import (
     WebSocketClient,
 )
 from speech_recognition.manager import Manager
+from speech_recognition.services.audio_encoder import AudioEncoder
+from speech_recognition.services.memory_manager import MemoryManager
 from speech_recognition.services.tts_service import TTSService
+from speech_recognition.services.websocket_server import WebSocketServer
+from speech_recognition.utils.fair_queue import FairQueue
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
+from speech_recognition.utils.work_credits import WorkCredits
 from speech_recognition.workers.audio_extraction_worker import AudioExtractionWorker
 from speech_recognition.workers.audio_generation_worker import AudioGenerationWorker
+from speech_recognition.workers.backlog_scan_worker import BacklogScanWorker
+from speech_recognition.workers.tts_prewarm_worker import TTSPrewarmWorker
 
 log = LoggerHelper(__name__).get_logger()
 
@@ -25,26 +33,83 @@ async def main():
     # Get configured filepaths
     in_dir = str(Path(config.AUDIO_IN_DIR).resolve())
 
-    # Create Queues
-    speech_queue = asyncio.Queue()
-    text_queue = asyncio.Queue()
+    # Create Queues, in server mode the jobs of the clients are taken in turn
+    if config.WEBSOCKET_SERVER_ENABLED:
+        speech_queue = FairQueue(lambda request: request.get("connection"))
+        text_queue = FairQueue(lambda request: request.get("connection"))
+    else:
+        speech_queue = asyncio.Queue()
+        text_queue = asyncio.Queue()
 
     # Get current eventloop
     event_loop = asyncio.get_running_loop()
 
     # Start the services
-    client = WebSocketClient(config.WEBSOCKET_URI, text_queue)
+    if config.WEBSOCKET_SERVER_ENABLED:
+        client = WebSocketServer(
+            config.WEBSOCKET_SERVER_HOST,
+            config.WEBSOCKET_SERVER_PORT,
+            text_queue,
+            speech_queue,
+        )
+    else:
+        credits = None
+        if config.CLUSTER_PULL_MODE:
+            credits = WorkCredits(
+                {
+                    "stt": config.STT_WORKERS + config.CLUSTER_PREFETCH_JOBS,
+                    "tts": config.TTS_WORKERS + config.CLUSTER_PREFETCH_JOBS,
+                }
+            )
+        client = WebSocketClient(
+            config.WEBSOCKET_URI, text_queue, speech_queue, credits
+        )
     asr = ASRService()
     llm = LLMService()
     tts = TTSService()
-    file_observer = FileObserver(event_loop, speech_queue, in_dir)
+    processed_index = ProcessedFileIndex(
+        config.AUDIO_IN_INDEX_FILE, config.AUDIO_IN_MAX_ATTEMPTS
+    )
+    file_observer = FileObserver(event_loop, speech_queue, in_dir, processed_index)
+    memory_manager = MemoryManager(
+        [asr, llm],
+        config.MODEL_IDLE_UNLOAD_SECONDS,
+        config.MEMORY_HIGH_WATERMARK_MB,
+        config.MEMORY_TRIM_THRESHOLD_MB,
+        config.MEMORY_CHECK_INTERVAL_SECONDS,
+    )
+
+    audio_encoder = None
+    if config.TTS_SEND_AUDIO:
+        audio_encoder = AudioEncoder(
+            config.TTS_AUDIO_CODEC, config.TTS_AUDIO_ENCODER_WORKERS
+        )
 
     # Create Workers
-    stt_worker = AudioExtractionWorker(speech_queue, asr, llm, client)
-    tts_worker = AudioGenerationWorker(text_queue, tts, client)
+    stt_workers = [
+        AudioExtractionWorker(
+            speech_queue, asr, llm, client, memory_manager, processed_index
+        )
+        for _ in range(config.STT_WORKERS)
+    ]
+    tts_workers = [
+        AudioGenerationWorker(text_queue, tts, client, worker_id, audio_encoder)
+        for worker_id in range(config.TTS_WORKERS)
+    ]
+    prewarm_worker = TTSPrewarmWorker(text_queue, tts, config.TTS_PREWARM_PHRASES)
+    workers = [*stt_workers, *tts_workers, memory_manager, prewarm_worker]
+    if config.AUDIO_IN_BACKLOG_SCAN:
+        workers.append(
+            BacklogScanWorker(
+                speech_queue, in_dir, processed_index, config.AUDIO_IN_BACKLOG_ORDER
+            )
+        )
 
-    manager = Manager(event_loop, [stt_worker, tts_worker], file_observer)
-    await client.connect("sp")
+    if config.WEBSOCKET_SERVER_ENABLED:
+        workers.append(client)
+    else:
+        await client.connect("sp")
+    manager = Manager(event_loop, workers, file_observer)
 
     log.info("Initialization complete.")
     art.tprint("speech", "sub-zero")
@@ -59,6 +124,9 @@ async def main():
     except asyncio.CancelledError:
         log.info("Cancellation requested.")
         await manager.stop()
+        await tts.stop()
+        if audio_encoder is not None:
+            audio_encoder.stop()
         log.info("Cancellation complete.")
         art.tprint("speech", "sub-zero")
         art.tprint("recognition", "sub-zero")
@@ -1,72 +1,184 @@
 import time
+from typing import Iterator
 
+import numpy as np
 import torch
 from transformers import pipeline, Pipeline
 
 from speech_recognition import config
 from speech_recognition.exceptions.transcription_error import TranscriptionError
+from speech_recognition.services.evictable_service import EvictableService
 from speech_recognition.utils.audio_helper import AudioHelper
 from speech_recognition.utils.logger_helper import LoggerHelper
 
 log = LoggerHelper(__name__).get_logger()
 
 
-class ASRService:
+class ASRService(EvictableService):
     """ "Automatic Speech Recognition (ASR) service using a Hugging Face pipeline.
 
     This class loads a Whisper model and provides a method to transcribe audio files.
+    The model can be unloaded while idle and is reloaded on the next transcription.
+
+    Besides file paths, audio received over the network can be passed as encoded bytes
+    or as decoded samples. It is decoded in memory and never written to disk.
 
     Attributes:
         __device (torch.device): The device (CPU or CUDA) on which the model runs.
         __language (str): Language used for transcription, from config.
         __model_name (str): Model identifier from Hugging Face used for ASR.
         __audio_helper (AudioHelper): Helper class for audio file manipulation.
-        __transcriber (Pipeline): Hugging Face pipeline used for speech recognition.
+        __transcriber (Optional[Pipeline]): Hugging Face pipeline used for speech
+            recognition, None while unloaded.
+        __SAMPLING_RATE (int): Sampling rate uploaded audio is decoded to, Whisper's input rate.
     """
 
+    __SAMPLING_RATE = 16000
+
     def __init__(self) -> None:
         """Initializes the ASRService.
 
         Sets up the device (CPU/GPU), loads configuration values, initializes audio helper utilities,
         and loads the ASR model pipeline.
         """
+        super().__init__("ASR")
         self.__device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.__language = config.ASR_LANGUAGE
         self.__model_name = config.ASR_MODEL_NAME
         self.__audio_helper = AudioHelper()
-        self.__transcriber = self.__load_model()
+        self.__transcriber = None
+        self.load()
 
-    def transcribe(self, file: str) -> str:
-        """Transcribes an audio file to text using the loaded ASR model.
+    def transcribe(self, audio: str | bytes | memoryview | np.ndarray) -> str:
+        """Transcribes audio to text using the loaded ASR model.
 
         Args:
-            file (str): Path to the input audio file.
+            audio (str | bytes | memoryview | np.ndarray): Path to the input audio file,
+                encoded audio of any format FFmpeg supports, or mono float samples at
+                16 kHz.
 
         Returns:
             str: The transcribed text from the audio.
 
         Raises:
-            TranscriptionError: If the audio file is empty or an error occurs during transcription.
+            TranscriptionError: If the audio is empty or an error occurs during transcription.
         """
-        if self.__audio_helper.is_file_empty(file):
-            raise TranscriptionError(f"file {file} is empty or contains only silence")
-
-        outfile = self.__audio_helper.convert_audio_to_wav(file)
-        log.info(f"Transcribing {outfile}...")
+        inputs, name = self.__prepare(audio)
+        log.info(f"Transcribing {name}...")
         t0 = time.time()
 
         try:
-            result = self.__transcriber(
-                outfile, generate_kwargs={"language": self.__language}
-            )
+            with self._in_use():
+                result = self.__transcriber(
+                    inputs, generate_kwargs={"language": self.__language}
+                )
         except Exception as e:
             log.exception(f"Error while transcribing: {e}")
-            raise TranscriptionError(f"Error while transcribing file: {outfile}")
+            raise TranscriptionError(f"Error while transcribing file: {name}")
 
         t1 = time.time()
         log.info(f"Transcription completed in {t1 - t0:.2f} seconds.")
         return result["text"]
 
+    def transcribe_segments(
+        self, audio: str | bytes | memoryview | np.ndarray
+    ) -> Iterator[str]:
+        """Transcribes audio segment by segment.
+
+        The audio is split at pauses into segments of at most `ASR_SEGMENT_MAX_SECONDS`,
+        and the text of each segment is yielded as soon as it is transcribed. This lets
+        the caller start working with the beginning of the transcript early.
+
+        Args:
+            audio (str | bytes | memoryview | np.ndarray): Path to the input audio file,
+                encoded audio of any format FFmpeg supports, or mono float samples at
+                16 kHz.
+
+        Yields:
+            str: The transcribed text of each segment, in order.
+
+        Raises:
+            TranscriptionError: If the audio is empty or an error occurs during transcription.
+        """
+        inputs, name = self.__prepare(audio)
+        if isinstance(inputs, dict):
+            inputs = self.__audio_helper.to_segment(
+                inputs["raw"], inputs["sampling_rate"]
+            )
+        segments = self.__audio_helper.split_on_silence(
+            inputs, config.ASR_SEGMENT_MAX_SECONDS * 1000
+        )
+        log.info(f"Transcribing {name} in {len(segments)} segments...")
+        t0 = time.time()
+
+        for index, segment in enumerate(segments):
+            try:
+                with self._in_use():
+                    sampling_rate = self.__transcriber.feature_extractor.sampling_rate
+                    result = self.__transcriber(
+                        {
+                            "raw": self.__audio_helper.to_samples(
+                                segment, sampling_rate
+                            ),
+                            "sampling_rate": sampling_rate,
+                        },
+                        generate_kwargs={"language": self.__language},
+                    )
+            except Exception as e:
+                log.exception(f"Error while transcribing: {e}")
+                raise TranscriptionError(
+                    f"Error while transcribing segment {index} of file: {name}"
+                )
+            log.debug(f"Transcribed segment {index + 1}/{len(segments)}")
+            yield result["text"]
+
+        t1 = time.time()
+        log.info(f"Transcription completed in {t1 - t0:.2f} seconds.")
+
+    def __prepare(
+        self, audio: str | bytes | memoryview | np.ndarray
+    ) -> tuple[str | dict, str]:
+        """Checks that audio isn't empty and converts it to an input of the pipeline.
+
+        Files are converted to WAV on disk, encoded audio is decoded in memory.
+
+        Args:
+            audio (str | bytes | memoryview | np.ndarray): The audio, see `transcribe`.
+
+        Returns:
+            tuple[str | dict, str]: The path of the WAV file or a dict with the raw
+                samples and their sampling rate, and a name of the audio for the log.
+
+        Raises:
+            TranscriptionError: If the audio is empty or can't be decoded.
+        """
+        if isinstance(audio, str):
+            if self.__audio_helper.is_file_empty(audio):
+                raise TranscriptionError(
+                    f"file {audio} is empty or contains only silence", permanent=True
+                )
+            outfile = self.__audio_helper.convert_audio_to_wav(audio)
+            return outfile, outfile
+
+        if isinstance(audio, np.ndarray):
+            samples = audio
+        else:
+            samples = self.__audio_helper.decode_audio(audio, self.__SAMPLING_RATE)
+        if self.__audio_helper.is_samples_empty(samples, self.__SAMPLING_RATE):
+            raise TranscriptionError(
+                "uploaded audio is empty or contains only silence", permanent=True
+            )
+        name = f"{len(samples) / self.__SAMPLING_RATE:.1f}s of uploaded audio"
+        return {"raw": samples, "sampling_rate": self.__SAMPLING_RATE}, name
+
+    def _load_models(self) -> None:
+        """Loads the Whisper pipeline."""
+        self.__transcriber = self.__load_model()
+
+    def _unload_models(self) -> None:
+        """Drops the Whisper pipeline."""
+        self.__transcriber = None
+
     def __load_model(self) -> Pipeline:
         """Loads the Whisper ASR model using the Hugging Face Transformers pipeline.
 
@@ -0,0 +1,115 @@
+import asyncio
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class AudioEncoder:
+    """Reads generated WAV files and optionally compresses them for sending.
+
+    Compression runs FFmpeg in a thread pool, so several files are encoded in parallel
+    without blocking the event loop. FLAC is lossless and about half the size of the
+    WAV, Opus is lossy and much smaller at speech quality.
+
+    Attributes:
+        __CODECS (dict[str, list[str]]): FFmpeg output arguments by codec name.
+        __codec (Optional[str]): Codec to compress with, None to send the WAV as is.
+        __executor (ThreadPoolExecutor): Threads reading and compressing the files.
+    """
+
+    __CODECS = {
+        "flac": ["-c:a", "flac", "-f", "flac"],
+        "opus": ["-c:a", "libopus", "-b:a", "24k", "-f", "ogg"],
+    }
+
+    def __init__(self, codec: Optional[str], workers: int) -> None:
+        """Initializes the AudioEncoder.
+
+        Args:
+            codec (Optional[str]): Codec to compress with, "flac", "opus" or None.
+            workers (int): Number of files encoded in parallel.
+
+        Raises:
+            ValueError: If the codec isn't supported.
+        """
+        if codec is not None and codec not in self.__CODECS:
+            raise ValueError(f"Unsupported audio codec: {codec}")
+        self.__codec = codec
+        self.__executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="audio-encoder"
+        )
+
+    @property
+    def format(self) -> str:
+        """Format of the encoded audio, "wav" if it isn't compressed."""
+        return self.__codec or "wav"
+
+    async def encode(self, file: str) -> bytes:
+        """Reads a WAV file and compresses it with the configured codec.
+
+        Args:
+            file (str): Path to the WAV file.
+
+        Returns:
+            bytes: The encoded audio.
+
+        Raises:
+            AudioGenerationError: If the file couldn't be read or compressed.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, self.__encode, file)
+
+    def stop(self) -> None:
+        """Shuts down the thread pool, waiting for running encodings."""
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+
+    def __encode(self, file: str) -> bytes:
+        """Reads and compresses a file, runs in the thread pool.
+
+        Args:
+            file (str): Path to the WAV file.
+
+        Returns:
+            bytes: The encoded audio.
+
+        Raises:
+            AudioGenerationError: If the file couldn't be read or compressed.
+        """
+        try:
+            with open(file, "rb") as f:
+                data = f.read()
+        except OSError as e:
+            log.error(f"Could not read generated audio {file}: {e}")
+            raise AudioGenerationError("Could not read the generated audio.")
+        if self.__codec is None:
+            return data
+
+        # ffmpeg -i pipe:0 <codec arguments> pipe:1
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0"]
+                + self.__CODECS[self.__codec]
+                + ["pipe:1"],
+                input=data,
+                capture_output=True,
+            )
+        except OSError as e:
+            # E.g. FFmpeg isn't installed
+            log.error(f"Could not run FFmpeg to encode {file}: {e}")
+            raise AudioGenerationError("Could not compress the generated audio.")
+        if result.returncode != 0 or not result.stdout:
+            log.error(
+                f"Could not encode {file} to {self.__codec}: "
+                f"{result.stderr.decode('utf-8', errors='replace')}"
+            )
+            raise AudioGenerationError("Could not compress the generated audio.")
+        metrics.increment("tts_encoded_bytes_in", len(data))
+        metrics.increment("tts_encoded_bytes_out", len(result.stdout))
+        return result.stdout
@@ -0,0 +1,113 @@
+import gc
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator
+
+import torch
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class EvictableService(ABC):
+    """Base class for services holding models that can be unloaded while idle.
+
+    Subclasses load their models in `_load_models` and drop every reference to them in
+    `_unload_models`. Code using the models runs inside `_in_use`, which reloads them
+    if they were unloaded and keeps them from being unloaded while they are used.
+    Models are reloaded from the safetensors files in the Hugging Face cache, which are
+    memory-mapped, so a reload mostly costs page faults instead of a full read.
+
+    Attributes:
+        __name (str): Name of the service used in log messages and metrics.
+        __lock (threading.Lock): Lock guarding loading, unloading and the usage count.
+        __users (int): Number of callers currently using the models.
+        __loaded (bool): Whether the models are loaded.
+        __last_used (float): Monotonic time the models were last used.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initializes the EvictableService without loading the models.
+
+        Args:
+            name (str): Name of the service used in log messages and metrics.
+        """
+        self.__name = name
+        self.__lock = threading.Lock()
+        self.__users = 0
+        self.__loaded = False
+        self.__last_used = time.monotonic()
+
+    def load(self) -> None:
+        """Loads the models if they aren't loaded yet."""
+        with self.__lock:
+            self.__load()
+
+    def is_loaded(self) -> bool:
+        """Returns whether the models are loaded.
+
+        Returns:
+            bool: True if the models are loaded.
+        """
+        return self.__loaded
+
+    def unload_if_idle(self, idle_seconds: float) -> bool:
+        """Unloads the models if they weren't used for the given time.
+
+        Args:
+            idle_seconds (float): Minimum time in seconds since the last use.
+
+        Returns:
+            bool: True if the models were unloaded.
+        """
+        with self.__lock:
+            idle = time.monotonic() - self.__last_used
+            if not self.__loaded or self.__users > 0 or idle < idle_seconds:
+                return False
+            log.info(f"Unloading {self.__name} after {idle:.0f} seconds idle")
+            self._unload_models()
+            self.__loaded = False
+
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        metrics.increment(f"{self.__name.lower()}_unloads")
+        return True
+
+    @contextmanager
+    def _in_use(self) -> Iterator[None]:
+        """Marks the models as used for the duration of the block, loading them if needed."""
+        with self.__lock:
+            self.__load()
+            self.__users += 1
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__users -= 1
+                self.__last_used = time.monotonic()
+
+    @abstractmethod
+    def _load_models(self) -> None:
+        """Loads the models of the service."""
+        pass
+
+    @abstractmethod
+    def _unload_models(self) -> None:
+        """Drops all references to the models of the service."""
+        pass
+
+    def __load(self) -> None:
+        """Loads the models if they aren't loaded yet, the lock has to be held."""
+        if self.__loaded:
+            return
+        t0 = time.time()
+        self._load_models()
+        self.__loaded = True
+        self.__last_used = time.monotonic()
+        metrics.observe(f"{self.__name.lower()}_load_seconds", time.time() - t0)
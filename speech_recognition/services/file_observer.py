@@ -1,13 +1,18 @@
 import asyncio
 import os
+import threading
 from asyncio import AbstractEventLoop
-from typing import Any
+from pathlib import Path
+from typing import Any, Optional
 
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from watchdog.observers import Observer
+from watchdog.utils import platform
 
+from speech_recognition import config
 from speech_recognition.services.llm_service import RequestType
 from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
 
 log = LoggerHelper(__name__).get_logger()
 
@@ -16,18 +21,39 @@ class FileObserver(FileSystemEventHandler):
     """Observes a directory and handles file creation events.
 
     This class uses `watchdog` to monitor a specified directory. When a new file is
-    created, it identifies the type of request based on the filename and enqueues
-    the file for asynchronous processing.
+    completely written, it identifies the type of request based on the filename and
+    enqueues the file for asynchronous processing.
+
+    A file is complete once its writer closed it, where the platform reports that
+    (inotify on Linux). Elsewhere, it is complete once its size and modification time
+    didn't change for `FILE_STABLE_SECONDS`. Uploaders can also write to a file ending
+    with `.part` and rename it when done, files moved into the directory are complete.
+    On Linux, files moved in from another directory are reported as moves without
+    a source, as no close follows for them.
 
     Attributes:
+        PART_SUFFIX (str): Suffix of files still being written, they are ignored.
         __loop (AbstractEventLoop): The event loop used to schedule coroutines.
         __queue (asyncio.Queue): An asyncio queue to store files for processing.
         __path (str): Directory path to be observed.
         __observer (BaseObserver): The watchdog observer instance.
+        __close_events (bool): Whether the observer reports closed files.
+        __pending (set[str]): Created files waiting to be completely written.
+        __lock (threading.Lock): Lock guarding the pending files, they are completed
+            by the observer thread and the event loop.
+        __index (Optional[ProcessedFileIndex]): Index of the processed files, files
+            already processed or queued by the backlog scan are skipped. None to
+            queue every file.
     """
 
+    PART_SUFFIX = ".part"
+
     def __init__(
-        self, loop: AbstractEventLoop, queue: asyncio.Queue, path: str
+        self,
+        loop: AbstractEventLoop,
+        queue: asyncio.Queue,
+        path: str,
+        index: Optional[ProcessedFileIndex] = None,
     ) -> None:
         """Initializes the FileObserver.
 
@@ -35,15 +61,29 @@ class FileObserver(FileSystemEventHandler):
             loop (AbstractEventLoop): The event loop for running coroutines.
             queue (asyncio.Queue): An asyncio queue where detected files will be added.
             path (str): The path to the directory to observe.
+            index (Optional[ProcessedFileIndex]): Index of the processed files, used to
+                skip files that are already processed or queued.
         """
         self.__loop = loop
         self.__queue = queue
         self.__path = path
         self.__observer = None
+        # The inotify observer used on Linux reports when a written file is closed
+        self.__close_events = platform.is_linux()
+        self.__pending = set()
+        self.__lock = threading.Lock()
+        self.__index = index
 
     def start(self) -> None:
         """Starts monitoring the target directory for file creation events."""
-        self.__observer = Observer()
+        if self.__close_events:
+            # Only available on Linux
+            from watchdog.observers.inotify import InotifyObserver
+
+            # Report files moved in from elsewhere as moves, not as created files
+            self.__observer = InotifyObserver(generate_full_events=True)
+        else:
+            self.__observer = Observer()
         log.debug(f"Starting file observer on {self.__path}")
         self.__observer.schedule(event_handler=self, path=self.__path, recursive=False)
         self.__observer.start()
@@ -63,14 +103,86 @@ class FileObserver(FileSystemEventHandler):
     def on_created(self, event: FileSystemEvent) -> None:
         """Handles the event triggered when a new file is created.
 
-        Parses the file name to determine the request type and adds the file path
-        and request type to the queue for processing.
+        The file is enqueued once it is completely written, see `on_closed`.
 
         Args:
             event (FileSystemEvent): The file creation event.
         """
-        filename = str(event.src_path.split(os.sep)[-1])
-        log.info(f"Detected file creation: {filename}")
+        if event.is_directory:
+            return
+        path = str(event.src_path)
+        log.info(f"Detected file creation: {path.split(os.sep)[-1]}")
+        if path.endswith(self.PART_SUFFIX):
+            log.debug(f"Waiting for {path} to be renamed")
+            return
+        with self.__lock:
+            self.__pending.add(path)
+        if not self.__close_events:
+            asyncio.run_coroutine_threadsafe(
+                self.__wait_until_stable(path), self.__loop
+            )
+
+    def on_closed(self, event: FileSystemEvent) -> None:
+        """Handles the event triggered when a file written to is closed.
+
+        Enqueues the file if it was created since the observer started.
+
+        Args:
+            event (FileSystemEvent): The file closed event.
+        """
+        path = str(event.src_path)
+        if self.__take_pending(path):
+            log.debug(f"File written: {path}")
+            self.__submit(path)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        """Handles the event triggered when a file is renamed or moved into the directory.
+
+        Renaming is atomic, so the file is complete and enqueued right away, unless
+        it is renamed to a name ending with `.part`. Files moved in from outside the
+        observed directory have an empty source path on Linux.
+
+        Args:
+            event (FileSystemEvent): The file moved event.
+        """
+        if event.is_directory:
+            return
+        self.__take_pending(str(event.src_path))
+        path = str(event.dest_path)
+        if path.endswith(self.PART_SUFFIX) or os.path.dirname(
+            os.path.abspath(path)
+        ) != os.path.abspath(self.__path):
+            return
+        log.info(f"Detected file moved in: {path.split(os.sep)[-1]}")
+        self.__submit(path)
+
+    def __take_pending(self, path: str) -> bool:
+        """Removes a file from the pending files.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            bool: True if the file was pending.
+        """
+        with self.__lock:
+            if path not in self.__pending:
+                return False
+            self.__pending.remove(path)
+            return True
+
+    @staticmethod
+    def create_request(path: str) -> dict:
+        """Parses the file name to determine the request type and builds the request.
+
+        Args:
+            path (str): Path of the audio file.
+
+        Returns:
+            dict: The request with the file path, the request type and the request id,
+                which is the file name without extension.
+        """
+        filename = path.split(os.sep)[-1]
         match filename.split("-")[0]:
             case "person":
                 req_type = RequestType.PERSON_DATA
@@ -78,21 +190,53 @@ class FileObserver(FileSystemEventHandler):
                 req_type = RequestType.COMMAND
             case _:
                 req_type = RequestType.BAD_REQUEST
+        return {"file": path, "req_type": req_type, "request_id": Path(filename).stem}
+
+    def __submit(self, path: str) -> None:
+        """Adds the request of a completely written file to the queue for processing.
 
+        Args:
+            path (str): Path of the completely written file.
+        """
+        if self.__index is not None and not self.__index.claim(path):
+            log.info(f"Skipping already processed or queued file: {path}")
+            return
         try:
             asyncio.run_coroutine_threadsafe(
-                self.__add_to_queue({"file": event.src_path, "req_type": req_type}),
-                self.__loop,
+                self.__add_to_queue(self.create_request(path)), self.__loop
             )
         except Exception as e:
             log.warning(f"Exception when adding file to queue: {e}")
 
+    async def __wait_until_stable(self, path: str) -> None:
+        """Enqueues a file once its size and modification time stopped changing.
+
+        Args:
+            path (str): Path of the created file.
+        """
+        previous = None
+        while True:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Deleted or renamed before it was complete
+                self.__take_pending(path)
+                return
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current == previous:
+                break
+            previous = current
+            await asyncio.sleep(config.FILE_STABLE_SECONDS)
+        if self.__take_pending(path):
+            log.debug(f"File stable: {path}")
+            self.__submit(path)
+
     async def __add_to_queue(self, item: Any) -> None:
         """Adds an item to the asyncio queue.
 
         Args:
             item (Any): The item to add to the queue, typically a dict containing
-                'file' (str): File path, and 'req_type' (RequestType).
+                'file' (str): File path, 'req_type' (RequestType) and 'request_id' (str).
         """
         log.debug(f"Adding to queue: {item}")
         await self.__queue.put(item)
@@ -0,0 +1,114 @@
+import json
+import threading
+from typing import Callable, Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+
+try:
+    from llama_cpp import Llama, LlamaGrammar, LlamaRAMCache
+except ImportError:
+    # llama-cpp-python is optional, it's only needed for the llama_cpp backend
+    Llama, LlamaGrammar, LlamaRAMCache = None, None, None
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class LlamaCppEngine:
+    """Generation engine running a quantized GGUF model with llama.cpp.
+
+    The output is constrained by a grammar generated from a JSON schema, so the model
+    can only produce valid JSON objects with the requested fields. The KV state of
+    evaluated prompts is kept in a RAM cache, so the shared system prompt prefix of
+    the requests doesn't have to be evaluated again.
+
+    Attributes:
+        __llm (Llama): The loaded llama.cpp model.
+        __grammars (dict[str, LlamaGrammar]): Compiled grammars keyed by their JSON schema.
+        __lock (threading.Lock): Lock serializing generations, the model isn't thread-safe.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        n_threads: Optional[int],
+        n_ctx: int,
+        cache_bytes: int,
+    ) -> None:
+        """Initializes the LlamaCppEngine and loads the model.
+
+        Args:
+            model_path (str): Path of the local GGUF model file.
+            n_threads (Optional[int]): Number of CPU threads, None lets llama.cpp decide.
+            n_ctx (int): Context size in tokens.
+            cache_bytes (int): Capacity of the prompt cache in bytes.
+
+        Raises:
+            ImportError: If llama-cpp-python isn't installed.
+        """
+        if Llama is None:
+            raise ImportError(
+                "The llama_cpp backend requires llama-cpp-python, "
+                "install it with: pip install llama-cpp-python"
+            )
+        log.info(
+            f"Loading GGUF model: {model_path} with {n_threads or 'default'} threads "
+            f"and context size {n_ctx}"
+        )
+        self.__llm = Llama(
+            model_path=model_path, n_threads=n_threads, n_ctx=n_ctx, verbose=False
+        )
+        self.__llm.set_cache(LlamaRAMCache(capacity_bytes=cache_bytes))
+        self.__grammars = {}
+        self.__lock = threading.Lock()
+
+    def generate(
+        self,
+        messages: list[dict[str, str]],
+        max_new_tokens: int,
+        json_schema: dict,
+        on_text: Optional[Callable[[str], None]] = None,
+    ) -> tuple[str, int]:
+        """Generates a JSON answer to a list of chat-style messages.
+
+        Args:
+            messages (list[dict[str, str]]): A list of chat messages including system
+                and user roles for prompt context.
+            max_new_tokens (int): Maximum number of tokens to generate.
+            json_schema (dict): JSON schema the output has to follow.
+            on_text (Optional[Callable[[str], None]]): Optional callback receiving the
+                generated text in chunks while the model generates.
+
+        Returns:
+            tuple[str, int]: The generated text and the number of generated tokens.
+        """
+        with self.__lock:
+            chunks = self.__llm.create_chat_completion(
+                messages=messages,
+                max_tokens=max_new_tokens,
+                temperature=0.0,
+                grammar=self.__get_grammar(json_schema),
+                stream=True,
+            )
+            output = ""
+            for chunk in chunks:
+                text = chunk["choices"][0]["delta"].get("content")
+                if text:
+                    output += text
+                    if on_text is not None:
+                        on_text(text)
+            generated = len(self.__llm.tokenize(output.encode("utf-8"), add_bos=False))
+        return output, generated
+
+    def __get_grammar(self, json_schema: dict) -> LlamaGrammar:
+        """Returns the grammar for a JSON schema, compiling it on first use.
+
+        Args:
+            json_schema (dict): The JSON schema.
+
+        Returns:
+            LlamaGrammar: The compiled grammar.
+        """
+        key = json.dumps(json_schema, sort_keys=True)
+        if key not in self.__grammars:
+            self.__grammars[key] = LlamaGrammar.from_json_schema(key, verbose=False)
+        return self.__grammars[key]
@@ -0,0 +1,116 @@
+import threading
+from typing import Optional
+
+import torch
+from transformers import DynamicCache, PreTrainedModel, PreTrainedTokenizerFast
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class PrefillSession:
+    """Prefills the prompt of a request into a KV cache while the transcript is still growing.
+
+    The session starts with the fixed part of the prompt in front of the transcript,
+    i.e. the chat template with the system prompt. Every time ASR finalizes another
+    segment, the prompt up to the end of the transcript so far is fed to the model, so
+    only the tokens that weren't seen before are computed. When the final prompt is
+    generated, the cache is cropped to the part it has in common with it.
+
+    Attributes:
+        __model (PreTrainedModel): The causal language model filling the cache.
+        __tokenizer (PreTrainedTokenizerFast): Tokenizer used to encode the prompt.
+        __prefix (str): Text of the prompt in front of the transcript.
+        __cache (DynamicCache): KV cache of the tokens prefilled so far.
+        __input_ids (list[int]): Token ids the cache was filled with.
+        __lock (threading.Lock): Lock guarding the cache, feeding and generating run
+            in different threads.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        tokenizer: PreTrainedTokenizerFast,
+        prefix: str,
+    ) -> None:
+        """Initializes the PrefillSession.
+
+        Args:
+            model (PreTrainedModel): The causal language model filling the cache.
+            tokenizer (PreTrainedTokenizerFast): Tokenizer used to encode the prompt.
+            prefix (str): Text of the prompt in front of the transcript.
+        """
+        self.__model = model
+        self.__tokenizer = tokenizer
+        self.__prefix = prefix
+        self.__cache = DynamicCache()
+        self.__input_ids = []
+        self.__lock = threading.Lock()
+
+    def feed(self, transcript: str) -> None:
+        """Prefills the prompt up to the end of the transcript so far.
+
+        Args:
+            transcript (str): The transcript finalized so far.
+        """
+        input_ids = self.__tokenizer(self.__prefix + transcript)["input_ids"]
+        with self.__lock, torch.inference_mode():
+            common = self.__common_prefix_length(input_ids)
+            # The last token of a segment might merge with the text following it
+            self.__cache.crop(common)
+            new_ids = input_ids[common:]
+            try:
+                if new_ids:
+                    self.__model(
+                        input_ids=torch.tensor([new_ids], device=self.__model.device),
+                        past_key_values=self.__cache,
+                        use_cache=True,
+                    )
+            except Exception as e:
+                # The cache might be partially updated, start over with the final prompt
+                log.warning(f"Error while prefilling, discarding the cache: {e}")
+                self.__cache, self.__input_ids = DynamicCache(), []
+                return
+            self.__input_ids = input_ids
+        log.debug(f"Prefilled {len(new_ids)} new tokens, {len(input_ids)} in total")
+
+    def take_cache(self, input_ids: list[int]) -> Optional[DynamicCache]:
+        """Returns the cache for generating the final prompt.
+
+        The cache is cropped to the longest prefix it shares with the final prompt.
+        At least the last prompt token is left to the model to get the first logits.
+
+        Args:
+            input_ids (list[int]): Token ids of the final prompt.
+
+        Returns:
+            Optional[DynamicCache]: The cropped cache, None if nothing can be reused.
+        """
+        with self.__lock:
+            length = min(self.__common_prefix_length(input_ids), len(input_ids) - 1)
+            if length <= 0:
+                return None
+            self.__cache.crop(length)
+            self.__input_ids = self.__input_ids[:length]
+        metrics.increment("llm_prefilled_tokens", length)
+        log.info(f"Reusing {length}/{len(input_ids)} prefilled prompt tokens")
+        return self.__cache
+
+    def __common_prefix_length(self, input_ids: list[int]) -> int:
+        """Returns the number of leading tokens shared with the prefilled ones.
+
+        Args:
+            input_ids (list[int]): The token ids to compare.
+
+        Returns:
+            int: Length of the common prefix.
+        """
+        length = 0
+        for cached, new in zip(self.__input_ids, input_ids):
+            if cached != new:
+                break
+            length += 1
+        return length
@@ -0,0 +1,348 @@
+import queue
+import threading
+from typing import Callable, Optional
+
+import torch
+import torch.nn.functional as F
+from transformers import DynamicCache, PreTrainedModel
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class GenerationRequest:
+    """A single sequence that is generated as part of the running batch.
+
+    Attributes:
+        input_ids (list[int]): Token ids of the prompt.
+        max_new_tokens (int): Maximum number of tokens to generate.
+        stopping_criteria (Optional[Callable[[list[int]], bool]]): Optional check on the
+            generated ids, returning True when the sequence should stop.
+        generated (list[int]): Token ids generated so far.
+        error (Optional[Exception]): Exception raised while generating, if any.
+        done (threading.Event): Set once the sequence finished or failed.
+    """
+
+    def __init__(
+        self,
+        input_ids: list[int],
+        max_new_tokens: int,
+        stopping_criteria: Optional[Callable[[list[int]], bool]] = None,
+    ) -> None:
+        """Initializes the GenerationRequest.
+
+        Args:
+            input_ids (list[int]): Token ids of the prompt.
+            max_new_tokens (int): Maximum number of tokens to generate.
+            stopping_criteria (Optional[Callable[[list[int]], bool]]): Optional check on
+                the generated ids, returning True when the sequence should stop.
+        """
+        self.input_ids = input_ids
+        self.max_new_tokens = max_new_tokens
+        self.stopping_criteria = stopping_criteria
+        self.generated = []
+        self.error = None
+        self.done = threading.Event()
+
+
+class ContinuousBatchingScheduler:
+    """Greedy decoding scheduler that lets concurrent requests share decode steps.
+
+    All requests are decoded together in one batch by a background thread. New requests
+    are prefilled on their own and join the running batch at the next token boundary,
+    their KV cache and attention mask are left-padded to the length of the batch.
+    Sequences that hit an EOS token, their token budget or their stopping criteria leave
+    the batch immediately, so short answers don't wait for long ones.
+
+    Attributes:
+        __model (PreTrainedModel): The causal language model used for decoding.
+        __eos_token_ids (set[int]): Token ids that end a sequence.
+        __max_batch_size (int): Maximum number of sequences decoded together.
+        __pending (queue.Queue): Requests waiting to join the batch.
+        __active (list[GenerationRequest]): Requests currently in the batch.
+        __cache (Optional[tuple]): Legacy KV cache of the batch, one (key, value) per layer.
+        __attention_mask (Optional[torch.Tensor]): Attention mask of the batch, 0 for padding.
+        __thread (Optional[threading.Thread]): Background thread running the decode loop.
+        __lock (threading.Lock): Lock guarding the background thread, requests are
+            only queued while it runs.
+    """
+
+    def __init__(
+        self,
+        model: PreTrainedModel,
+        eos_token_ids: list[int],
+        max_batch_size: int,
+    ) -> None:
+        """Initializes the ContinuousBatchingScheduler.
+
+        Args:
+            model (PreTrainedModel): The causal language model used for decoding.
+            eos_token_ids (list[int]): Token ids that end a sequence.
+            max_batch_size (int): Maximum number of sequences decoded together.
+        """
+        self.__model = model
+        self.__eos_token_ids = set(eos_token_ids)
+        self.__max_batch_size = max_batch_size
+        self.__pending = queue.Queue()
+        self.__active = []
+        self.__cache = None
+        self.__attention_mask = None
+        self.__thread = None
+        self.__lock = threading.Lock()
+
+    def generate(
+        self,
+        input_ids: list[int],
+        max_new_tokens: int,
+        stopping_criteria: Optional[Callable[[list[int]], bool]] = None,
+    ) -> list[int]:
+        """Generates a continuation for the given prompt, blocking until it is finished.
+
+        Safe to call from several threads at once, the calls share the decode batch.
+
+        Args:
+            input_ids (list[int]): Token ids of the prompt.
+            max_new_tokens (int): Maximum number of tokens to generate.
+            stopping_criteria (Optional[Callable[[list[int]], bool]]): Optional check on
+                the generated ids, returning True when the sequence should stop.
+
+        Returns:
+            list[int]: The generated token ids, without the prompt.
+
+        Raises:
+            Exception: Any exception raised by the model while decoding this request,
+                or a RuntimeError if the scheduler was stopped before it finished.
+        """
+        request = GenerationRequest(input_ids, max_new_tokens, stopping_criteria)
+        self.__submit(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.generated
+
+    def stop(self) -> None:
+        """Stops the background decode loop after the current step.
+
+        Requests waiting to join the batch fail right away, the running ones once the
+        loop stopped.
+        """
+        with self.__lock:
+            if self.__thread is None:
+                return
+            while True:
+                try:
+                    request = self.__pending.get_nowait()
+                except queue.Empty:
+                    break
+                request.error = RuntimeError("Scheduler stopped")
+                request.done.set()
+            self.__pending.put(None)
+            self.__thread.join()
+            self.__thread = None
+
+    def __submit(self, request: GenerationRequest) -> None:
+        """Queues a request, starting the background decode loop if it isn't running yet.
+
+        Args:
+            request (GenerationRequest): The request to queue.
+        """
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+            self.__pending.put(request)
+
+    def __run(self) -> None:
+        """Decode loop: admit waiting requests, then run one decode step for the batch."""
+        log.info(f"Continuous batching started, max batch size {self.__max_batch_size}")
+        with torch.inference_mode():
+            while True:
+                try:
+                    if not self.__admit_requests():
+                        break
+                    if self.__active:
+                        self.__decode_step()
+                except Exception as e:
+                    log.exception(f"Error in continuous batching decode loop: {e}")
+                    self.__fail_active(e)
+        self.__fail_active(RuntimeError("Scheduler stopped"))
+        log.info("Continuous batching stopped")
+
+    def __admit_requests(self) -> bool:
+        """Prefills waiting requests and merges them into the running batch.
+
+        Blocks while there is nothing to decode.
+
+        Returns:
+            bool: False if the scheduler was stopped, True otherwise.
+        """
+        while len(self.__active) < self.__max_batch_size:
+            try:
+                request = self.__pending.get(block=not self.__active)
+            except queue.Empty:
+                break
+            if request is None:
+                return False
+            try:
+                self.__prefill(request)
+            except Exception as e:
+                request.error = e
+                request.done.set()
+        return True
+
+    def __prefill(self, request: GenerationRequest) -> None:
+        """Runs the prompt of a single request and merges its cache into the batch.
+
+        Args:
+            request (GenerationRequest): The request to prefill.
+        """
+        input_ids = torch.tensor([request.input_ids], device=self.__model.device)
+        output = self.__model(input_ids=input_ids, use_cache=True)
+        request.generated.append(int(output.logits[0, -1].argmax()))
+        if self.__is_finished(request):
+            request.done.set()
+            return
+
+        cache = self.__to_legacy_cache(output.past_key_values)
+        mask = torch.ones(
+            (1, len(request.input_ids)), dtype=torch.long, device=input_ids.device
+        )
+        if self.__cache is None:
+            self.__cache, self.__attention_mask = cache, mask
+        else:
+            length = max(self.__attention_mask.shape[1], mask.shape[1])
+            self.__cache = tuple(
+                (
+                    torch.cat([self.__pad(key, length), self.__pad(new_key, length)]),
+                    torch.cat(
+                        [self.__pad(value, length), self.__pad(new_value, length)]
+                    ),
+                )
+                for (key, value), (new_key, new_value) in zip(self.__cache, cache)
+            )
+            self.__attention_mask = torch.cat(
+                [
+                    F.pad(
+                        self.__attention_mask,
+                        (length - self.__attention_mask.shape[1], 0),
+                    ),
+                    F.pad(mask, (length - mask.shape[1], 0)),
+                ]
+            )
+        self.__active.append(request)
+        metrics.observe("llm_batch_size", len(self.__active))
+
+    def __decode_step(self) -> None:
+        """Feeds the last token of every active sequence and appends the next one."""
+        device = self.__attention_mask.device
+        input_ids = torch.tensor(
+            [[request.generated[-1]] for request in self.__active], device=device
+        )
+        attention_mask = F.pad(self.__attention_mask, (0, 1), value=1)
+        position_ids = attention_mask.sum(dim=-1, keepdim=True) - 1
+
+        output = self.__model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=DynamicCache.from_legacy_cache(self.__cache),
+            use_cache=True,
+        )
+        self.__cache = self.__to_legacy_cache(output.past_key_values)
+        self.__attention_mask = attention_mask
+
+        next_tokens = output.logits[:, -1].argmax(dim=-1).tolist()
+        keep = []
+        for index, (request, token) in enumerate(zip(self.__active, next_tokens)):
+            request.generated.append(token)
+            if self.__is_finished(request):
+                request.done.set()
+            else:
+                keep.append(index)
+
+        if len(keep) < len(self.__active):
+            self.__evict(keep)
+
+    def __evict(self, keep: list[int]) -> None:
+        """Removes finished sequences from the batch.
+
+        Padding columns that no remaining sequence needs anymore are dropped as well.
+
+        Args:
+            keep (list[int]): Batch indices of the sequences that are still running.
+        """
+        self.__active = [self.__active[index] for index in keep]
+        if not self.__active:
+            self.__cache, self.__attention_mask = None, None
+            return
+
+        indices = torch.tensor(keep, device=self.__attention_mask.device)
+        mask = self.__attention_mask.index_select(0, indices)
+        start = int(mask.any(dim=0).nonzero()[0])
+        self.__attention_mask = mask[:, start:]
+        self.__cache = tuple(
+            (
+                key.index_select(0, indices)[:, :, start:],
+                value.index_select(0, indices)[:, :, start:],
+            )
+            for key, value in self.__cache
+        )
+
+    def __is_finished(self, request: GenerationRequest) -> bool:
+        """Checks whether a sequence hit EOS, its token budget or its stopping criteria.
+
+        Args:
+            request (GenerationRequest): The request to check.
+
+        Returns:
+            bool: True if the sequence is finished.
+        """
+        if request.generated[-1] in self.__eos_token_ids:
+            return True
+        if len(request.generated) >= request.max_new_tokens:
+            return True
+        return request.stopping_criteria is not None and request.stopping_criteria(
+            request.generated
+        )
+
+    def __fail_active(self, error: Exception) -> None:
+        """Fails all active requests and resets the batch.
+
+        Args:
+            error (Exception): The error to hand to the waiting callers.
+        """
+        for request in self.__active:
+            request.error = error
+            request.done.set()
+        self.__active = []
+        self.__cache, self.__attention_mask = None, None
+
+    @staticmethod
+    def __pad(tensor: torch.Tensor, length: int) -> torch.Tensor:
+        """Left-pads a cached key or value tensor to the given sequence length.
+
+        Args:
+            tensor (torch.Tensor): Tensor of shape (batch, heads, sequence, head_dim).
+            length (int): The target sequence length.
+
+        Returns:
+            torch.Tensor: The padded tensor.
+        """
+        return F.pad(tensor, (0, 0, length - tensor.shape[2], 0))
+
+    @staticmethod
+    def __to_legacy_cache(cache) -> tuple:
+        """Converts a model cache to the legacy tuple format.
+
+        Args:
+            cache: The cache returned by the model.
+
+        Returns:
+            tuple: One (key, value) tuple per layer.
+        """
+        if isinstance(cache, DynamicCache):
+            return cache.to_legacy_cache()
+        return tuple(cache)
@@ -1,6 +1,8 @@
+import hashlib
 import json
 import time
 from enum import Enum
+from typing import Optional, Callable, Any
 
 import torch
 from transformers import (
@@ -8,13 +10,32 @@ from transformers import (
     AutoTokenizer,
     PreTrainedTokenizerFast,
     PreTrainedModel,
+    StoppingCriteriaList,
+    TextStreamer,
 )
 
 from speech_recognition import config
 from speech_recognition.exceptions.llm_processing_error import LLMProcessingError
+from speech_recognition.services.evictable_service import EvictableService
+from speech_recognition.services.llama_cpp_engine import LlamaCppEngine
+from speech_recognition.services.llm_prefill_session import PrefillSession
+from speech_recognition.services.llm_scheduler import ContinuousBatchingScheduler
+from speech_recognition.services.llm_stopping_criteria import (
+    JsonCompleteCriteria,
+    RepetitionCriteria,
+)
+from speech_recognition.utils.command_classifier import CommandClassifier
 from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.partial_json_parser import PartialJsonParser
+from speech_recognition.utils.person_data_extractor import (
+    PersonDataExtractor,
+    PERSON_DATA_FIELDS,
+)
+from speech_recognition.utils.response_cache import ResponseCache
 
 log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
 
 
 class RequestType(Enum):
@@ -23,32 +44,84 @@ class RequestType(Enum):
     COMMAND = 3
 
 
-class LLMService:
+class CallbackStreamer(TextStreamer):
+    """Streamer passing the generated text to a callback instead of printing it.
+
+    Attributes:
+        __callback (Callable[[str], None]): Callback receiving each chunk of finalized text.
+    """
+
+    def __init__(
+        self, tokenizer: PreTrainedTokenizerFast, callback: Callable[[str], None]
+    ) -> None:
+        """Initializes the CallbackStreamer, skipping the prompt tokens.
+
+        Args:
+            tokenizer (PreTrainedTokenizerFast): Tokenizer used to decode the tokens.
+            callback (Callable[[str], None]): Callback receiving the generated text.
+        """
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.__callback = callback
+
+    def on_finalized_text(self, text: str, stream_end: bool = False) -> None:
+        """Passes the finalized text to the callback.
+
+        Args:
+            text (str): The newly finalized text.
+            stream_end (bool): Whether this is the end of the stream.
+        """
+        if text:
+            self.__callback(text)
+
+
+class LLMService(EvictableService):
     """Service for loading a language model and generating structured JSON responses.
 
     This service leverages a Hugging Face causal language model to process transcription
     prompts and return structured outputs in JSON format. It supports extracting personal
     data or interpreting commands with yes/no logic.
+    The model can be unloaded while idle and is reloaded once the LLM is needed again,
+    requests answered by the rules or the cache don't reload it.
 
     Attributes:
         __device (torch.device): The device (CPU/GPU) on which the model will run.
         __model_name (str): Name or path of the pretrained model from configuration.
-        __model (PreTrainedModel): Loaded causal language model for inference.
-        __tokenizer (PreTrainedTokenizerFast): Tokenizer used to encode/decode prompts.
-        __PERSON_DATA_PROMPT (str): Prompt instructing the model to extract person-related fields.
+        __model (Optional[PreTrainedModel]): Loaded causal language model for inference,
+            None with the llama_cpp backend or while unloaded.
+        __tokenizer (Optional[PreTrainedTokenizerFast]): Tokenizer used to encode/decode
+            prompts, None with the llama_cpp backend or while unloaded.
+        __engine (Optional[LlamaCppEngine]): llama.cpp engine generating the output
+            instead of the transformers model, None with the transformers backend
+            or while unloaded.
+        __command_classifier (Optional[CommandClassifier]): Rule-based classifier answering
+            unambiguous COMMAND requests without the LLM, None if disabled.
+        __person_data_extractor (Optional[PersonDataExtractor]): Rule-based extractor filling
+            the structured PERSON_DATA fields before the LLM is asked, None if disabled.
+        __scheduler (Optional[ContinuousBatchingScheduler]): Scheduler sharing decode steps
+            between concurrent requests, None if continuous batching is disabled
+            or while unloaded.
+        __prompt_version (str): Hash of the prompts and rule settings, part of the cache key.
+        __response_cache (Optional[ResponseCache]): Cache of results for repeated
+            transcripts, None if disabled.
+        __PERSON_DATA_PROMPT (str): Prompt instructing the model to extract the
+            person-related fields listed after the transcription.
+        __PERSON_DATA_FIELDS_PROMPT (str): Template listing the required `fields` after
+            the transcription, so the prompt in front of the transcription stays the same.
         __COMMAND_PROMPT (str): Prompt for interpreting input as a binary command (yes/no).
     """
 
     __PERSON_DATA_PROMPT = """
         You are a data extraction assistant. 
         Your task is to listen to people's speech transcriptions and extract personal details into a JSON object. 
-        Required fields: firstname, lastname, sex, date_of_birth, phone_number, email_address. 
+        The required fields are listed after the transcription. 
         If a field is missing or unclear, set its value to null. 
         For 'sex', use 'M' for male, 'W' for female, and 'D' for diverse/other. 
         Replace spoken 'at' or 'dot' appropriately in email addresses. 
         Return ONLY the raw JSON object, without any commentary, Markdown, or extra text.
     """
 
+    __PERSON_DATA_FIELDS_PROMPT = "\n\nRequired fields: {fields}."
+
     __COMMAND_PROMPT = """
         You are a data extraction assistant. 
         Your task is to listen to people's speech transcriptions and Classify the input text strictly:
@@ -64,23 +137,69 @@ class LLMService:
         """Initializes the LLMService with a language model and tokenizer.
 
         Loads the model and tokenizer defined in the configuration onto the
-        appropriate device (GPU if available, otherwise CPU).
+        appropriate device (GPU if available, otherwise CPU). With the llama_cpp
+        backend, the GGUF model is loaded into a llama.cpp engine instead.
+
+        Raises:
+            ValueError: If the configured backend is unknown.
         """
 
+        super().__init__("LLM")
         self.__device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.__model_name = config.LLM_MODEL_NAME
-        self.__model, self.__tokenizer = self.__load_model()
-
-    def generate_json_response(self, prompt: str, req_type: RequestType) -> dict:
+        self.__model_name = (
+            config.LLM_GGUF_MODEL_PATH
+            if config.LLM_BACKEND == "llama_cpp"
+            else config.LLM_MODEL_NAME
+        )
+        self.__model, self.__tokenizer, self.__engine = None, None, None
+        self.__scheduler = None
+        self.__command_classifier = (
+            CommandClassifier() if config.LLM_RULE_BASED_COMMANDS else None
+        )
+        self.__person_data_extractor = (
+            PersonDataExtractor() if config.LLM_RULE_BASED_PERSON_DATA else None
+        )
+        self.__prompt_version = self.__get_prompt_version()
+        self.__response_cache = (
+            ResponseCache(
+                config.LLM_CACHE_MAX_ENTRIES,
+                config.LLM_CACHE_TTL_SECONDS,
+                config.LLM_CACHE_FILE,
+            )
+            if config.LLM_CACHE_ENABLED
+            else None
+        )
+        self.load()
+
+    def generate_json_response(
+        self,
+        prompt: str,
+        req_type: RequestType,
+        on_field: Optional[Callable[[str, Any], None]] = None,
+        prefill_session: Optional[PrefillSession] = None,
+    ) -> dict:
         """Generates a structured JSON response from a given prompt and request type.
 
         Based on the request type, selects the appropriate system prompt and sends
         the prompt to the language model. Parses the JSON-formatted response and
         returns it as a dictionary.
 
+        If enabled, clear COMMAND answers are classified by rules, and PERSON_DATA fields
+        the rules could fill are taken from the transcript so the language model only has
+        to generate the remaining ones. Results for repeated transcripts are served from
+        the response cache.
+
+        If `on_field` is given, every field is passed to it as soon as it is known, i.e.
+        rule-based fields right away and generated fields once the model completed them.
+        Results served from the cache pass all their fields to it before returning.
+
         Args:
             prompt (str): The input text to process (e.g., transcribed user speech).
             req_type (RequestType): Type of request (PERSON_DATA or COMMAND).
+            on_field (Optional[Callable[[str, Any], None]]): Optional callback receiving
+                the name and value of each completed field while the model generates.
+            prefill_session (Optional[PrefillSession]): Optional session that already
+                prefilled the prompt while the transcript was growing.
 
         Returns:
             dict: The structured information extracted from the model's output.
@@ -90,68 +209,452 @@ class LLMService:
         """
         log.debug(f"Generating response for prompt: {prompt}")
 
+        cache_key = None
+        if self.__response_cache is not None and req_type != RequestType.BAD_REQUEST:
+            cache_key = ResponseCache.make_key(
+                req_type.name, prompt, self.__model_name, self.__prompt_version
+            )
+            result = self.__response_cache.get(cache_key)
+            self.__log_cache_hit_ratio()
+            if result is not None:
+                log.info(f"Using cached response: {result}")
+                if on_field is not None:
+                    # Same messages as for a generated result
+                    for field, value in result.items():
+                        on_field(field, value)
+                return result
+
+        result = self.__generate_json_response(
+            prompt, req_type, on_field, prefill_session
+        )
+        if cache_key is not None:
+            self.__response_cache.put(cache_key, result)
+        return result
+
+    def create_prefill_session(self, req_type: RequestType) -> Optional[PrefillSession]:
+        """Creates a session prefilling the prompt of a request while ASR is still running.
+
+        The session starts with the part of the prompt in front of the transcript, which
+        only depends on the request type.
+
+        Args:
+            req_type (RequestType): Type of request (PERSON_DATA or COMMAND).
+
+        Returns:
+            Optional[PrefillSession]: The session, None if the backend can't reuse
+                a prefilled cache, i.e. llama_cpp or continuous batching.
+        """
+        with self._in_use():
+            if self.__model is None or self.__scheduler is not None:
+                return None
+
+            marker = "\x00"
+            prompt = self.__tokenizer.apply_chat_template(
+                self.__build_messages(marker, req_type, PERSON_DATA_FIELDS),
+                tokenize=False,
+                add_generation_prompt=True,
+            )
+            return PrefillSession(
+                self.__model, self.__tokenizer, prompt.split(marker, 1)[0]
+            )
+
+    def __generate_json_response(
+        self,
+        prompt: str,
+        req_type: RequestType,
+        on_field: Optional[Callable[[str, Any], None]],
+        prefill_session: Optional[PrefillSession],
+    ) -> dict:
+        """Generates a structured JSON response without looking at the response cache.
+
+        Args:
+            prompt (str): The input text to process (e.g., transcribed user speech).
+            req_type (RequestType): Type of request (PERSON_DATA or COMMAND).
+            on_field (Optional[Callable[[str, Any], None]]): Optional callback receiving
+                each completed field.
+            prefill_session (Optional[PrefillSession]): Optional session that already
+                prefilled the prompt.
+
+        Returns:
+            dict: The structured information extracted from the model's output.
+
+        Raises:
+            LLMProcessingError: If the request type is invalid or model inference fails.
+        """
+        extracted = None
+        fields = None
         match req_type:
             case RequestType.PERSON_DATA:
-                system_prompt = self.__PERSON_DATA_PROMPT
+                fields = PERSON_DATA_FIELDS
+                if self.__person_data_extractor is not None:
+                    extracted = self.__person_data_extractor.extract(prompt)
+                    fields = [field for field in fields if extracted[field] is None]
+                    if on_field is not None:
+                        for field, value in extracted.items():
+                            if value is not None:
+                                on_field(field, value)
+                    if not fields:
+                        log.info("Rule-based extractor filled all fields, skipping LLM")
+                        metrics.increment("person_data_llm_skipped")
+                        return extracted
             case RequestType.COMMAND:
-                system_prompt = self.__COMMAND_PROMPT
+                if self.__command_classifier is not None:
+                    result = self.__command_classifier.classify(prompt)
+                    self.__log_classifier_hit_rate()
+                    if result is not None:
+                        log.info(f"Rule-based classifier answered command: {result}")
+                        return result
             case _:
                 log.error(f"Invalid request type: {req_type}")
-                raise LLMProcessingError(f"Invalid request type: {req_type}")
+                raise LLMProcessingError(
+                    f"Invalid request type: {req_type}", permanent=True
+                )
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt},
-        ]
+        messages = self.__build_messages(prompt, req_type, fields)
+
+        on_text = None
+        if on_field is not None:
+            parser = PartialJsonParser()
+
+            def on_text(text: str) -> None:
+                for field, value in parser.feed(text).items():
+                    # Only pass on fields the LLM was asked for
+                    if fields is None or field in fields:
+                        on_field(field, value)
 
         t0 = time.time()
         try:
-            output = self.__generate_output(messages)
+            with self._in_use():
+                output = self.__generate_output(
+                    messages, req_type, on_text, fields, prefill_session
+                )
         except Exception as e:
             log.error(f"Error generating response: {e}")
             raise LLMProcessingError(f"Error during processing of prompt: {messages}")
         t1 = time.time()
+        metrics.observe(f"llm_generation_seconds_{req_type.name.lower()}", t1 - t0)
 
         log.info(f"Generated response in {t1 - t0:.2f} seconds.")
         log.debug(f"LLM raw output: {output}")
 
         output = output.replace("```json", "").replace("```", "").strip()
-        return json.loads(output)
+        try:
+            result = json.loads(output)
+        except ValueError:
+            log.error(f"LLM output is not valid JSON: {output}")
+            # Generation is deterministic, a retry would produce the same output
+            raise LLMProcessingError(
+                f"Invalid JSON output for prompt: {prompt}", permanent=True
+            )
+        if extracted is not None:
+            # Rule-based values win, the LLM only had to fill the remaining fields
+            result = {
+                field: (
+                    extracted[field]
+                    if extracted[field] is not None
+                    else result.get(field)
+                )
+                for field in PERSON_DATA_FIELDS
+            }
+        return result
+
+    def __build_messages(
+        self,
+        prompt: str,
+        req_type: RequestType,
+        fields: Optional[list[str]] = None,
+    ) -> list[dict[str, str]]:
+        """Builds the chat messages for a request.
+
+        The required PERSON_DATA fields are appended to the transcript, so everything
+        in front of the transcript is the same for all requests of a type.
+
+        Args:
+            prompt (str): The input text to process (e.g., transcribed user speech).
+            req_type (RequestType): Type of request (PERSON_DATA or COMMAND).
+            fields (Optional[list[str]]): PERSON_DATA fields the model has to fill.
+
+        Returns:
+            list[dict[str, str]]: The system and user messages.
+        """
+        if req_type == RequestType.PERSON_DATA:
+            system_prompt = self.__PERSON_DATA_PROMPT
+            prompt += self.__PERSON_DATA_FIELDS_PROMPT.format(fields=", ".join(fields))
+        else:
+            system_prompt = self.__COMMAND_PROMPT
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
 
-    def __generate_output(self, messages: list[dict[str, str]]) -> str:
+    @staticmethod
+    def __log_cache_hit_ratio() -> None:
+        """Logs the hit ratio of the response cache."""
+        hits = metrics.get("llm_cache_hits")
+        total = metrics.get("llm_cache_requests")
+        hit_ratio = metrics.ratio("llm_cache_hits", "llm_cache_requests")
+        log.info(
+            f"LLM response cache hit ratio: {hit_ratio:.0%} ({hits:.0f}/{total:.0f})"
+        )
+
+    @staticmethod
+    def __log_classifier_hit_rate() -> None:
+        """Logs how many COMMAND requests the rule-based classifier answered
+        and an estimate of the LLM time this saved."""
+        hits = metrics.get("command_classifier_hits")
+        total = metrics.get("command_classifier_requests")
+        hit_rate = metrics.ratio(
+            "command_classifier_hits", "command_classifier_requests"
+        )
+        avg_llm_time = metrics.average("llm_generation_seconds_command")
+        saved = f"{hits * avg_llm_time:.2f}s" if avg_llm_time is not None else "unknown"
+        log.info(
+            f"Rule-based command hit rate: {hit_rate:.0%} ({hits:.0f}/{total:.0f}), "
+            f"estimated LLM time saved: {saved}"
+        )
+
+    def __generate_output(
+        self,
+        messages: list[dict[str, str]],
+        req_type: RequestType,
+        on_text: Optional[Callable[[str], None]] = None,
+        fields: Optional[list[str]] = None,
+        prefill_session: Optional[PrefillSession] = None,
+    ) -> str:
         """Generates raw text output from a list of chat-style messages.
 
         Uses the tokenizer's chat template to format input and generates output
-        using the loaded model.
+        using the loaded model. With continuous batching enabled, the generation
+        joins the shared decode batch of the scheduler instead, which doesn't stream.
+
+        Generation is limited to the token budget of the request type and stops early
+        once the JSON object is closed or the output degenerates into repetitions.
+        If enabled, prompt lookup decoding drafts continuations from n-grams of the
+        prompt, so spans copied from the transcript take a single forward pass.
+
+        With the llama_cpp backend, the engine generates the output instead, with a
+        grammar that only allows a JSON object of the expected shape.
 
         Args:
             messages (list[dict[str, str]]): A list of chat messages including system
                 and user roles for prompt context.
+            req_type (RequestType): Type of request, selects the token budget.
+            on_text (Optional[Callable[[str], None]]): Optional callback receiving the
+                generated text in chunks while the model generates.
+            fields (Optional[list[str]]): PERSON_DATA fields the model has to fill.
+            prefill_session (Optional[PrefillSession]): Optional session whose cache is
+                reused for the part of the prompt it already prefilled.
 
         Returns:
             str: The raw output string generated by the model.
         """
+        max_new_tokens = config.LLM_MAX_NEW_TOKENS[req_type.name]
+        if self.__engine is not None:
+            output, generated = self.__engine.generate(
+                messages,
+                max_new_tokens,
+                self.__get_json_schema(req_type, fields),
+                on_text,
+            )
+            self.__record_tokens(
+                req_type, generated, max_new_tokens, generated < max_new_tokens
+            )
+            return output
+
         input_text = self.__tokenizer.apply_chat_template(
             messages, tokenize=False, add_generation_prompt=True
         )
+        if self.__scheduler is not None:
+            input_ids = self.__tokenizer(input_text)["input_ids"]
+            json_complete = JsonCompleteCriteria(self.__tokenizer)
+            repetition = RepetitionCriteria()
+            generated_ids = self.__scheduler.generate(
+                input_ids,
+                max_new_tokens=max_new_tokens,
+                stopping_criteria=lambda generated: (
+                    json_complete.check(generated) or repetition.check(generated)
+                ),
+            )
+            self.__record_tokens(
+                req_type,
+                len(generated_ids),
+                max_new_tokens,
+                json_complete.triggered or repetition.triggered,
+                repetition.triggered,
+            )
+            return self.__tokenizer.decode(generated_ids, skip_special_tokens=True)
+
         inputs = self.__tokenizer([input_text], return_tensors="pt").to(
             self.__model.device
         )
+        prompt_length = inputs.input_ids.shape[1]
+        past_key_values = (
+            prefill_session.take_cache(inputs.input_ids[0].tolist())
+            if prefill_session is not None
+            else None
+        )
+        json_complete = JsonCompleteCriteria(self.__tokenizer, prompt_length)
+        repetition = RepetitionCriteria(prompt_length)
+        generate_kwargs = {}
+        if config.LLM_PROMPT_LOOKUP_TOKENS:
+            generate_kwargs["prompt_lookup_num_tokens"] = config.LLM_PROMPT_LOOKUP_TOKENS
 
         generated_ids = self.__model.generate(
             **inputs,
-            max_new_tokens=512,
+            max_new_tokens=max_new_tokens,
             do_sample=False,
+            stopping_criteria=StoppingCriteriaList([json_complete, repetition]),
+            past_key_values=past_key_values,
+            streamer=(
+                CallbackStreamer(self.__tokenizer, on_text)
+                if on_text is not None
+                else None
+            ),
             temperature=None,
             top_p=None,
             top_k=None,
+            **generate_kwargs,
         )
         generated_ids = [
             output_ids[len(input_ids) :]
             for input_ids, output_ids in zip(inputs.input_ids, generated_ids)
         ]
+        self.__record_tokens(
+            req_type,
+            len(generated_ids[0]),
+            max_new_tokens,
+            json_complete.triggered or repetition.triggered,
+            repetition.triggered,
+        )
         return self.__tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
 
+    @staticmethod
+    def __record_tokens(
+        req_type: RequestType,
+        generated: int,
+        max_new_tokens: int,
+        stopped_early: bool,
+        repetition: bool = False,
+    ) -> None:
+        """Records the generated tokens of a request and the tokens saved by stopping early.
+
+        Args:
+            req_type (RequestType): Type of the request.
+            generated (int): Number of generated tokens.
+            max_new_tokens (int): Token budget of the request.
+            stopped_early (bool): Whether generation stopped before the budget was used up.
+            repetition (bool): Whether generation was aborted because it repeated itself.
+        """
+        if repetition:
+            log.warning(f"Stopped degenerate LLM output after {generated} tokens")
+            metrics.increment("llm_repetition_aborts")
+        # Prompt lookup can accept a few draft tokens past the budget
+        saved = max(max_new_tokens - generated, 0) if stopped_early else 0
+        name = req_type.name.lower()
+        metrics.increment(f"llm_tokens_generated_{name}", generated)
+        metrics.increment(f"llm_tokens_saved_{name}", saved)
+        log.info(
+            f"Generated {generated}/{max_new_tokens} tokens, "
+            f"saved {saved} tokens by stopping early"
+        )
+
+    @staticmethod
+    def __get_json_schema(
+        req_type: RequestType, fields: Optional[list[str]] = None
+    ) -> dict:
+        """Builds the JSON schema the output of a request has to follow.
+
+        Args:
+            req_type (RequestType): Type of request.
+            fields (Optional[list[str]]): PERSON_DATA fields the model has to fill,
+                defaults to all of them.
+
+        Returns:
+            dict: The JSON schema.
+        """
+        if req_type == RequestType.PERSON_DATA:
+            fields = list(fields or PERSON_DATA_FIELDS)
+            return {
+                "type": "object",
+                "properties": {field: {"type": ["string", "null"]} for field in fields},
+                "required": fields,
+            }
+        return {
+            "oneOf": [
+                {
+                    "type": "object",
+                    "properties": {"result": {"enum": ["YES", "NO"]}},
+                    "required": ["result"],
+                },
+                {
+                    "type": "object",
+                    "properties": {"error": {"type": "string"}},
+                    "required": ["error"],
+                },
+            ]
+        }
+
+    def __get_prompt_version(self) -> str:
+        """Hashes everything besides the model that changes the results for a transcript.
+
+        Returns:
+            str: A short hash of the prompts and the rule-based settings.
+        """
+        version = "|".join(
+            [
+                self.__PERSON_DATA_PROMPT,
+                self.__PERSON_DATA_FIELDS_PROMPT,
+                self.__COMMAND_PROMPT,
+                str(config.LLM_RULE_BASED_COMMANDS),
+                str(config.LLM_RULE_BASED_PERSON_DATA),
+            ]
+        )
+        return hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+    def __create_scheduler(self) -> Optional[ContinuousBatchingScheduler]:
+        """Creates the continuous batching scheduler if it is enabled in the configuration.
+
+        Returns:
+            Optional[ContinuousBatchingScheduler]: The scheduler, or None if disabled.
+        """
+        if not config.LLM_CONTINUOUS_BATCHING or self.__model is None:
+            return None
+
+        eos_token_ids = self.__model.generation_config.eos_token_id
+        if isinstance(eos_token_ids, int):
+            eos_token_ids = [eos_token_ids]
+        log.info(f"Using continuous batching with eos token ids: {eos_token_ids}")
+        return ContinuousBatchingScheduler(
+            self.__model, eos_token_ids, config.LLM_MAX_BATCH_SIZE
+        )
+
+    def _load_models(self) -> None:
+        """Loads the model of the configured backend and creates the scheduler.
+
+        Raises:
+            ValueError: If the configured backend is unknown.
+        """
+        match config.LLM_BACKEND:
+            case "transformers":
+                self.__model, self.__tokenizer = self.__load_model()
+            case "llama_cpp":
+                self.__engine = LlamaCppEngine(
+                    config.LLM_GGUF_MODEL_PATH,
+                    config.LLM_GGUF_THREADS,
+                    config.LLM_GGUF_CONTEXT_SIZE,
+                    config.LLM_GGUF_PROMPT_CACHE_BYTES,
+                )
+            case _:
+                raise ValueError(f"Unknown LLM backend: {config.LLM_BACKEND}")
+        self.__scheduler = self.__create_scheduler()
+
+    def _unload_models(self) -> None:
+        """Stops the scheduler and drops the model."""
+        if self.__scheduler is not None:
+            self.__scheduler.stop()
+        self.__model, self.__tokenizer, self.__engine = None, None, None
+        self.__scheduler = None
+
     def __load_model(self) -> tuple[PreTrainedModel, PreTrainedTokenizerFast]:
         """Loads the language model and tokenizer.
 
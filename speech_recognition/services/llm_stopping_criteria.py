@@ -0,0 +1,132 @@
+import torch
+from transformers import PreTrainedTokenizerFast, StoppingCriteria
+
+from speech_recognition.utils.partial_json_parser import PartialJsonParser
+
+
+class JsonCompleteCriteria(StoppingCriteria):
+    """Stops generating as soon as the top-level JSON object is closed.
+
+    Everything the model would add after the closing brace, like a Markdown fence
+    or a comment, is discarded by the parsing anyway.
+
+    Attributes:
+        __tokenizer (PreTrainedTokenizerFast): Tokenizer used to decode the new tokens.
+        __prompt_length (int): Number of prompt tokens in front of the generated ones.
+        __parser (PartialJsonParser): Parser tracking the structure of the generated text.
+        __seen (int): Number of generated tokens already fed to the parser.
+        triggered (bool): Whether this criteria stopped the generation.
+    """
+
+    def __init__(self, tokenizer: PreTrainedTokenizerFast, prompt_length: int = 0):
+        """Initializes the JsonCompleteCriteria.
+
+        Args:
+            tokenizer (PreTrainedTokenizerFast): Tokenizer used to decode the new tokens.
+            prompt_length (int, optional): Number of prompt tokens in the `input_ids`
+                passed by `generate`. Defaults to 0.
+        """
+        self.__tokenizer = tokenizer
+        self.__prompt_length = prompt_length
+        self.__parser = PartialJsonParser()
+        self.__seen = 0
+        self.triggered = False
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs
+    ) -> torch.BoolTensor:
+        """Checks the sequence during `generate`, only batches of one are supported.
+
+        Args:
+            input_ids (torch.LongTensor): Prompt and generated tokens so far.
+            scores (torch.FloatTensor): Scores of the last step, unused.
+
+        Returns:
+            torch.BoolTensor: Whether to stop, for every sequence of the batch.
+        """
+        done = self.check(input_ids[0, self.__prompt_length :].tolist())
+        return torch.full(
+            (input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device
+        )
+
+    def check(self, generated: list[int]) -> bool:
+        """Feeds the new tokens to the parser and checks whether the object is closed.
+
+        Args:
+            generated (list[int]): All generated tokens so far.
+
+        Returns:
+            bool: True if generation should stop.
+        """
+        new_tokens = generated[self.__seen :]
+        self.__seen = len(generated)
+        self.__parser.feed(self.__tokenizer.decode(new_tokens))
+        self.triggered = self.__parser.is_finished()
+        return self.triggered
+
+
+class RepetitionCriteria(StoppingCriteria):
+    """Stops degenerate generations that repeat the same tokens over and over.
+
+    A generation is degenerate if it ends with a pattern of up to `__MAX_PERIOD` tokens
+    that is repeated at least `__MIN_REPEATS` times and spans at least `__MIN_SPAN` tokens.
+    The minimum span keeps legitimate repetitions, like "0000" in a phone number, alive.
+
+    Attributes:
+        __MAX_PERIOD (int): Maximum length of the repeated pattern in tokens.
+        __MIN_REPEATS (int): Minimum number of repetitions of the pattern.
+        __MIN_SPAN (int): Minimum number of tokens covered by the repetitions.
+        __prompt_length (int): Number of prompt tokens in front of the generated ones.
+        triggered (bool): Whether this criteria stopped the generation.
+    """
+
+    __MAX_PERIOD = 16
+    __MIN_REPEATS = 3
+    __MIN_SPAN = 24
+
+    def __init__(self, prompt_length: int = 0):
+        """Initializes the RepetitionCriteria.
+
+        Args:
+            prompt_length (int, optional): Number of prompt tokens in the `input_ids`
+                passed by `generate`. Defaults to 0.
+        """
+        self.__prompt_length = prompt_length
+        self.triggered = False
+
+    def __call__(
+        self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs
+    ) -> torch.BoolTensor:
+        """Checks the sequence during `generate`, only batches of one are supported.
+
+        Args:
+            input_ids (torch.LongTensor): Prompt and generated tokens so far.
+            scores (torch.FloatTensor): Scores of the last step, unused.
+
+        Returns:
+            torch.BoolTensor: Whether to stop, for every sequence of the batch.
+        """
+        done = self.check(input_ids[0, self.__prompt_length :].tolist())
+        return torch.full(
+            (input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device
+        )
+
+    def check(self, generated: list[int]) -> bool:
+        """Checks whether the generated tokens end in a degenerate loop.
+
+        Args:
+            generated (list[int]): All generated tokens so far.
+
+        Returns:
+            bool: True if generation should stop.
+        """
+        for period in range(1, self.__MAX_PERIOD + 1):
+            repeats = max(self.__MIN_REPEATS, -(-self.__MIN_SPAN // period))
+            span = period * repeats
+            if len(generated) < span:
+                continue
+            tail = generated[-span:]
+            if tail == tail[:period] * repeats:
+                self.triggered = True
+                return True
+        return False
@@ -0,0 +1,177 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+from typing import Optional
+
+from speech_recognition.services.evictable_service import EvictableService
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.workers.abstract_worker import AbstractWorker
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class MemoryManager(AbstractWorker):
+    """Keeps the memory usage of the process in check.
+
+    Periodically unloads models that were idle for too long, returns freed heap memory
+    to the OS after jobs that grew the process, and pauses the intake of new requests
+    while the resident set size is above a high watermark.
+
+    Resident set size and allocator trimming are read from /proc and glibc, on other
+    platforms the watermark and trimming are disabled.
+
+    Attributes:
+        __services (list[EvictableService]): Services whose models can be unloaded.
+        __idle_seconds (Optional[float]): Idle time after which models are unloaded,
+            None to keep them loaded.
+        __high_watermark (Optional[int]): Resident set size in bytes above which the
+            intake is paused, None to disable.
+        __trim_threshold (int): Growth in bytes since the last trim that triggers a trim.
+        __check_interval (float): Seconds between two checks.
+        __trim_baseline (Optional[int]): Resident set size in bytes after the last trim.
+        __libc (Optional[ctypes.CDLL]): The C library providing `malloc_trim`.
+    """
+
+    def __init__(
+        self,
+        services: list[EvictableService],
+        idle_seconds: Optional[float],
+        high_watermark_mb: Optional[int],
+        trim_threshold_mb: int,
+        check_interval: float,
+    ) -> None:
+        """Initializes the MemoryManager.
+
+        Args:
+            services (list[EvictableService]): Services whose models can be unloaded.
+            idle_seconds (Optional[float]): Idle time after which models are unloaded,
+                None to keep them loaded.
+            high_watermark_mb (Optional[int]): Resident set size in MB above which the
+                intake is paused, None to disable.
+            trim_threshold_mb (int): Growth in MB since the last trim after a job,
+                that triggers a trim.
+            check_interval (float): Seconds between two checks.
+        """
+        self.__services = services
+        self.__idle_seconds = idle_seconds
+        self.__high_watermark = (
+            high_watermark_mb * 1024 * 1024 if high_watermark_mb is not None else None
+        )
+        self.__trim_threshold = trim_threshold_mb * 1024 * 1024
+        self.__check_interval = check_interval
+        self.__trim_baseline = self.rss_bytes()
+        self.__libc = self.__load_libc()
+
+    async def do_work(self) -> None:
+        """Periodically unloads idle models until cancelled."""
+        if self.__idle_seconds is None:
+            log.info("Idle model unloading is disabled")
+            return
+        while True:
+            await asyncio.sleep(self.__check_interval)
+            await self.__unload_idle(self.__idle_seconds)
+
+    async def wait_for_memory(self) -> None:
+        """Waits until the resident set size is below the high watermark.
+
+        While it is above, all models not in use are unloaded and the heap is trimmed
+        on every check, so models that were busy before are unloaded once they're done.
+        The intake stays paused until enough memory is free, or the resident set size
+        can't be read anymore.
+        """
+        rss = self.rss_bytes()
+        if self.__high_watermark is None or rss is None or rss <= self.__high_watermark:
+            return
+
+        log.warning(
+            f"Memory usage {rss / 2**20:.0f} MB is above the high watermark "
+            f"of {self.__high_watermark / 2**20:.0f} MB, pausing intake"
+        )
+        metrics.increment("memory_intake_pauses")
+        while True:
+            await self.__unload_idle(0)
+            await asyncio.to_thread(self.trim)
+            rss = self.rss_bytes()
+            if rss is None:
+                log.warning("Memory usage can't be read anymore, resuming intake")
+                return
+            if rss <= self.__high_watermark:
+                break
+            await asyncio.sleep(self.__check_interval)
+        log.info(f"Memory usage back to {rss / 2**20:.0f} MB, resuming intake")
+
+    async def job_finished(self) -> None:
+        """Trims the heap if the process grew by more than the threshold since the last trim.
+
+        Long audio jobs leave large freed buffers in the allocator arenas, which glibc
+        doesn't return to the OS on its own.
+        """
+        rss = self.rss_bytes()
+        if rss is None or self.__trim_baseline is None:
+            return
+        if rss - self.__trim_baseline > self.__trim_threshold:
+            await asyncio.to_thread(self.trim)
+        else:
+            # Follow the process shrinking, e.g. after models were unloaded
+            self.__trim_baseline = min(self.__trim_baseline, rss)
+
+    def trim(self) -> None:
+        """Returns free memory of the allocator arenas to the OS using `malloc_trim`."""
+        if self.__libc is None:
+            return
+        before = self.rss_bytes()
+        self.__libc.malloc_trim(0)
+        self.__trim_baseline = self.rss_bytes()
+        metrics.increment("memory_trims")
+        if before is not None and self.__trim_baseline is not None:
+            log.info(
+                f"Trimmed heap from {before / 2**20:.0f} MB "
+                f"to {self.__trim_baseline / 2**20:.0f} MB"
+            )
+
+    @staticmethod
+    def rss_bytes() -> Optional[int]:
+        """Reads the resident set size of the process from /proc.
+
+        Returns:
+            Optional[int]: The resident set size in bytes, None if it isn't available.
+        """
+        try:
+            with open("/proc/self/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return None
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+    async def __unload_idle(self, idle_seconds: float) -> None:
+        """Unloads the models of all services that were idle for the given time.
+
+        Args:
+            idle_seconds (float): Minimum time in seconds since the last use.
+        """
+        unloaded = False
+        for service in self.__services:
+            unloaded |= await asyncio.to_thread(service.unload_if_idle, idle_seconds)
+        if unloaded:
+            await asyncio.to_thread(self.trim)
+
+    @staticmethod
+    def __load_libc() -> Optional[ctypes.CDLL]:
+        """Loads the C library if it provides `malloc_trim`, i.e. glibc.
+
+        Returns:
+            Optional[ctypes.CDLL]: The C library, None if `malloc_trim` isn't available.
+        """
+        name = ctypes.util.find_library("c")
+        if name is None:
+            return None
+        try:
+            libc = ctypes.CDLL(name)
+            libc.malloc_trim.argtypes = [ctypes.c_size_t]
+        except (OSError, AttributeError):
+            log.info("malloc_trim isn't available, heap trimming is disabled")
+            return None
+        return libc
@@ -0,0 +1,67 @@
+import asyncio
+
+from speech_recognition.services.piper_process import PiperProcess
+from speech_recognition.utils.logger_helper import LoggerHelper
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class PiperPool:
+    """Pool of Piper processes synthesizing several texts in parallel.
+
+    Each request borrows an idle process and returns it afterwards. The most recently
+    used process is handed out first, so further processes are only started once
+    enough requests run concurrently, and processes that aren't needed never load the
+    voice model.
+
+    Attributes:
+        __processes (list[PiperProcess]): All processes of the pool.
+        __idle (asyncio.LifoQueue[PiperProcess]): Processes not synthesizing right now.
+    """
+
+    def __init__(self, piper_dir: str, voice: str, timeout: float, size: int) -> None:
+        """Initializes the PiperPool without starting any process.
+
+        Args:
+            piper_dir (str): Path to the Piper directory.
+            voice (str): Voice model passed to Piper.
+            timeout (float): Seconds to wait for Piper to synthesize a text.
+            size (int): Maximum number of Piper processes.
+        """
+        self.__processes = [
+            PiperProcess(piper_dir, voice, timeout) for _ in range(max(size, 1))
+        ]
+        self.__idle = asyncio.LifoQueue()
+        for process in reversed(self.__processes):
+            self.__idle.put_nowait(process)
+
+    def size(self) -> int:
+        """Returns the maximum number of Piper processes.
+
+        Returns:
+            int: The pool size.
+        """
+        return len(self.__processes)
+
+    async def synthesize(self, text: str, output_file: str) -> str:
+        """Synthesizes a text to a WAV file with the next idle process.
+
+        Args:
+            text (str): The text to synthesize.
+            output_file (str): Absolute path of the WAV file to write.
+
+        Returns:
+            str: Path of the written WAV file.
+
+        Raises:
+            AudioGenerationError: If Piper failed twice to write the file.
+        """
+        process = await self.__idle.get()
+        try:
+            return await process.synthesize(text, output_file)
+        finally:
+            self.__idle.put_nowait(process)
+
+    async def stop(self) -> None:
+        """Stops all Piper processes."""
+        await asyncio.gather(*(process.stop() for process in self.__processes))
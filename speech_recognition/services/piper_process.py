@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+from asyncio.subprocess import Process
+from pathlib import Path
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class PiperProcess:
+    """Long-lived Piper process synthesizing one text at a time.
+
+    Piper is started once with `--json-input` and keeps the voice model loaded. Each
+    request is written to its stdin as a JSON line with the text and the output file,
+    Piper answers with the path of the written file on stdout. If the process crashed
+    or hangs, it is restarted and the request is retried once.
+
+    Attributes:
+        __piper_dir (str): Absolute path to the Piper directory.
+        __voice (str): Voice model passed to Piper.
+        __timeout (float): Seconds to wait for Piper to synthesize a text.
+        __process (Optional[Process]): The running Piper process, None if not started.
+        __stderr_task (Optional[asyncio.Task]): Task forwarding Piper's stderr to the log.
+        __lock (asyncio.Lock): Lock making sure only one request is sent at a time.
+    """
+
+    def __init__(self, piper_dir: str, voice: str, timeout: float) -> None:
+        """Initializes the PiperProcess without starting it.
+
+        Args:
+            piper_dir (str): Path to the Piper directory.
+            voice (str): Voice model passed to Piper.
+            timeout (float): Seconds to wait for Piper to synthesize a text.
+        """
+        self.__piper_dir = str(Path(piper_dir).resolve())
+        self.__voice = voice
+        self.__timeout = timeout
+        self.__process = None
+        self.__stderr_task = None
+        self.__lock = asyncio.Lock()
+
+    async def synthesize(self, text: str, output_file: str) -> str:
+        """Synthesizes a text to a WAV file.
+
+        Args:
+            text (str): The text to synthesize.
+            output_file (str): Absolute path of the WAV file to write.
+
+        Returns:
+            str: Path of the written WAV file.
+
+        Raises:
+            AudioGenerationError: If Piper failed twice to write the file.
+        """
+        async with self.__lock:
+            for attempt in range(2):
+                try:
+                    return await self.__synthesize(text, output_file)
+                except asyncio.CancelledError:
+                    # Piper's answer would be read by the next request
+                    await self.__kill()
+                    raise
+                except (OSError, asyncio.TimeoutError, AudioGenerationError) as e:
+                    log.warning(f"Piper failed on attempt {attempt + 1}: {e!r}")
+                    metrics.increment("piper_restarts")
+                    await self.__kill()
+        raise AudioGenerationError("Could not generate audio from text.")
+
+    async def stop(self) -> None:
+        """Stops the Piper process by closing its stdin."""
+        async with self.__lock:
+            if self.__process is None:
+                return
+            log.info("Stopping Piper process")
+            self.__process.stdin.close()
+            try:
+                await asyncio.wait_for(self.__process.wait(), self.__timeout)
+            except asyncio.TimeoutError:
+                await self.__kill()
+            self.__process = None
+
+    async def __synthesize(self, text: str, output_file: str) -> str:
+        """Sends a single request to Piper, starting it if it isn't running.
+
+        Args:
+            text (str): The text to synthesize.
+            output_file (str): Absolute path of the WAV file to write.
+
+        Returns:
+            str: Path of the written WAV file.
+
+        Raises:
+            AudioGenerationError: If Piper exited or didn't write the file.
+        """
+        if self.__process is None or self.__process.returncode is not None:
+            await self.__start()
+
+        request = json.dumps({"text": text, "output_file": output_file})
+        self.__process.stdin.write(request.encode("utf-8") + b"\n")
+        await self.__process.stdin.drain()
+
+        line = await asyncio.wait_for(self.__process.stdout.readline(), self.__timeout)
+        if not line:
+            raise AudioGenerationError(
+                f"Piper exited with code {await self.__process.wait()}"
+            )
+        path = line.decode("utf-8").strip()
+        log.debug(f"Piper wrote: {path}")
+        if not os.path.exists(output_file):
+            raise AudioGenerationError(f"Piper didn't write {output_file}: {path}")
+        return output_file
+
+    async def __start(self) -> None:
+        """Starts the Piper process and forwards its stderr to the log."""
+        log.info(f"Starting Piper with voice {self.__voice}")
+        self.__process = await asyncio.create_subprocess_exec(
+            str(Path(self.__piper_dir) / "piper"),
+            "-m",
+            self.__voice,
+            "--json-input",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.__piper_dir,
+        )
+        self.__stderr_task = asyncio.create_task(self.__log_stderr(self.__process))
+
+    async def __kill(self) -> None:
+        """Kills the Piper process, it is restarted with the next request."""
+        if self.__process is not None and self.__process.returncode is None:
+            self.__process.kill()
+            await self.__process.wait()
+        self.__process = None
+
+    @staticmethod
+    async def __log_stderr(process: Process) -> None:
+        """Logs the stderr of Piper until it exits, so the pipe never fills up.
+
+        Args:
+            process (Process): The Piper process.
+        """
+        async for line in process.stderr:
+            log.debug(f"[piper] {line.decode('utf-8', errors='replace').rstrip()}")
@@ -0,0 +1,177 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.logger_helper import LoggerHelper
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class RequestDispatcher:
+    """Puts requests received over a WebSocket connection on the work queues.
+
+    GENERATE_AUDIO_REQUEST messages are put on the text queue as dict with the text,
+    the optional voice id and a request id, which is echoed in all responses. Audio
+    to extract data from is uploaded as binary audio frame with the header
+    `{"type": "EXTRACT_DATA_FROM_AUDIO_REQUEST", "request_id": ..., "req_type": ...}`.
+    The audio stays in memory and is put on the speech queue like a file in the input
+    directory. Requests without a request id get a new one.
+
+    Requests received by the embedded server are tagged with their connection, and
+    their request id is prefixed with it to keep it unique. Workers copy the tag into
+    their results, see `routing`, so the server can send them back.
+
+    Attributes:
+        __text_queue (asyncio.Queue): Queue of text requests to generate audio for.
+        __speech_queue (Optional[asyncio.Queue]): Queue of audio extraction requests,
+            None to reject uploaded audio.
+        __on_request (Optional[Callable[[str, str], None]]): Called with the stage
+            ("stt" or "tts") and the request id of every request, before it is queued
+            or rejected.
+    """
+
+    def __init__(
+        self,
+        text_queue: asyncio.Queue,
+        speech_queue: Optional[asyncio.Queue] = None,
+        on_request: Optional[Callable[[str, str], None]] = None,
+    ) -> None:
+        """Initializes the RequestDispatcher.
+
+        Args:
+            text_queue (asyncio.Queue): Queue of text requests to generate audio for.
+            speech_queue (Optional[asyncio.Queue]): Queue of audio extraction requests,
+                None to reject uploaded audio.
+            on_request (Optional[Callable[[str, str], None]]): Called with the stage
+                and the request id of every request, e.g. to take a work credit.
+        """
+        self.__text_queue = text_queue
+        self.__speech_queue = speech_queue
+        self.__on_request = on_request
+
+    async def dispatch(
+        self,
+        message: dict | bytes,
+        reply: Callable[[dict], Awaitable[None]],
+        connection: Optional[str] = None,
+    ) -> None:
+        """Puts a request on its queue, or replies with an error if it is invalid.
+
+        Args:
+            message (dict | bytes): A decoded message, or a binary audio frame.
+            reply (Callable[[dict], Awaitable[None]]): Sends an error message back.
+            connection (Optional[str]): Id of the connection the request was received
+                on, None if it isn't routed back by the embedded server.
+        """
+        if isinstance(message, bytes):
+            await self.__dispatch_audio_frame(message, reply, connection)
+            return
+        log.info(f"Message received: {message}")
+        if message["type"] == "GENERATE_AUDIO_REQUEST":
+            text = message["message"]["text"]
+            request_id = str(message["message"].get("request_id") or uuid.uuid4().hex)
+            log.info(f"Text to generate audio from: {text}")
+            if self.__on_request is not None:
+                self.__on_request("tts", request_id)
+            # Check that text isn't empty and doesn't only contain whitespace
+            if text.strip() and text:
+                await self.__text_queue.put(
+                    self.__request(
+                        connection,
+                        request_id,
+                        text=text,
+                        voice=message["message"].get("voice"),
+                    )
+                )
+            else:
+                await reply(
+                    {
+                        "type": "GENERATE_AUDIO_ERROR",
+                        "message": {
+                            "text": "Text to generate audio for was empty",
+                            "request_id": request_id,
+                        },
+                    }
+                )
+
+    async def __dispatch_audio_frame(
+        self,
+        frame: bytes,
+        reply: Callable[[dict], Awaitable[None]],
+        connection: Optional[str],
+    ) -> None:
+        """Puts uploaded audio on the speech queue.
+
+        The payload is passed on as view into the frame, so the audio isn't copied.
+
+        Args:
+            frame (bytes): A binary audio frame.
+            reply (Callable[[dict], Awaitable[None]]): Sends an error message back.
+            connection (Optional[str]): Id of the connection the frame was received on.
+        """
+        header, payload = AudioFrame.decode(frame, copy=False)
+        if header.get("type") != "EXTRACT_DATA_FROM_AUDIO_REQUEST":
+            log.warning(f"Ignoring binary audio frame of type {header.get('type')}")
+            return
+        request_id = str(header.get("request_id") or uuid.uuid4().hex)
+        req_type = RequestType.__members__.get(str(header.get("req_type")).upper())
+        log.info(
+            f"Received {len(payload)} bytes of audio for request {request_id} "
+            f"of type {req_type}"
+        )
+        if self.__on_request is not None:
+            self.__on_request("stt", request_id)
+
+        if self.__speech_queue is None:
+            error = "Uploading audio is not supported"
+        elif req_type in (None, RequestType.BAD_REQUEST):
+            error = f"Bad request type: {header.get('req_type')}"
+        elif not payload:
+            error = "Uploaded audio was empty"
+        else:
+            await self.__speech_queue.put(
+                self.__request(connection, request_id, audio=payload, req_type=req_type)
+            )
+            return
+        await reply(
+            {
+                "type": "EXTRACT_DATA_FROM_AUDIO_ERROR",
+                "message": {"text": error, "request_id": request_id},
+            }
+        )
+
+    @staticmethod
+    def routing(request: dict) -> dict:
+        """Returns the fields a result has to carry to be routed back to its connection.
+
+        Args:
+            request (dict): A queue item.
+
+        Returns:
+            dict: The connection of the request, empty if it wasn't received on one.
+        """
+        if request.get("connection") is None:
+            return {}
+        return {"connection": request["connection"]}
+
+    @staticmethod
+    def __request(connection: Optional[str], request_id: str, **fields) -> dict:
+        """Builds a queue item, tagged with its connection if it has one.
+
+        Args:
+            connection (Optional[str]): Id of the connection the request was received on.
+            request_id (str): Id of the request chosen by the sender.
+            **fields: Fields of the request, e.g. the text.
+
+        Returns:
+            dict: The queue item.
+        """
+        if connection is None:
+            return {**fields, "request_id": request_id}
+        return {
+            **fields,
+            "request_id": f"{connection}:{request_id}",
+            "connection": connection,
+        }
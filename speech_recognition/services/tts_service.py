@@ -1,90 +1,333 @@
 import asyncio
 import os
+import time
+import uuid
+import wave
+from collections import deque
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from speech_recognition import config
 from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.voice_pool import VoicePool
+from speech_recognition.utils.audio_helper import AudioHelper
 from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.tts_cache import TTSCache
 
 log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
 
 
 class TTSService:
     """Text-to-Speech (TTS) service for generating audio files from text input.
 
-    This service uses a subprocess call to an external Piper TTS engine.
-    It constructs the appropriate command using configuration values and executes it
-    asynchronously to generate `.wav` audio files from the input text.
+    This service drives a pool of long-lived Piper TTS processes, which keep the voice
+    model loaded between requests, to generate `.wav` audio files from the input text.
+    Up to `TTS_WORKERS` texts are synthesized in parallel, every request is written
+    to its own file in the configured output directory. Files older than
+    `GENERATE_AUDIO_MAX_AGE_SECONDS` are deleted from it as new requests arrive.
+
+    Requests can select one of the configured voices by id, `VOICE_NAME` is used
+    otherwise. Only the most recently used voices keep their processes running.
+
+    If the cache is enabled, generated files are stored by text and voice, so repeated
+    prompts are served from disk. Identical requests arriving while the text is being
+    synthesized wait for that synthesis instead of starting their own.
 
     Attributes:
-        __piper_dir (str): Absolute path to the Piper directory.
-        __prepared_command (str): Pre-built shell command for Piper with configured voice and output path.
+        OUTPUT_PREFIX (str): Prefix of the generated audio files in the output directory.
+        SWEEP_INTERVAL_SECONDS (int): Minimum seconds between cleanups of old files.
+        __output_dir (Path): Absolute path of the directory the audio files are written to.
+        __voices (VoicePool): The Piper processes synthesizing the texts, by voice.
+        __voice_ids (dict[str, str]): Cache hashes of the voice models, by voice model.
+        __cache (Optional[TTSCache]): Cache of generated audio files, None if disabled.
+        __in_flight (dict[str, asyncio.Future]): Running syntheses by cache key.
+        __last_sweep (float): Time the output directory was last cleaned up.
     """
 
+    OUTPUT_PREFIX = "audio-"
+    SWEEP_INTERVAL_SECONDS = 60
+
     def __init__(self) -> None:
         """Initializes the TTSService with the given Piper configuration."""
+        self.__output_dir = Path(config.GENERATE_AUDIO_DIR).resolve()
+        self.__voices = VoicePool(
+            config.PIPER_DIR,
+            config.TTS_TIMEOUT_SECONDS,
+            config.TTS_WORKERS,
+            config.TTS_MAX_LOADED_VOICES,
+        )
+        self.__voice_ids = {}
+        self.__cache = None
+        if config.TTS_CACHE_DIR is not None:
+            self.__cache = TTSCache(
+                config.TTS_CACHE_DIR, config.TTS_CACHE_MAX_MB * 1024 * 1024
+            )
+        self.__in_flight = {}
+        self.__last_sweep = 0.0
 
-        self.__piper_dir = str(Path(config.PIPER_DIR).resolve())
-
-        # configure the command with values from a config file
-        piper_command = rf"| .{os.sep}piper "
-        voice = "-m " + config.VOICE_NAME
-        output_path = " -f " + str(Path(config.GENERATE_AUDIO_DIR).resolve())
-
-        self.__prepared_command = piper_command + voice + output_path
-
-    async def generate_audio(self, text) -> str:
+    async def generate_audio(self, text: str, voice: Optional[str] = None) -> str:
         """Converts the given text into an audio file using the Piper TTS engine.
 
         Args:
             text (str): The input text to be converted to speech.
+            voice (Optional[str]): Id of the voice in `TTS_VOICES`, None for the default.
 
         Returns:
             str: Path to the generated audio file.
 
         Raises:
-            AudioGenerationError: If the audio file could not be generated.
+            AudioGenerationError: If the voice is unknown or the audio file could not be generated.
         """
-
         log.info(f"TTS starting with input: {text}")
-        input_text = f'echo "{text}" '
-        filename = "audio.wav"
-        command = f"{input_text} {self.__prepared_command}{os.sep}{filename}"
-        log.debug(f"Executing command: {command}")
-
-        res = await self.__run_command_in_subprocess(command)
-        if filename in res:
-            return res
-        else:
-            log.error(f"Audio generation failed, received unexpected response: {res}")
-            raise AudioGenerationError("Could not generate audio from text.")
+        model = self.__resolve_voice(voice)
+        await self.__sweep_outputs()
+        output_file = self.__new_output_file()
+        if self.__cache is None:
+            return await self.__voices.synthesize(model, text, output_file)
 
-    async def __run_command_in_subprocess(self, command: str) -> Optional[str]:
-        """Executes a shell command asynchronously in the Piper directory.
+        key = self.__cache_key(text, model)
+        if not self.__cache.contains(key):
+            in_flight = self.__in_flight.get(key)
+            if in_flight is None:
+                return await self.__synthesize_and_cache(key, model, text, output_file)
+            log.debug("Waiting for the same text being synthesized")
+            metrics.increment("tts_coalesced_requests")
+            try:
+                await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # Only give up if this request was cancelled, not the one waited for
+                if not in_flight.cancelled():
+                    raise
+
+        if await asyncio.to_thread(self.__cache.get, key, output_file):
+            log.info("TTS served from cache")
+            return output_file
+        # Evicted in the meantime or not storable, synthesize it on its own
+        return await self.__voices.synthesize(model, text, output_file)
+
+    async def generate_audio_parts(
+        self, sentences: list[str], fan_out: bool, voice: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Synthesizes sentences in a pipeline and yields their audio files in order.
+
+        The next sentence is synthesized while the current one is handed to the caller.
+        With fan out, all sentences are synthesized at once across the Piper processes.
 
         Args:
-            command (str): The shell command to be executed.
+            sentences (list[str]): The sentences to synthesize.
+            fan_out (bool): Whether to synthesize all sentences in parallel.
+            voice (Optional[str]): Id of the voice in `TTS_VOICES`, None for the default.
+
+        Yields:
+            str: Path to the audio file of each sentence, in order.
+
+        Raises:
+            AudioGenerationError: If the voice is unknown or the audio of a sentence
+                could not be generated.
+        """
+        self.__resolve_voice(voice)
+        ahead = len(sentences) if fan_out else 1
+        remaining = iter(sentences)
+        pending = deque()
+
+        def schedule() -> None:
+            while len(pending) < ahead and (sentence := next(remaining, None)):
+                task = asyncio.create_task(self.generate_audio(sentence, voice))
+                pending.append(task)
+
+        try:
+            schedule()
+            while pending:
+                file = await pending.popleft()
+                schedule()
+                yield file
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def merge_audio(self, files: list[str]) -> str:
+        """Concatenates audio files generated by this service into a new file.
+
+        The given files are kept, clients may still be reading them.
+
+        Args:
+            files (list[str]): Paths of the audio files in order.
 
         Returns:
-            Optional[str]: The stdout output containing the generated filename, or None if generation failed.
+            str: Path to the merged audio file.
+
+        Raises:
+            AudioGenerationError: If the files could not be merged.
         """
-        proc = await asyncio.create_subprocess_shell(
-            command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            shell=True,
-            cwd=self.__piper_dir,
+        output_file = self.__new_output_file()
+        try:
+            await asyncio.to_thread(AudioHelper.concat_wav, files, output_file)
+        except (OSError, EOFError, ValueError, wave.Error) as e:
+            log.error(f"Could not merge audio files: {e}")
+            raise AudioGenerationError("Could not merge the generated audio.")
+        return output_file
+
+    async def delete_audio(self, files: list[str]) -> None:
+        """Deletes audio files generated by this service that are no longer needed.
+
+        Args:
+            files (list[str]): Paths of the audio files.
+        """
+
+        def delete() -> None:
+            for file in files:
+                try:
+                    os.remove(file)
+                except OSError as e:
+                    log.warning(f"Could not delete audio file {file}: {e}")
+
+        await asyncio.to_thread(delete)
+
+    async def prewarm(self, text: str) -> bool:
+        """Synthesizes a text with the default voice into the cache, without an output file.
+
+        Args:
+            text (str): The text to synthesize.
+
+        Returns:
+            bool: True if the text was synthesized, False if it was already cached,
+                is being synthesized or the cache is disabled.
+
+        Raises:
+            AudioGenerationError: If the audio file could not be generated.
+        """
+        if self.__cache is None:
+            return False
+        key = self.__cache_key(text, config.VOICE_NAME)
+        if self.__cache.contains(key) or key in self.__in_flight:
+            return False
+
+        output_file = str(self.__output_dir / f"prewarm-{uuid.uuid4().hex}.wav")
+        try:
+            await self.__synthesize_and_cache(key, config.VOICE_NAME, text, output_file)
+        finally:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+        return True
+
+    async def stop(self) -> None:
+        """Stops the Piper processes."""
+        await self.__voices.stop()
+
+    def __new_output_file(self) -> str:
+        """Builds a unique path for a generated audio file in the output directory.
+
+        Returns:
+            str: Absolute path of the WAV file.
+        """
+        return str(self.__output_dir / f"{self.OUTPUT_PREFIX}{uuid.uuid4().hex}.wav")
+
+    async def __sweep_outputs(self) -> None:
+        """Deletes generated audio files older than `GENERATE_AUDIO_MAX_AGE_SECONDS`.
+
+        Runs at most once every `SWEEP_INTERVAL_SECONDS`.
+        """
+        max_age = config.GENERATE_AUDIO_MAX_AGE_SECONDS
+        now = time.time()
+        if max_age is None or now - self.__last_sweep < self.SWEEP_INTERVAL_SECONDS:
+            return
+        self.__last_sweep = now
+        removed = await asyncio.to_thread(
+            self.__remove_outputs_older_than, now - max_age
         )
+        if removed:
+            log.debug(f"Deleted {removed} old generated audio files")
+
+    def __remove_outputs_older_than(self, cutoff: float) -> int:
+        """Deletes the generated audio files last modified before a point in time.
+
+        Args:
+            cutoff (float): Timestamp, older files are deleted.
+
+        Returns:
+            int: Number of deleted files.
+        """
+        removed = 0
+        for file in self.__output_dir.glob(f"{self.OUTPUT_PREFIX}*.wav"):
+            try:
+                if file.stat().st_mtime < cutoff:
+                    file.unlink()
+                    removed += 1
+            except OSError as e:
+                log.warning(f"Could not delete old audio file {file}: {e}")
+        return removed
+
+    @staticmethod
+    def __resolve_voice(voice: Optional[str]) -> str:
+        """Looks up the voice model of a voice id.
+
+        Args:
+            voice (Optional[str]): Id of the voice in `TTS_VOICES`, None for the default.
 
-        # Wait for the process to complete.
-        stdout, stderr = await proc.communicate()
+        Returns:
+            str: The voice model passed to Piper.
+
+        Raises:
+            AudioGenerationError: If the voice id isn't configured.
+        """
+        if voice is None:
+            return config.VOICE_NAME
+        if voice not in config.TTS_VOICES:
+            raise AudioGenerationError(f"Unknown voice: {voice}")
+        return config.TTS_VOICES[voice]
+
+    def __cache_key(self, text: str, model: str) -> str:
+        """Builds the cache key of a text spoken with a voice model.
+
+        Args:
+            text (str): The text.
+            model (str): The voice model passed to Piper.
+
+        Returns:
+            str: The cache key.
+        """
+        if model not in self.__voice_ids:
+            self.__voice_ids[model] = TTSCache.voice_id(config.PIPER_DIR, model)
+        return TTSCache.make_key(text, self.__voice_ids[model])
 
-        # Log the output
-        if stderr:
-            log.debug(f"[stderr]\n{stderr.decode()}")
-        if stdout:
-            log.debug(f"[stdout]\n{stdout.decode()}")
-            return stdout.decode()
+    async def __synthesize_and_cache(
+        self, key: str, model: str, text: str, output_file: str
+    ) -> str:
+        """Synthesizes a text and stores it in the cache.
 
-        return None
+        Identical requests arriving in the meantime wait for the result, a failure
+        is raised to them as well.
+
+        Args:
+            key (str): The cache key of the text.
+            model (str): The voice model passed to Piper.
+            text (str): The text to synthesize.
+            output_file (str): Absolute path of the WAV file to write.
+
+        Returns:
+            str: Path of the written WAV file.
+
+        Raises:
+            AudioGenerationError: If the audio file could not be generated.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.__in_flight[key] = future
+        try:
+            await self.__voices.synthesize(model, text, output_file)
+            await asyncio.to_thread(self.__cache.put, key, output_file)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark it as retrieved, nobody might be waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(None)
+        finally:
+            del self.__in_flight[key]
+        return output_file
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+from speech_recognition.services.piper_pool import PiperPool
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class VoicePool:
+    """Bounded LRU pool of Piper process pools, one per voice model.
+
+    Recently used voices keep their processes and stay loaded. When more voices than
+    allowed are loaded, the processes of the least recently used voice that isn't
+    synthesizing right now are stopped. If all voices are busy, the limit is exceeded
+    until one of them is idle again.
+
+    Attributes:
+        __piper_dir (str): Path to the Piper directory.
+        __timeout (float): Seconds to wait for Piper to synthesize a text.
+        __processes_per_voice (int): Maximum number of Piper processes per voice.
+        __max_voices (int): Maximum number of loaded voices.
+        __pools (OrderedDict[str, PiperPool]): Process pools by voice model,
+            least recently used first.
+        __users (dict[str, int]): Number of running requests by voice model.
+    """
+
+    def __init__(
+        self,
+        piper_dir: str,
+        timeout: float,
+        processes_per_voice: int,
+        max_voices: int,
+    ) -> None:
+        """Initializes the VoicePool without loading any voice.
+
+        Args:
+            piper_dir (str): Path to the Piper directory.
+            timeout (float): Seconds to wait for Piper to synthesize a text.
+            processes_per_voice (int): Maximum number of Piper processes per voice.
+            max_voices (int): Maximum number of loaded voices.
+        """
+        self.__piper_dir = piper_dir
+        self.__timeout = timeout
+        self.__processes_per_voice = processes_per_voice
+        self.__max_voices = max(max_voices, 1)
+        self.__pools = OrderedDict()
+        self.__users = {}
+
+    def loaded_voices(self) -> list[str]:
+        """Returns the loaded voices.
+
+        Returns:
+            list[str]: The voice models, least recently used first.
+        """
+        return list(self.__pools)
+
+    async def synthesize(self, voice: str, text: str, output_file: str) -> str:
+        """Synthesizes a text to a WAV file with the given voice.
+
+        Args:
+            voice (str): Voice model passed to Piper.
+            text (str): The text to synthesize.
+            output_file (str): Absolute path of the WAV file to write.
+
+        Returns:
+            str: Path of the written WAV file.
+
+        Raises:
+            AudioGenerationError: If Piper failed twice to write the file.
+        """
+        pool = self.__pools.get(voice)
+        if pool is None:
+            log.info(f"Loading voice {voice}")
+            metrics.increment("tts_voice_loads")
+            pool = PiperPool(
+                self.__piper_dir, voice, self.__timeout, self.__processes_per_voice
+            )
+            self.__pools[voice] = pool
+        self.__pools.move_to_end(voice)
+
+        self.__users[voice] = self.__users.get(voice, 0) + 1
+        try:
+            await self.__evict()
+            return await pool.synthesize(text, output_file)
+        finally:
+            self.__users[voice] -= 1
+
+    async def stop(self) -> None:
+        """Stops the processes of all voices."""
+        while self.__pools:
+            _, pool = self.__pools.popitem(last=False)
+            await pool.stop()
+
+    async def __evict(self) -> None:
+        """Stops the least recently used idle voices while too many are loaded."""
+        while len(self.__pools) > self.__max_voices:
+            idle = [voice for voice in self.__pools if self.__users.get(voice, 0) == 0]
+            if not idle:
+                return
+            # Removed before stopping, so new requests for it load it again
+            pool = self.__pools.pop(idle[0])
+            log.info(f"Unloading least recently used voice {idle[0]}")
+            metrics.increment("tts_voice_evictions")
+            await pool.stop()
@@ -1,13 +1,26 @@
 import asyncio
-import json
+import random
+import uuid
 from typing import Optional
 
 import websockets.asyncio
 from websockets import ConnectionClosedOK, ConnectionClosedError
 
+from speech_recognition import config
+from speech_recognition.services.request_dispatcher import RequestDispatcher
+from speech_recognition.utils.audio_frame import AudioFrame
 from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.message_codec import (
+    JsonCodec,
+    MessageCodec,
+    payload_size,
+)
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.outbox import Outbox
+from speech_recognition.utils.work_credits import WorkCredits
 
 log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
 
 
 class WebSocketClient:
@@ -17,22 +30,76 @@ class WebSocketClient:
     This client maintains an asynchronous connection with automatic reconnection logic.
     Received messages can be parsed and added to an internal queue for further processing.
 
+    Messages that can't be sent while the connection is down are buffered in an outbox
+    and replayed in order after reconnecting. Every JSON message gets a `message_id`,
+    so the server can drop messages it receives twice.
+
+    Messages are serialized with a codec negotiated as WebSocket subprotocol, JSON
+    (with orjson if installed) or MessagePack. Large messages are serialized and parsed
+    in a worker thread, so they don't block the event loop.
+
+    Requests to generate audio and uploaded audio are put on the queues by a
+    `RequestDispatcher`.
+
+    In cluster pull mode the client advertises its free capacity per stage as
+    WORK_CREDITS message `{"credits": {"stt": 2, "tts": 3}, "reset": true}` after
+    connecting. The dispatcher only sends as many jobs as there are credits. The
+    credit of a job is granted again with `{"credits": {"tts": 1}}` right after
+    its final result.
+
     Attributes:
         __uri (str): URI of the WebSocket server to connect to.
-        __queue (asyncio.Queue): Queue used for communication between this client and other components.
+        __dispatcher (RequestDispatcher): Puts received requests on the text and speech queues.
         __register_message (Optional[str]): Optional message to send immediately after connecting.
         __receive_task (asyncio.Task): Async task responsible for handling incoming messages.
         __ws (ClientConnection): The current WebSocket connection object.
+        __outbox (Outbox): Messages waiting to be sent, oldest first.
+        __send_lock (asyncio.Lock): Lock keeping the messages in order while replaying.
+        __preferred_codec (str): Name of the codec offered to the server.
+        __codec (MessageCodec): Codec of the current connection.
+        __credits (Optional[WorkCredits]): Free capacity advertised in pull mode,
+            None to accept all jobs sent by the server.
     """
 
+    __FINAL_TYPES = frozenset(
+        {
+            "GENERATE_AUDIO_SUCCESS",
+            "GENERATE_AUDIO_ERROR",
+            "EXTRACT_DATA_FROM_AUDIO_SUCCESS",
+            "EXTRACT_DATA_FROM_AUDIO_ERROR",
+        }
+    )
+
     __register_message = None
 
     __receive_task = None
 
-    def __init__(self, uri: str, queue: asyncio.Queue) -> None:
+    def __init__(
+        self,
+        uri: str,
+        queue: asyncio.Queue,
+        speech_queue: Optional[asyncio.Queue] = None,
+        credits: Optional[WorkCredits] = None,
+    ) -> None:
         self.__uri = uri
-        self.__queue = queue
+        self.__credits = credits
+        self.__dispatcher = RequestDispatcher(
+            queue, speech_queue, credits.acquire if credits is not None else None
+        )
         self.__ws = None
+        self.__outbox = Outbox(
+            config.WEBSOCKET_OUTBOX_MAX_MESSAGES, config.WEBSOCKET_OUTBOX_FILE
+        )
+        self.__send_lock = asyncio.Lock()
+        self.__preferred_codec = config.WEBSOCKET_CODEC
+        if self.__preferred_codec != JsonCodec.name:
+            # Fail early if the codec is unknown or its library is missing
+            try:
+                MessageCodec.create(self.__preferred_codec)
+            except ImportError as e:
+                log.warning(f"{e}, falling back to JSON")
+                self.__preferred_codec = JsonCodec.name
+        self.__codec = JsonCodec()
 
     async def connect(self, message: Optional[str] = None) -> None:
         """Establishes a connection to the WebSocket server.
@@ -52,11 +119,27 @@ class WebSocketClient:
 
     async def __connect_internal(self) -> None:
         """Internal method to establish connection and start listening for incoming messages."""
-        self.__ws = await websockets.connect(self.__uri)
+        if self.__preferred_codec == JsonCodec.name:
+            self.__ws = await websockets.connect(self.__uri)
+            self.__codec = JsonCodec()
+        else:
+            self.__ws = await websockets.connect(
+                self.__uri, subprotocols=[self.__preferred_codec, JsonCodec.name]
+            )
+            # Servers without subprotocol support select none
+            self.__codec = MessageCodec.create(self.__ws.subprotocol or JsonCodec.name)
+        log.info(f"Using the {self.__codec.name} message codec")
 
         if self.__register_message is not None:
             log.info(f"Registering with message: {self.__register_message}")
-            await self.send_message(self.__register_message)
+            await self.__ws.send(self.__register_message)
+
+        async with self.__send_lock:
+            await self.__send_buffered()
+
+        if self.__credits is not None:
+            # The server forgets the credits of a closed connection
+            await self.__send_credits(self.__credits.free(), reset=True)
 
         if self.__receive_task is not None:
             try:
@@ -86,23 +169,91 @@ class WebSocketClient:
             self.__ws = None
 
     async def send_message(self, message: str | dict) -> None:
-        """Sends a message to the WebSocket server.
+        """Sends a message to the WebSocket server, buffering it while disconnected.
 
         Args:
-            message (str | dict): The message to send. If a dict is provided, it will be converted to JSON.
+            message (str | dict): The message to send. If a dict is provided, it will be serialized
+                with the codec with a `message_id` added, unless it already has one.
         """
-        if self.__ws:
-            try:
-                log.info(f"Sending message: {message}")
-                match message:
-                    case dict():
-                        await self.__ws.send(json.dumps(message))
-                    case str():
-                        await self.__ws.send(message)
-            except Exception as e:
-                log.error(f"Error sending message: {e}")
-        else:
-            log.error("Not connected to the WebSocket server.")
+        log.info(f"Sending message: {message}")
+        match message:
+            case dict():
+                if "message_id" not in message:
+                    message = {**message, "message_id": uuid.uuid4().hex}
+                limit = config.WEBSOCKET_OFFLOAD_BYTES
+                if payload_size(message, limit) > limit:
+                    encoded = await asyncio.to_thread(self.__codec.encode, message)
+                else:
+                    encoded = self.__codec.encode(message)
+                await self.__send(encoded)
+                if self.__credits is not None and message["type"] in self.__FINAL_TYPES:
+                    request_id = message["message"].get("request_id")
+                    stage = self.__credits.release(request_id)
+                    if stage is not None:
+                        await self.__send_credits({stage: 1})
+            case str():
+                await self.__send(message)
+
+    async def __send_credits(
+        self, credits: dict[str, int], reset: bool = False
+    ) -> None:
+        """Grants the server credits to send jobs in pull mode.
+
+        Args:
+            credits (dict[str, int]): Number of jobs the server may send, by stage.
+            reset (bool, optional): Whether the credits replace the ones the server
+                has, instead of being added to them. Defaults to False.
+        """
+        message = {"credits": credits}
+        if reset:
+            message["reset"] = True
+        await self.send_message({"type": "WORK_CREDITS", "message": message})
+
+    async def send_binary(self, data: bytes) -> None:
+        """Sends a binary frame to the WebSocket server, buffering it while disconnected.
+
+        Args:
+            data (bytes): The frame to send, e.g. built with `AudioFrame.encode`.
+        """
+        log.info(f"Sending binary frame of {len(data)} bytes")
+        await self.__send(data)
+
+    async def __send(self, message: str | bytes) -> None:
+        """Sends a message after the buffered ones, or buffers it if that's not possible.
+
+        Args:
+            message (str | bytes): The text or binary message.
+        """
+        async with self.__send_lock:
+            if self.__ws is not None and await self.__send_buffered():
+                try:
+                    await self.__ws.send(message)
+                    return
+                except Exception as e:
+                    log.error(f"Error sending message: {e}")
+            else:
+                log.warning("Not connected to the WebSocket server, buffering message")
+            self.__outbox.put(message)
+
+    async def __send_buffered(self) -> bool:
+        """Sends the buffered messages in order, the send lock has to be held.
+
+        Returns:
+            bool: True if all buffered messages were sent.
+        """
+        if not len(self.__outbox):
+            return True
+        log.info(f"Replaying {len(self.__outbox)} buffered messages")
+        try:
+            while (message := self.__outbox.peek()) is not None:
+                await self.__ws.send(message)
+                self.__outbox.pop()
+                metrics.increment("ws_outbox_replayed")
+        except Exception as e:
+            log.error(f"Error replaying buffered messages: {e}")
+        finally:
+            self.__outbox.flush()
+        return not len(self.__outbox)
 
     async def __receive_messages(self) -> None:
         """Listens for incoming messages from the WebSocket server.
@@ -128,41 +279,41 @@ class WebSocketClient:
                 log.error(f"Exception occurred while awaiting messages: {e}")
                 break
 
-    async def __message_handler(self, message: str) -> None:
-        """Handles a specific format of WebSocket message, particularly GENERATE_AUDIO_REQUEST.
+    async def __message_handler(self, message: str | bytes) -> None:
+        """Decodes a message from the server and passes it to the request dispatcher.
 
         Args:
-            message (str): A JSON-formatted string message from the server.
+            message (str | bytes): A message from the server, serialized with the codec,
+                or a binary audio frame.
         """
         try:
-            message = json.loads(message)
-            log.info(f"Message received: {message}")
-            if message["type"] == "GENERATE_AUDIO_REQUEST":
-                text = message["message"]["text"]
-                log.info(f"Text to generate audio from: {text}")
-                # Check that text isn't empty and doesn't only contain whitespace
-                if text.strip() and text:
-                    await self.__queue.put(text)
+            if not (
+                isinstance(message, bytes) and message.startswith(AudioFrame.MAGIC)
+            ):
+                if len(message) > config.WEBSOCKET_OFFLOAD_BYTES:
+                    message = await asyncio.to_thread(self.__codec.decode, message)
                 else:
-                    await self.send_message(
-                        json.dumps(
-                            {
-                                "type": "GENERATE_AUDIO_ERROR",
-                                "message": {
-                                    "text": "Text to generate audio for was empty"
-                                },
-                            }
-                        )
-                    )
+                    message = self.__codec.decode(message)
+            await self.__dispatcher.dispatch(message, self.send_message)
         except Exception as e:
             log.error(f"Exception occurred: {e}")
 
     async def __reconnect(self) -> None:
-        """Handles reconnection attempts in case the connection is lost."""
+        """Handles reconnection attempts in case the connection is lost.
+
+        The delay between attempts doubles up to a maximum, and is randomized between
+        half and the full delay, so many clients don't reconnect at the same time.
+        """
+        attempt = 0
         while True:
+            delay = min(
+                config.WEBSOCKET_RECONNECT_MAX_SECONDS,
+                config.WEBSOCKET_RECONNECT_BASE_SECONDS * 2**attempt,
+            )
+            attempt += 1
             try:
-                log.info("Attempting to reconnect")
-                await asyncio.sleep(5)
+                await asyncio.sleep(random.uniform(delay / 2, delay))
+                log.info(f"Attempting to reconnect, attempt {attempt}")
                 await self.__connect_internal()
                 log.info("Reconnected")
                 break
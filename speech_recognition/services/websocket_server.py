@@ -0,0 +1,227 @@
+import asyncio
+import itertools
+from typing import Callable, Optional, Sequence
+
+from websockets import ConnectionClosed
+from websockets.asyncio.server import ServerConnection, serve
+
+from speech_recognition import config
+from speech_recognition.services.request_dispatcher import RequestDispatcher
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.fair_queue import FairQueue
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.message_codec import JsonCodec, MessageCodec
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.workers.abstract_worker import AbstractWorker
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class WebSocketServer(AbstractWorker):
+    """Embedded WebSocket server accepting jobs from many clients directly.
+
+    It is used instead of `WebSocketClient` in server mode and offers the same
+    `send_message` and `send_binary` methods to the workers. Clients send the same
+    requests as the upstream server in client mode, see `RequestDispatcher`.
+
+    Every job is tagged with the id of its connection, which the workers copy into
+    its results, so they are sent back to that connection only, with the original
+    request id. Results without a connection, e.g. of files in the input directory,
+    are sent to all clients. Use `FairQueue` grouped by `connection` as work queues,
+    so every connection gets its turn and the jobs of a closed connection are dropped.
+
+    Attributes:
+        __host (str): Host name or address to listen on.
+        __port (int): Port to listen on.
+        __dispatcher (RequestDispatcher): Puts received requests on the text and speech queues.
+        __queues (tuple[asyncio.Queue, asyncio.Queue]): The text and speech queues.
+        __connections (dict[str, tuple[ServerConnection, MessageCodec]]): Open
+            connections and their codecs, by connection id.
+        __connection_ids (Iterator[int]): Source of new connection ids.
+        __subprotocols (list[str]): Codecs offered to the clients, preferred first.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        text_queue: asyncio.Queue,
+        speech_queue: asyncio.Queue,
+    ) -> None:
+        """Initializes the WebSocketServer without starting it.
+
+        Args:
+            host (str): Host name or address to listen on.
+            port (int): Port to listen on, 0 for any free port.
+            text_queue (asyncio.Queue): Queue of text requests to generate audio for.
+            speech_queue (asyncio.Queue): Queue of audio extraction requests.
+        """
+        self.__host = host
+        self.__port = port
+        self.__dispatcher = RequestDispatcher(text_queue, speech_queue)
+        self.__queues = (text_queue, speech_queue)
+        self.__connections = {}
+        self.__connection_ids = itertools.count(1)
+        self.__subprotocols = [JsonCodec.name]
+        if config.WEBSOCKET_CODEC != JsonCodec.name:
+            try:
+                MessageCodec.create(config.WEBSOCKET_CODEC)
+                self.__subprotocols.insert(0, config.WEBSOCKET_CODEC)
+            except ImportError as e:
+                log.warning(f"{e}, falling back to JSON")
+
+    async def do_work(self) -> None:
+        """Accepts connections until cancelled."""
+        async with serve(
+            self.__handle_connection,
+            self.__host,
+            self.__port,
+            select_subprotocol=self.__select_subprotocol,
+        ) as server:
+            sockets = ", ".join(str(s.getsockname()) for s in server.sockets)
+            log.info(f"WebSocket server listening on {sockets}")
+            await server.serve_forever()
+
+    async def send_message(self, message: str | dict) -> None:
+        """Sends a message to the connection of its request, or to all clients.
+
+        Args:
+            message (str | dict): The message. Dicts are routed by the connection in
+                their `message` field, strings are sent to all clients.
+        """
+        if isinstance(message, str):
+            await self.__broadcast(lambda codec: message)
+            return
+        body = message.get("message")
+        connection = body.get("connection") if isinstance(body, dict) else None
+        if connection is not None:
+            message = {**message, "message": self.__unroute(body)}
+            await self.__send_to(connection, lambda codec: codec.encode(message))
+        else:
+            await self.__broadcast(lambda codec: codec.encode(message))
+
+    async def send_binary(self, data: bytes) -> None:
+        """Sends a binary audio frame to the connection of its request, or to all clients.
+
+        Args:
+            data (bytes): The frame, see `AudioFrame`.
+        """
+        header, payload = AudioFrame.decode(data, copy=False)
+        connection = header.get("connection")
+        if connection is not None:
+            frame = AudioFrame.encode(self.__unroute(header), payload)
+            await self.__send_to(connection, lambda codec: frame)
+        else:
+            await self.__broadcast(lambda codec: data)
+
+    def __select_subprotocol(
+        self, ws: ServerConnection, offered: Sequence[str]
+    ) -> Optional[str]:
+        """Selects the preferred codec offered by a client.
+
+        Clients offering no codec are accepted as well and use JSON.
+
+        Args:
+            ws (ServerConnection): The connection to the client.
+            offered (Sequence[str]): Subprotocols offered by the client.
+
+        Returns:
+            Optional[str]: The selected subprotocol, None for none.
+        """
+        return next((s for s in self.__subprotocols if s in offered), None)
+
+    async def __handle_connection(self, ws: ServerConnection) -> None:
+        """Receives the requests of a client until it disconnects.
+
+        Args:
+            ws (ServerConnection): The connection to the client.
+        """
+        connection = str(next(self.__connection_ids))
+        codec = MessageCodec.create(ws.subprotocol or JsonCodec.name)
+        self.__connections[connection] = (ws, codec)
+        metrics.increment("ws_server_connections")
+        log.info(
+            f"Client {connection} connected from {ws.remote_address} "
+            f"using the {codec.name} message codec"
+        )
+
+        async def reply(message: dict) -> None:
+            await self.__send_to(connection, lambda c: c.encode(message))
+
+        try:
+            async for raw in ws:
+                try:
+                    if isinstance(raw, bytes) and raw.startswith(AudioFrame.MAGIC):
+                        message = raw
+                    elif len(raw) > config.WEBSOCKET_OFFLOAD_BYTES:
+                        message = await asyncio.to_thread(codec.decode, raw)
+                    else:
+                        message = codec.decode(raw)
+                    await self.__dispatcher.dispatch(message, reply, connection)
+                except Exception as e:
+                    log.error(f"Invalid message from client {connection}: {e}")
+        except ConnectionClosed:
+            pass
+        finally:
+            del self.__connections[connection]
+            # Nobody is waiting for the results of its queued jobs anymore
+            dropped = sum(
+                queue.remove(connection)
+                for queue in self.__queues
+                if isinstance(queue, FairQueue)
+            )
+            metrics.increment("ws_server_dropped_requests", dropped)
+            log.info(
+                f"Client {connection} disconnected, dropped {dropped} queued requests"
+            )
+
+    @staticmethod
+    def __unroute(fields: dict) -> dict:
+        """Restores the fields of a result as the client expects them.
+
+        Args:
+            fields (dict): Message or frame header fields tagged with a connection.
+
+        Returns:
+            dict: The fields without the connection, with the request id chosen by
+                the client.
+        """
+        fields = dict(fields)
+        connection = fields.pop("connection")
+        request_id = fields.get("request_id")
+        if isinstance(request_id, str):
+            fields["request_id"] = request_id.removeprefix(f"{connection}:")
+        return fields
+
+    async def __send_to(
+        self, connection: str, encode: Callable[[MessageCodec], str | bytes]
+    ) -> None:
+        """Sends a message to one client, dropping it if the client is gone.
+
+        Args:
+            connection (str): The connection id.
+            encode (Callable[[MessageCodec], str | bytes]): Serializes the message
+                with the codec of the connection.
+        """
+        if connection not in self.__connections:
+            log.warning(f"Client {connection} disconnected, dropping result")
+            metrics.increment("ws_server_dropped_results")
+            return
+        ws, codec = self.__connections[connection]
+        try:
+            await ws.send(encode(codec))
+        except ConnectionClosed:
+            log.warning(f"Client {connection} disconnected, dropping result")
+            metrics.increment("ws_server_dropped_results")
+
+    async def __broadcast(self, encode: Callable[[MessageCodec], str | bytes]) -> None:
+        """Sends a message to all clients.
+
+        Args:
+            encode (Callable[[MessageCodec], str | bytes]): Serializes the message
+                with the codec of a connection.
+        """
+        await asyncio.gather(
+            *(self.__send_to(connection, encode) for connection in self.__connections)
+        )
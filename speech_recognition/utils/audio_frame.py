@@ -0,0 +1,69 @@
+import json
+import struct
+
+
+class AudioFrame:
+    """Encodes and decodes binary WebSocket frames carrying audio.
+
+    A frame starts with the magic bytes `SRAF`, followed by the length of the header
+    as 4 byte unsigned big-endian integer, the header as UTF-8 JSON object and the
+    audio payload. The header correlates the audio with its request, e.g.
+    `{"type": "GENERATE_AUDIO_SUCCESS", "request_id": "...", "format": "flac"}`.
+
+    Attributes:
+        MAGIC (bytes): Bytes every frame starts with.
+        __LENGTH (struct.Struct): Format of the header length.
+    """
+
+    MAGIC = b"SRAF"
+
+    __LENGTH = struct.Struct(">I")
+
+    @staticmethod
+    def encode(header: dict, payload: bytes) -> bytes:
+        """Builds a frame from a header and a payload.
+
+        Args:
+            header (dict): JSON serializable header describing the payload.
+            payload (bytes): The audio data.
+
+        Returns:
+            bytes: The frame.
+        """
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        return b"".join(
+            [
+                AudioFrame.MAGIC,
+                AudioFrame.__LENGTH.pack(len(header_bytes)),
+                header_bytes,
+                payload,
+            ]
+        )
+
+    @staticmethod
+    def decode(frame: bytes, copy: bool = True) -> tuple[dict, bytes | memoryview]:
+        """Splits a frame into its header and payload.
+
+        Args:
+            frame (bytes): The frame.
+            copy (bool, optional): Whether to copy the payload, otherwise it is returned
+                as view into the frame. Defaults to True.
+
+        Returns:
+            tuple[dict, bytes | memoryview]: The header and the payload.
+
+        Raises:
+            ValueError: If the frame is malformed.
+        """
+        start = len(AudioFrame.MAGIC) + AudioFrame.__LENGTH.size
+        if len(frame) < start or not frame.startswith(AudioFrame.MAGIC):
+            raise ValueError("Not an audio frame")
+        (length,) = AudioFrame.__LENGTH.unpack_from(frame, len(AudioFrame.MAGIC))
+        if len(frame) < start + length:
+            raise ValueError("Audio frame header is truncated")
+        header = json.loads(frame[start : start + length].decode("utf-8"))
+        if not isinstance(header, dict):
+            raise ValueError("Audio frame header isn't a JSON object")
+        if copy:
+            return header, frame[start + length :]
+        return header, memoryview(frame)[start + length :]
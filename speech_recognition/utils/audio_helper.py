@@ -1,8 +1,10 @@
 import os
 import subprocess
+import wave
 from pathlib import Path
 from typing import Set
 
+import numpy as np
 import pydub
 from pydub.silence import detect_nonsilent
 
@@ -60,7 +62,9 @@ class AudioHelper:
         """
         if not self.__is_file_format_supported(infile):
             log.exception(f"File format of {infile} is not supported.")
-            raise TranscriptionError(f"File format of {infile} is not supported.")
+            raise TranscriptionError(
+                f"File format of {infile} is not supported.", permanent=True
+            )
 
         outfile = (
             f"{self.__out_dir}{os.sep}{infile.split(os.sep)[-1].split('.')[0]}.wav"
@@ -72,11 +76,196 @@ class AudioHelper:
             sound = pydub.AudioSegment.from_file(infile)
             sound.export(outfile, format="wav")
             return outfile
-        except Exception as e:
+        except OSError as e:
+            # E.g. FFmpeg missing or the file not readable, a retry may succeed
             log.exception(f"Error during conversion of {infile} to WAV format: {e}")
             raise TranscriptionError(
                 f"Error during conversion of {infile} to WAV format"
             )
+        except Exception as e:
+            log.exception(f"Error during conversion of {infile} to WAV format: {e}")
+            raise TranscriptionError(
+                f"Error during conversion of {infile} to WAV format", permanent=True
+            )
+
+    @staticmethod
+    def decode_audio(data: bytes | memoryview, sampling_rate: int) -> np.ndarray:
+        """Decodes audio of any format FFmpeg supports in memory, without touching disk.
+
+        Args:
+            data (bytes | memoryview): The encoded audio, e.g. the payload of an upload.
+            sampling_rate (int): Sampling rate of the returned samples.
+
+        Returns:
+            np.ndarray: Mono float32 samples in the range [-1, 1].
+
+        Raises:
+            TranscriptionError: If FFmpeg can't be run or can't decode the audio.
+        """
+        # ffmpeg -i pipe:0 -f s16le -ac 1 -ar <rate> pipe:1
+        try:
+            result = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-hide_banner",
+                    "-loglevel",
+                    "error",
+                    "-i",
+                    "pipe:0",
+                    "-f",
+                    "s16le",
+                    "-ac",
+                    "1",
+                    "-ar",
+                    str(sampling_rate),
+                    "pipe:1",
+                ],
+                input=data,
+                capture_output=True,
+            )
+        except OSError as e:
+            # E.g. FFmpeg isn't installed
+            log.error(f"Could not run FFmpeg to decode audio: {e}")
+            raise TranscriptionError("Error while decoding the uploaded audio")
+        if result.returncode != 0:
+            log.error(
+                "Error while decoding audio: "
+                f"{result.stderr.decode('utf-8', errors='replace')}"
+            )
+            raise TranscriptionError("Error while decoding the uploaded audio")
+        # The PCM output is viewed in place, only the conversion to float copies it
+        samples = np.frombuffer(result.stdout, dtype=np.int16)
+        return samples.astype(np.float32) / 32768
+
+    @staticmethod
+    def to_segment(samples: np.ndarray, sampling_rate: int) -> pydub.AudioSegment:
+        """Converts mono float samples in the range [-1, 1] to an audio segment.
+
+        Args:
+            samples (np.ndarray): The samples.
+            sampling_rate (int): Sampling rate of the samples.
+
+        Returns:
+            pydub.AudioSegment: The 16 bit mono audio segment.
+        """
+        pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+        return pydub.AudioSegment(
+            data=pcm.tobytes(), sample_width=2, frame_rate=sampling_rate, channels=1
+        )
+
+    @staticmethod
+    def is_samples_empty(
+        samples: np.ndarray,
+        sampling_rate: int,
+        min_silence_len: int = 1000,
+        silence_thresh: int = -50,
+    ) -> bool:
+        """Checks whether decoded audio is shorter than a quarter second or only silence.
+
+        Args:
+            samples (np.ndarray): Mono float samples in the range [-1, 1].
+            sampling_rate (int): Sampling rate of the samples.
+            min_silence_len (int, optional): Minimum length of silence in milliseconds to consider. Defaults to 1000.
+            silence_thresh (int, optional): Silence threshold in dBFS. Defaults to -50.
+
+        Returns:
+            bool: True if the audio is empty or silent, False otherwise.
+        """
+        if len(samples) < sampling_rate // 4:
+            return True
+        nonsilent = detect_nonsilent(
+            AudioHelper.to_segment(samples, sampling_rate),
+            min_silence_len=min_silence_len,
+            silence_thresh=silence_thresh,
+        )
+        return len(nonsilent) == 0
+
+    @staticmethod
+    def split_on_silence(
+        infile: str | pydub.AudioSegment,
+        max_segment_ms: int,
+        min_silence_len: int = 500,
+        silence_thresh: int = -50,
+    ) -> list[pydub.AudioSegment]:
+        """Splits an audio file into segments of at most `max_segment_ms` at pauses.
+
+        Segments are cut in the middle of a pause, so no word is cut in half. Speech
+        without any pause longer than `max_segment_ms` is kept in one segment.
+
+        Args:
+            infile (str | pydub.AudioSegment): Path to the input audio file, or the
+                already loaded audio.
+            max_segment_ms (int): Maximum length of a segment in milliseconds.
+            min_silence_len (int, optional): Minimum length of a pause in milliseconds. Defaults to 500.
+            silence_thresh (int, optional): Silence threshold in dBFS. Defaults to -50.
+
+        Returns:
+            list[pydub.AudioSegment]: The segments in order, covering the whole file.
+        """
+        if isinstance(infile, pydub.AudioSegment):
+            audio = infile
+        else:
+            audio = pydub.AudioSegment.from_file(infile)
+        nonsilent = detect_nonsilent(
+            audio,
+            min_silence_len=min_silence_len,
+            silence_thresh=silence_thresh,
+        )
+        if not nonsilent:
+            return [audio]
+
+        segments = []
+        cut = 0
+        _, end = nonsilent[0]
+        for next_start, next_end in nonsilent[1:]:
+            if next_end - cut > max_segment_ms:
+                boundary = (end + next_start) // 2
+                segments.append(audio[cut:boundary])
+                cut = boundary
+            end = next_end
+        segments.append(audio[cut:])
+        return segments
+
+    @staticmethod
+    def to_samples(segment: pydub.AudioSegment, sampling_rate: int) -> np.ndarray:
+        """Converts an audio segment to mono float samples in the range [-1, 1].
+
+        Args:
+            segment (pydub.AudioSegment): The audio segment.
+            sampling_rate (int): Sampling rate of the returned samples.
+
+        Returns:
+            np.ndarray: The samples as float32 array.
+        """
+        segment = (
+            segment.set_channels(1).set_sample_width(2).set_frame_rate(sampling_rate)
+        )
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        return samples / 32768
+
+    @staticmethod
+    def concat_wav(files: list[str], output_file: str) -> None:
+        """Concatenates WAV files with the same format into one file.
+
+        Args:
+            files (list[str]): Paths of the WAV files in order.
+            output_file (str): Path of the WAV file to write.
+
+        Raises:
+            ValueError: If no files are given or their formats differ.
+        """
+        if not files:
+            raise ValueError("No WAV files to concatenate")
+        with wave.open(output_file, "wb") as output:
+            params = None
+            for file in files:
+                with wave.open(file, "rb") as part:
+                    if params is None:
+                        params = part.getparams()[:3]
+                        output.setparams(part.getparams())
+                    elif part.getparams()[:3] != params:
+                        raise ValueError(f"WAV format of {file} differs")
+                    output.writeframes(part.readframes(part.getnframes()))
 
     def __is_file_format_supported(self, filepath: str) -> bool:
         """Checks whether the given audio file's format is supported for decoding by FFmpeg.
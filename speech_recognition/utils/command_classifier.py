@@ -0,0 +1,301 @@
+import re
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class CommandClassifier:
+    """Deterministic yes/no classifier for short German command transcripts.
+
+    Most command transcripts are just "ja", "nein", "genau" or "auf keinen Fall".
+    This classifier answers those with a small normalized lexicon instead of the LLM.
+    Every token of the transcript has to be known, otherwise the text is considered
+    ambiguous and None is returned so the caller can fall back to the LLM.
+
+    A negation ("nicht", "kein") turns the affirmation right next to it within the same
+    clause into a NO, e.g. "stimmt nicht" or "nicht einverstanden", and counts as a NO
+    on its own otherwise. Negated rejections ("nicht falsch"), expressions of
+    uncertainty ("nicht sicher", "weiß nicht") and tag questions ("richtig, nicht?")
+    are left to the LLM.
+
+    Attributes:
+        __YES_PHRASES (tuple[tuple[str, ...], ...]): Multi-word phrases expressing a YES.
+        __NO_PHRASES (tuple[tuple[str, ...], ...]): Multi-word phrases expressing a NO.
+        __YES_WORDS (frozenset[str]): Single words expressing a YES.
+        __NO_WORDS (frozenset[str]): Single words expressing a NO.
+        __NEGATORS (frozenset[str]): Words negating an affirmation.
+        __UNCERTAIN_WORDS (frozenset[str]): Words expressing uncertainty.
+        __FILLERS (frozenset[str]): Words without polarity that may surround the answer.
+        __MAX_TOKENS (int): Longer transcripts are always left to the LLM.
+        __CLAUSE_SEPARATOR (re.Pattern): Punctuation separating clauses.
+        __TAG_QUESTION (re.Pattern): A transcript ending with the tag question "nicht?".
+    """
+
+    __YES_PHRASES = (
+        ("auf", "jeden", "fall"),
+        ("kein", "problem"),
+        ("keine", "frage"),
+        ("in", "ordnung"),
+        ("na", "klar"),
+        ("geht", "klar"),
+    )
+
+    __NO_PHRASES = (
+        ("auf", "keinen", "fall"),
+        ("lieber", "nicht"),
+        ("besser", "nicht"),
+        ("gar", "nicht"),
+        ("überhaupt", "nicht"),
+        ("kein", "interesse"),
+    )
+
+    __YES_WORDS = frozenset(
+        {
+            "ja",
+            "jawohl",
+            "jap",
+            "jep",
+            "jo",
+            "yes",
+            "genau",
+            "richtig",
+            "korrekt",
+            "stimmt",
+            "klar",
+            "natürlich",
+            "gerne",
+            "gern",
+            "okay",
+            "ok",
+            "einverstanden",
+            "sicherlich",
+            "selbstverständlich",
+            "absolut",
+            "freilich",
+            "doch",
+            "gut",
+            "passt",
+            "mhm",
+            "bestätigt",
+            "zustimmung",
+        }
+    )
+
+    __NO_WORDS = frozenset(
+        {
+            "nein",
+            "nee",
+            "ne",
+            "nö",
+            "noe",
+            "no",
+            "nope",
+            "niemals",
+            "nie",
+            "keinesfalls",
+            "abgelehnt",
+            "falsch",
+        }
+    )
+
+    __NEGATORS = frozenset({"nicht", "kein", "keine", "keinen"})
+
+    __UNCERTAIN_WORDS = frozenset(
+        {
+            "sicher",
+            "unsicher",
+            "weiß",
+            "weiss",
+            "vielleicht",
+            "eventuell",
+            "möglicherweise",
+            "wahrscheinlich",
+            "ahnung",
+        }
+    )
+
+    __FILLERS = frozenset(
+        {
+            "bitte",
+            "danke",
+            "dankeschön",
+            "vielen",
+            "dank",
+            "also",
+            "äh",
+            "ähm",
+            "hm",
+            "hmm",
+            "na",
+            "das",
+            "ist",
+            "es",
+            "ich",
+            "bin",
+            "sehr",
+            "ganz",
+            "schon",
+            "auch",
+            "so",
+            "dann",
+            "wohl",
+            "mal",
+            "aber",
+        }
+    )
+
+    __MAX_TOKENS = 8
+
+    __CLAUSE_SEPARATOR = re.compile(r"[,.;:!?]")
+
+    __TAG_QUESTION = re.compile(r"\bnicht\s*\?\W*$", re.IGNORECASE)
+
+    def classify(self, text: str) -> Optional[dict]:
+        """Classifies a transcript as YES or NO if the answer is unambiguous.
+
+        Args:
+            text (str): The transcribed user speech.
+
+        Returns:
+            Optional[dict]: {"result": "YES"} or {"result": "NO"} in the same format as the
+            LLM output, or None if the text is ambiguous and the LLM has to decide.
+        """
+        metrics.increment("command_classifier_requests")
+        clauses = [self.normalize(c) for c in self.__CLAUSE_SEPARATOR.split(text)]
+        length = sum(len(clause) for clause in clauses)
+
+        result = None
+        if 0 < length <= self.__MAX_TOKENS and not self.__TAG_QUESTION.search(text):
+            result = self.__classify_clauses(clauses)
+
+        if result is None:
+            log.debug(f"Rule-based classifier could not decide on: {text}")
+            return None
+
+        metrics.increment("command_classifier_hits")
+        log.debug(f"Rule-based classifier decided {result} for: {text}")
+        return {"result": result}
+
+    @staticmethod
+    def normalize(text: str) -> list[str]:
+        """Normalizes a transcript into lowercase tokens without punctuation.
+
+        Args:
+            text (str): The text to normalize.
+
+        Returns:
+            list[str]: The normalized tokens.
+        """
+        return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+    def __classify_clauses(self, clauses: list[list[str]]) -> Optional[str]:
+        """Counts the polarity of the clauses and decides on a result.
+
+        Args:
+            clauses (list[list[str]]): Normalized tokens of each clause of the transcript.
+
+        Returns:
+            Optional[str]: "YES", "NO" or None if the tokens are unknown, uncertain
+                or contradicting.
+        """
+        yes_votes = 0
+        no_votes = 0
+        for clause in clauses:
+            polarities = self.__clause_polarities(clause)
+            if polarities is None:
+                return None
+            yes_votes += polarities.count(True)
+            no_votes += polarities.count(False)
+
+        if yes_votes and not no_votes:
+            return "YES"
+        if no_votes and not yes_votes:
+            return "NO"
+        return None
+
+    def __clause_polarities(self, tokens: list[str]) -> Optional[list[bool]]:
+        """Determines the polarity of each answer in a clause, applying negations.
+
+        A negator negates the answer right after it, e.g. "nicht einverstanden",
+        or else the one right before it, e.g. "stimmt nicht". Without an answer next
+        to it, it counts as a NO on its own.
+
+        Args:
+            tokens (list[str]): Normalized tokens of the clause.
+
+        Returns:
+            Optional[list[bool]]: True for every YES and False for every NO, or None if
+                the clause contains unknown or uncertain words or a negated NO.
+        """
+        # Per position: True/False for an answer, "neg" for a negator, None for fillers
+        items = []
+        i = 0
+        while i < len(tokens):
+            phrase_length, polarity = self.__match_phrase(tokens, i)
+            if phrase_length:
+                items.append(polarity)
+                i += phrase_length
+                continue
+
+            token = tokens[i]
+            if token in self.__UNCERTAIN_WORDS:
+                # "nicht sicher", "weiß nicht"
+                return None
+            if token in self.__YES_WORDS:
+                items.append(True)
+            elif token in self.__NO_WORDS:
+                items.append(False)
+            elif token in self.__NEGATORS:
+                items.append("neg")
+            elif token in self.__FILLERS:
+                items.append(None)
+            else:
+                # Unknown content, let the LLM decide
+                return None
+            i += 1
+
+        polarities = []
+        negated = set()
+        for i, item in enumerate(items):
+            if item != "neg":
+                continue
+            if i + 1 < len(items) and isinstance(items[i + 1], bool):
+                target = i + 1
+            elif i > 0 and isinstance(items[i - 1], bool) and i - 1 not in negated:
+                target = i - 1
+            else:
+                # A plain "nicht" or "bitte nicht"
+                polarities.append(False)
+                continue
+            if not items[target]:
+                # "nicht falsch" is no clear YES
+                return None
+            negated.add(target)
+
+        for i, item in enumerate(items):
+            if isinstance(item, bool):
+                polarities.append(item and i not in negated)
+        return polarities
+
+    def __match_phrase(self, tokens: list[str], start: int) -> tuple[int, bool]:
+        """Checks whether a known multi-word phrase starts at the given position.
+
+        Args:
+            tokens (list[str]): Normalized tokens of the transcript.
+            start (int): Index to check for a phrase.
+
+        Returns:
+            tuple[int, bool]: Length of the matched phrase (0 if none) and whether it means YES.
+        """
+        for phrases, polarity in (
+            (self.__NO_PHRASES, False),
+            (self.__YES_PHRASES, True),
+        ):
+            for phrase in phrases:
+                if tuple(tokens[start : start + len(phrase)]) == phrase:
+                    return len(phrase), polarity
+        return 0, False
@@ -0,0 +1,72 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Callable, Hashable
+
+
+class FairQueue(asyncio.Queue):
+    """Queue handing out items of different sources in turn.
+
+    Items are grouped by a key, e.g. the connection they were received on, and `get`
+    takes one item of each group in round-robin order. A source submitting many
+    requests at once can't delay the requests of the other sources. Items of the same
+    group keep their order. It is a drop-in replacement for `asyncio.Queue`.
+
+    Attributes:
+        __key (Callable[[Any], Hashable]): Function returning the group of an item.
+        __size (int): Number of items in the queue.
+    """
+
+    def __init__(self, key: Callable[[Any], Hashable], maxsize: int = 0) -> None:
+        """Initializes the FairQueue.
+
+        Args:
+            key (Callable[[Any], Hashable]): Function returning the group of an item.
+            maxsize (int, optional): Maximum number of items, 0 for no limit. Defaults to 0.
+        """
+        self.__key = key
+        self.__size = 0
+        super().__init__(maxsize)
+
+    def qsize(self) -> int:
+        """Returns the number of items in the queue."""
+        return self.__size
+
+    def remove(self, key: Hashable) -> int:
+        """Removes all items of a group, e.g. of a connection that was closed.
+
+        The removed items count as done for `join`.
+
+        Args:
+            key (Hashable): The group.
+
+        Returns:
+            int: Number of removed items.
+        """
+        items = self._queue.pop(key, ())
+        for _ in items:
+            self.__size -= 1
+            self.task_done()
+            # Make room for a waiting put, like `get` does
+            self._wakeup_next(self._putters)
+        return len(items)
+
+    def _init(self, maxsize: int) -> None:
+        # Groups in the order they are served, empty groups are removed
+        self._queue = OrderedDict()
+
+    def _put(self, item: Any) -> None:
+        key = self.__key(item)
+        if key not in self._queue:
+            self._queue[key] = deque()
+        self._queue[key].append(item)
+        self.__size += 1
+
+    def _get(self) -> Any:
+        key, items = next(iter(self._queue.items()))
+        item = items.popleft()
+        if items:
+            self._queue.move_to_end(key)
+        else:
+            del self._queue[key]
+        self.__size -= 1
+        return item
@@ -0,0 +1,182 @@
+import json
+from abc import ABC, abstractmethod
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class MessageCodec(ABC):
+    """Serializes the messages exchanged with the WebSocket server.
+
+    Text codecs produce `str` sent as text frames, binary codecs `bytes` sent as binary
+    frames. The codec is negotiated as WebSocket subprotocol named after it.
+
+    Attributes:
+        name (str): Name of the codec and its WebSocket subprotocol.
+    """
+
+    name = None
+
+    @abstractmethod
+    def encode(self, message: dict) -> str | bytes:
+        """Serializes a message.
+
+        Args:
+            message (dict): The message.
+
+        Returns:
+            str | bytes: The serialized message.
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, raw: str | bytes) -> dict:
+        """Deserializes a message.
+
+        Args:
+            raw (str | bytes): The serialized message.
+
+        Returns:
+            dict: The message.
+
+        Raises:
+            ValueError: If the message is malformed.
+        """
+        pass
+
+    @staticmethod
+    def create(name: str) -> "MessageCodec":
+        """Creates a codec by name.
+
+        Args:
+            name (str): Name of the codec, "json" or "msgpack".
+
+        Returns:
+            MessageCodec: The codec.
+
+        Raises:
+            ValueError: If the codec is unknown.
+            ImportError: If the library of the codec isn't installed.
+        """
+        match name:
+            case "json":
+                return JsonCodec()
+            case "msgpack":
+                return MsgPackCodec()
+        raise ValueError(f"Unknown message codec: {name}")
+
+
+class JsonCodec(MessageCodec):
+    """JSON codec using orjson if it is installed, the standard library otherwise."""
+
+    name = "json"
+
+    def encode(self, message: dict) -> str:
+        """Serializes a message to JSON.
+
+        Args:
+            message (dict): The message.
+
+        Returns:
+            str: The JSON text.
+        """
+        if orjson is not None:
+            return orjson.dumps(message).decode("utf-8")
+        return json.dumps(message)
+
+    def decode(self, raw: str | bytes) -> dict:
+        """Deserializes a JSON message.
+
+        Args:
+            raw (str | bytes): The JSON text.
+
+        Returns:
+            dict: The message.
+
+        Raises:
+            ValueError: If the message isn't valid JSON.
+        """
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+
+
+class MsgPackCodec(MessageCodec):
+    """MessagePack codec, requires the msgpack package."""
+
+    name = "msgpack"
+
+    def __init__(self) -> None:
+        """Initializes the MsgPackCodec.
+
+        Raises:
+            ImportError: If msgpack isn't installed.
+        """
+        if msgpack is None:
+            raise ImportError(
+                "The msgpack codec requires msgpack, install it with "
+                "`pip install msgpack`"
+            )
+
+    def encode(self, message: dict) -> bytes:
+        """Serializes a message to MessagePack.
+
+        Args:
+            message (dict): The message.
+
+        Returns:
+            bytes: The MessagePack data.
+        """
+        return msgpack.packb(message, use_bin_type=True)
+
+    def decode(self, raw: str | bytes) -> dict:
+        """Deserializes a MessagePack message.
+
+        Args:
+            raw (str | bytes): The MessagePack data.
+
+        Returns:
+            dict: The message.
+
+        Raises:
+            ValueError: If the message isn't valid MessagePack.
+        """
+        if isinstance(raw, str):
+            raise ValueError("MessagePack messages are binary")
+        return msgpack.unpackb(raw, raw=False)
+
+
+def payload_size(message: object, limit: int) -> int:
+    """Estimates the serialized size of a message by its strings and bytes.
+
+    Stops counting once the limit is exceeded, so checking huge messages stays cheap.
+
+    Args:
+        message (object): The message, made of dicts, lists and scalars.
+        limit (int): Size after which counting stops.
+
+    Returns:
+        int: The estimated size, at least `limit + 1` if it exceeds the limit.
+    """
+    size = 0
+    stack = [message]
+    while stack and size <= limit:
+        item = stack.pop()
+        match item:
+            case str() | bytes():
+                size += len(item)
+            case dict():
+                stack.extend(item.keys())
+                stack.extend(item.values())
+            case list() | tuple():
+                stack.extend(item)
+            case _:
+                size += 8
+    return size
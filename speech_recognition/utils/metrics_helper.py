@@ -0,0 +1,103 @@
+import threading
+from typing import Optional
+
+
+class MetricsHelper:
+    """Helper class to record simple in-process counters and timings.
+
+    All instances share the same registry, so every module can create its own
+    `MetricsHelper()` (like the module level loggers) and still report into one
+    place. Access is guarded by a lock because the services are called from
+    worker threads via `asyncio.to_thread`.
+
+    Attributes:
+        __counters (dict[str, float]): Shared counters, keyed by metric name.
+        __timings (dict[str, list[float]]): Shared observations as [count, total], keyed by metric name.
+        __lock (threading.Lock): Lock guarding the shared registry.
+    """
+
+    __counters = {}
+    __timings = {}
+    __lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Increments a counter by the given amount.
+
+        Args:
+            name (str): Name of the counter.
+            amount (float, optional): Value to add. Defaults to 1.
+        """
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Records an observation, e.g. a duration in seconds.
+
+        Args:
+            name (str): Name of the timing.
+            value (float): Observed value.
+        """
+        with self.__lock:
+            count, total = self.__timings.get(name, [0, 0.0])
+            self.__timings[name] = [count + 1, total + value]
+
+    def get(self, name: str) -> float:
+        """Returns the current value of a counter.
+
+        Args:
+            name (str): Name of the counter.
+
+        Returns:
+            float: The counter value, 0 if it was never incremented.
+        """
+        with self.__lock:
+            return self.__counters.get(name, 0)
+
+    def average(self, name: str) -> Optional[float]:
+        """Returns the average of all observations of a timing.
+
+        Args:
+            name (str): Name of the timing.
+
+        Returns:
+            Optional[float]: The average value, or None if nothing was observed yet.
+        """
+        with self.__lock:
+            count, total = self.__timings.get(name, [0, 0.0])
+        if count == 0:
+            return None
+        return total / count
+
+    def ratio(self, hits: str, total: str) -> float:
+        """Returns the ratio between two counters, e.g. a cache hit rate.
+
+        Args:
+            hits (str): Name of the numerator counter.
+            total (str): Name of the denominator counter.
+
+        Returns:
+            float: The ratio between 0 and 1, 0 if the denominator is 0.
+        """
+        denominator = self.get(total)
+        if denominator == 0:
+            return 0.0
+        return self.get(hits) / denominator
+
+    def snapshot(self) -> dict:
+        """Returns a copy of all counters and timing averages.
+
+        Returns:
+            dict: Mapping of metric names to their current values.
+        """
+        with self.__lock:
+            result = dict(self.__counters)
+            for name, (count, total) in self.__timings.items():
+                result[f"{name}_count"] = count
+                result[f"{name}_avg"] = total / count if count else 0.0
+        return result
+
+    def reset(self) -> None:
+        """Clears all recorded metrics."""
+        with self.__lock:
+            self.__counters.clear()
+            self.__timings.clear()
@@ -0,0 +1,138 @@
+import base64
+import json
+import os
+from collections import deque
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class Outbox:
+    """Bounded FIFO buffer for messages that couldn't be sent yet.
+
+    If a file is given, buffered messages are appended to it as JSON lines, so they
+    survive a restart. Removing sent messages only happens in memory until `flush`
+    rewrites the file, a crash in between sends them again, which receivers detect by
+    their message id. When the outbox is full, the oldest message is dropped.
+
+    Attributes:
+        __max_messages (int): Maximum number of buffered messages.
+        __file (Optional[str]): Path of the JSON lines file, None to keep them in memory only.
+        __messages (deque[str | bytes]): The buffered text and binary messages, oldest first.
+    """
+
+    def __init__(self, max_messages: int, file: Optional[str] = None) -> None:
+        """Initializes the Outbox and loads the persisted messages if a file is given.
+
+        Args:
+            max_messages (int): Maximum number of buffered messages.
+            file (Optional[str]): Path of the JSON lines file to persist the messages to.
+        """
+        self.__max_messages = max_messages
+        self.__file = file
+        self.__messages = deque()
+        self.__load()
+
+    def put(self, message: str | bytes) -> None:
+        """Appends a message, dropping the oldest one if the outbox is full.
+
+        Args:
+            message (str | bytes): The text or binary message.
+        """
+        self.__messages.append(message)
+        metrics.increment("ws_outbox_buffered")
+        if len(self.__messages) > self.__max_messages:
+            self.__messages.popleft()
+            metrics.increment("ws_outbox_dropped")
+            log.warning("Outbox is full, dropped the oldest message")
+            self.flush()
+            return
+        self.__append(message)
+
+    def peek(self) -> Optional[str | bytes]:
+        """Returns the oldest message without removing it.
+
+        Returns:
+            Optional[str | bytes]: The oldest message, None if the outbox is empty.
+        """
+        return self.__messages[0] if self.__messages else None
+
+    def pop(self) -> None:
+        """Removes the oldest message, call `flush` to persist the removal."""
+        self.__messages.popleft()
+
+    def flush(self) -> None:
+        """Writes all buffered messages to the file, replacing it atomically."""
+        if self.__file is None:
+            return
+        tmp_file = f"{self.__file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__file)), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.writelines(self.__encode(message) for message in self.__messages)
+            os.replace(tmp_file, self.__file)
+        except OSError as e:
+            log.warning(f"Could not persist outbox to {self.__file}: {e}")
+
+    def __len__(self) -> int:
+        """Returns the number of buffered messages."""
+        return len(self.__messages)
+
+    def __append(self, message: str | bytes) -> None:
+        """Appends a message to the file.
+
+        Args:
+            message (str | bytes): The text or binary message.
+        """
+        if self.__file is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__file)), exist_ok=True)
+            with open(self.__file, "a", encoding="utf-8") as f:
+                f.write(self.__encode(message))
+        except OSError as e:
+            log.warning(f"Could not persist outbox to {self.__file}: {e}")
+
+    def __load(self) -> None:
+        """Loads the persisted messages, skipping a partially written last line."""
+        if self.__file is None or not os.path.exists(self.__file):
+            return
+        try:
+            with open(self.__file, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError as e:
+            log.warning(f"Could not load outbox from {self.__file}: {e}")
+            return
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "binary" in entry:
+                self.__messages.append(base64.b64decode(entry["binary"]))
+            else:
+                self.__messages.append(entry["text"])
+        while len(self.__messages) > self.__max_messages:
+            self.__messages.popleft()
+        log.info(f"Loaded {len(self.__messages)} buffered messages")
+
+    @staticmethod
+    def __encode(message: str | bytes) -> str:
+        """Encodes a message as JSON line.
+
+        Args:
+            message (str | bytes): The text or binary message.
+
+        Returns:
+            str: The JSON line including the line break.
+        """
+        if isinstance(message, bytes):
+            entry = {"binary": base64.b64encode(message).decode("ascii")}
+        else:
+            entry = {"text": message}
+        return json.dumps(entry) + "\n"
@@ -0,0 +1,93 @@
+import json
+from typing import Any
+
+
+class PartialJsonParser:
+    """Incremental parser returning the fields of a JSON object as soon as they are complete.
+
+    The LLM output is fed in chunks while it is generated. Whenever a top-level member
+    of the object is finished (by a following comma or the closing brace), it is parsed
+    and returned. Text before the opening brace, like a Markdown code fence, is ignored.
+
+    Attributes:
+        __buffer (str): All text fed so far.
+        __position (int): Index in the buffer up to which the text was scanned.
+        __depth (int): Current nesting depth of objects and arrays.
+        __in_string (bool): Whether the scanner is inside a string literal.
+        __escaped (bool): Whether the previous character was a backslash inside a string.
+        __member_start (Optional[int]): Buffer index where the current top-level member starts.
+        __finished (bool): Whether the top-level object was closed.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty PartialJsonParser."""
+        self.__buffer = ""
+        self.__position = 0
+        self.__depth = 0
+        self.__in_string = False
+        self.__escaped = False
+        self.__member_start = None
+        self.__finished = False
+
+    def feed(self, text: str) -> dict[str, Any]:
+        """Feeds the next chunk of generated text.
+
+        Args:
+            text (str): The newly generated text.
+
+        Returns:
+            dict[str, Any]: The top-level fields completed by this chunk, may be empty.
+        """
+        self.__buffer += text
+        completed = {}
+        while self.__position < len(self.__buffer) and not self.__finished:
+            char = self.__buffer[self.__position]
+            if self.__in_string:
+                if self.__escaped:
+                    self.__escaped = False
+                elif char == "\\":
+                    self.__escaped = True
+                elif char == '"':
+                    self.__in_string = False
+            elif char == '"' and self.__depth > 0:
+                self.__in_string = True
+            elif char in "{[":
+                self.__depth += 1
+                if self.__depth == 1:
+                    self.__member_start = self.__position + 1
+            elif char in "}]" and self.__depth > 0:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    completed.update(self.__parse_member(self.__position))
+                    self.__finished = True
+            elif char == "," and self.__depth == 1:
+                completed.update(self.__parse_member(self.__position))
+                self.__member_start = self.__position + 1
+            self.__position += 1
+        return completed
+
+    def is_finished(self) -> bool:
+        """Returns whether the closing brace of the top-level object was fed.
+
+        Returns:
+            bool: True if the top-level object is complete.
+        """
+        return self.__finished
+
+    def __parse_member(self, end: int) -> dict[str, Any]:
+        """Parses the top-level member that ends at the given position.
+
+        Args:
+            end (int): Buffer index of the comma or brace ending the member.
+
+        Returns:
+            dict[str, Any]: The parsed member, empty if it isn't valid JSON.
+        """
+        member = self.__buffer[self.__member_start : end].strip()
+        if not member:
+            return {}
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
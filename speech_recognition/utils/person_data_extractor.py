@@ -0,0 +1,441 @@
+import datetime
+import re
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+# Fields of a PERSON_DATA result, in the order they are returned
+PERSON_DATA_FIELDS = (
+    "firstname",
+    "lastname",
+    "sex",
+    "date_of_birth",
+    "phone_number",
+    "email_address",
+)
+
+
+class PersonDataExtractor:
+    """Rule-based pre-extractor for the structured fields of a PERSON_DATA request.
+
+    Fills the fields that follow a fixed format (email address, phone number,
+    date of birth, sex and explicitly introduced names) from a German transcript.
+    Spoken numbers ("neunzehnhundertfünfundneunzig"), spoken email separators
+    ("at", "punkt") and month names are normalized first.
+    Fields that can't be found reliably are left as None for the LLM to fill.
+
+    Attributes:
+        __UNITS (dict[str, int]): German number words from 0 to 9.
+        __TEENS (dict[str, int]): German number words from 10 to 19.
+        __TENS (dict[str, int]): German number words for the multiples of ten.
+        __ORDINAL_STEMS (dict[str, int]): Irregular ordinal stems, e.g. "dritt".
+        __ORDINAL_SUFFIXES (tuple[str, ...]): Suffixes turning a number into an ordinal.
+        __MONTHS (dict[str, int]): German month names.
+        __EMAIL_WORDS (dict[str, str]): Spoken email separators and their replacement.
+        __EMAIL_INTRODUCTIONS (frozenset[str]): Words that may directly precede an email address.
+        __NAME (str): Pattern for a capitalized, optionally hyphenated name.
+        __TITLE (str): Pattern for the titles and forms of address before a name.
+    """
+
+    __UNITS = {
+        "null": 0,
+        "ein": 1,
+        "eins": 1,
+        "eine": 1,
+        "zwei": 2,
+        "zwo": 2,
+        "drei": 3,
+        "vier": 4,
+        "fünf": 5,
+        "sechs": 6,
+        "sieben": 7,
+        "acht": 8,
+        "neun": 9,
+    }
+
+    __TEENS = {
+        "zehn": 10,
+        "elf": 11,
+        "zwölf": 12,
+        "dreizehn": 13,
+        "vierzehn": 14,
+        "fünfzehn": 15,
+        "sechzehn": 16,
+        "siebzehn": 17,
+        "achtzehn": 18,
+        "neunzehn": 19,
+    }
+
+    __TENS = {
+        "zwanzig": 20,
+        "dreißig": 30,
+        "dreissig": 30,
+        "vierzig": 40,
+        "fünfzig": 50,
+        "sechzig": 60,
+        "siebzig": 70,
+        "achtzig": 80,
+        "neunzig": 90,
+    }
+
+    __ORDINAL_STEMS = {
+        "er": 1,
+        "ers": 1,
+        "erst": 1,
+        "drit": 3,
+        "dritt": 3,
+        "sieb": 7,
+        "siebt": 7,
+        "ach": 8,
+    }
+
+    __ORDINAL_SUFFIXES = ("sten", "ster", "stem", "ste", "ten", "ter", "tem", "te")
+
+    __MONTHS = {
+        "januar": 1,
+        "jänner": 1,
+        "februar": 2,
+        "märz": 3,
+        "maerz": 3,
+        "april": 4,
+        "mai": 5,
+        "juni": 6,
+        "juli": 7,
+        "august": 8,
+        "september": 9,
+        "oktober": 10,
+        "november": 11,
+        "dezember": 12,
+    }
+
+    __EMAIL_WORDS = {
+        "at": "@",
+        "ät": "@",
+        "punkt": ".",
+        "dot": ".",
+        "minus": "-",
+        "bindestrich": "-",
+        "unterstrich": "_",
+    }
+
+    __EMAIL_INTRODUCTIONS = frozenset(
+        {
+            "ist",
+            "lautet",
+            "email",
+            "e-mail",
+            "mail",
+            "adresse",
+            "e-mail-adresse",
+            "emailadresse",
+            "mailadresse",
+            "unter",
+            "an",
+        }
+    )
+
+    __NAME = r"([A-ZÄÖÜ][a-zäöüß]+(?:-[A-ZÄÖÜ][a-zäöüß]+)?)"
+
+    # The lookahead keeps a title from being taken as name when nothing follows it
+    __TITLE = (
+        r"(?:(?:Doktor|Dr\.|Professor|Prof\.|Herr|Frau) )*"
+        r"(?!(?:Doktor|Dr|Professor|Prof|Herr|Frau)\b)"
+    )
+
+    def extract(self, text: str) -> dict:
+        """Extracts all fields of a PERSON_DATA result the rules can fill.
+
+        Args:
+            text (str): The transcribed user speech.
+
+        Returns:
+            dict: All PERSON_DATA fields, with None for the ones that couldn't be extracted.
+        """
+        numeric_text = self.__replace_number_words(text)
+        date_of_birth, date_span = self.__extract_date(numeric_text)
+        if date_span is not None:
+            # Don't mistake the digits of the date for a phone number
+            start, end = date_span
+            phone_text = numeric_text[:start] + " , " + numeric_text[end:]
+        else:
+            phone_text = numeric_text
+
+        firstname, lastname = self.__extract_names(text)
+        result = {
+            "firstname": firstname,
+            "lastname": lastname,
+            "sex": self.__extract_sex(text),
+            "date_of_birth": date_of_birth,
+            "phone_number": self.__extract_phone_number(phone_text),
+            "email_address": self.__extract_email(text),
+        }
+
+        found = sum(value is not None for value in result.values())
+        metrics.increment("person_data_extractor_requests")
+        metrics.increment("person_data_extractor_fields", found)
+        log.debug(f"Rule-based extractor filled {found} fields: {result}")
+        return result
+
+    def parse_number(self, word: str) -> Optional[int]:
+        """Parses a German number word, including compounds and ordinals.
+
+        Examples are "fünf", "einundzwanzig", "neunzehnhundertfünfundneunzig" or "fünfzehnter".
+
+        Args:
+            word (str): The word to parse.
+
+        Returns:
+            Optional[int]: The value of the number, or None if the word isn't a number.
+        """
+        word = word.lower()
+        value = self.__parse_cardinal(word)
+        if value is not None:
+            return value
+        if word.endswith("e") or word.endswith("n") or word.endswith("r"):
+            for suffix in self.__ORDINAL_SUFFIXES:
+                if word.endswith(suffix) and len(word) > len(suffix):
+                    stem = word[: -len(suffix)]
+                    if stem in self.__ORDINAL_STEMS:
+                        return self.__ORDINAL_STEMS[stem]
+                    value = self.__parse_cardinal(stem)
+                    if value is not None:
+                        return value
+        return None
+
+    def __parse_cardinal(self, word: str) -> Optional[int]:
+        """Parses a German cardinal number word.
+
+        Args:
+            word (str): The lowercase word to parse.
+
+        Returns:
+            Optional[int]: The value of the number, or None if the word isn't a number.
+        """
+        if not word:
+            return None
+        for multiplier_word, multiplier in (("tausend", 1000), ("hundert", 100)):
+            if multiplier_word in word:
+                left, right = word.split(multiplier_word, 1)
+                left_value = self.__parse_cardinal(left) if left else 1
+                right_value = self.__parse_cardinal(right) if right else 0
+                if left_value is None or right_value is None:
+                    return None
+                return left_value * multiplier + right_value
+
+        for numbers in (self.__UNITS, self.__TEENS, self.__TENS):
+            if word in numbers:
+                return numbers[word]
+
+        # e.g. "fünfundneunzig"
+        if "und" in word:
+            unit, tens = word.split("und", 1)
+            if unit in self.__UNITS and tens in self.__TENS:
+                return self.__UNITS[unit] + self.__TENS[tens]
+        return None
+
+    def __replace_number_words(self, text: str) -> str:
+        """Replaces spoken numbers with digits, keeping the rest of the text.
+
+        Ordinals keep a trailing dot, so "fünfzehnter Mai" becomes "15. Mai".
+
+        Args:
+            text (str): The text to normalize.
+
+        Returns:
+            str: The text with digits instead of number words.
+        """
+
+        def replace(match: re.Match) -> str:
+            word = match.group(0)
+            lower = word.lower()
+            if lower == "plus":
+                return "+"
+            value = self.parse_number(lower)
+            if value is None:
+                return word
+            if self.__parse_cardinal(lower) is None:
+                return f"{value}."
+            return str(value)
+
+        return re.sub(r"[A-Za-zÄÖÜäöüß]+", replace, text)
+
+    def __extract_date(self, text: str) -> tuple[Optional[str], Optional[tuple]]:
+        """Finds the first valid date in a text with digits.
+
+        Supports "15.05.1995", "15. Mai 1995", "15 Mai 1995" and "1995-05-15".
+
+        Args:
+            text (str): The text with numbers already converted to digits.
+
+        Returns:
+            tuple: The date as "YYYY-MM-DD" and its span in the text, or (None, None).
+        """
+        months = "|".join(self.__MONTHS)
+        patterns = (
+            (r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b", (3, 2, 1)),
+            (r"\b(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})\b", (1, 2, 3)),
+            (rf"\b(\d{{1,2}})\.?\s+({months})\s+(\d{{4}})\b", (1, 2, 3)),
+        )
+        for pattern, (day_group, month_group, year_group) in patterns:
+            for match in re.finditer(pattern, text, re.IGNORECASE):
+                month = match.group(month_group).lower()
+                month = self.__MONTHS.get(month) or int(month)
+                try:
+                    date = datetime.date(
+                        int(match.group(year_group)),
+                        month,
+                        int(match.group(day_group)),
+                    )
+                except ValueError:
+                    continue
+                if date > datetime.date.today():
+                    continue
+                return date.isoformat(), match.span()
+        return None, None
+
+    @staticmethod
+    def __extract_phone_number(text: str) -> Optional[str]:
+        """Finds a phone number, i.e. a run of 6 to 15 digits in separated groups.
+
+        If the phone number is introduced ("Telefonnummer", "Handy"), only the text after
+        the introduction is searched. Otherwise, the number has to start with 0 or +
+        so that street numbers and postal codes are not mistaken for it. Single digits,
+        as they are produced for digit by digit dictation, are merged into one group.
+
+        Args:
+            text (str): The text with numbers already converted to digits and without the date.
+
+        Returns:
+            Optional[str]: The phone number, or None if none was found.
+        """
+        text = re.sub(r"\+\s+(?=\d)", "+", text)
+        # Whole words only, "Hausnummer" doesn't introduce a phone number
+        keyword = re.search(
+            r"\b(?:telefon|handy|mobil|rufnummer|nummer|erreichbar)", text, re.I
+        )
+        if keyword is not None:
+            text = text[keyword.end() :]
+
+        for match in re.finditer(r"\+?\d+(?:[ /-]+\d+)*", text):
+            if keyword is None and match.group(0)[0] not in "0+":
+                continue
+            groups = re.split(r"[ /-]+", match.group(0))
+            digits = sum(len(group.lstrip("+")) for group in groups)
+            if not 6 <= digits <= 15:
+                continue
+
+            merged = []
+            dictated = False
+            for group in groups:
+                if dictated and len(group) == 1:
+                    merged[-1] += group
+                else:
+                    merged.append(group)
+                    dictated = len(group.lstrip("+")) <= 1
+            return " ".join(merged)
+        return None
+
+    def __extract_email(self, text: str) -> Optional[str]:
+        """Finds an email address, replacing spoken separators like "at" and "punkt".
+
+        The address has to directly follow an introduction like "E-Mail ist", otherwise
+        a spoken local part with spaces ("max mustermann at ...") could be cut off.
+
+        Args:
+            text (str): The transcribed user speech.
+
+        Returns:
+            Optional[str]: The lowercase email address, or None if none was found.
+        """
+        tokens = []
+        glue = False
+        for word in re.sub(r"\(at\)", " @ ", text, flags=re.I).split():
+            separator = self.__EMAIL_WORDS.get(word.lower())
+            if separator is None and word == "@":
+                separator = word
+            if separator is not None and tokens:
+                tokens[-1] += separator
+                glue = True
+            elif glue and tokens:
+                tokens[-1] += word
+                glue = False
+            else:
+                tokens.append(word)
+
+        for i, token in enumerate(tokens):
+            match = re.match(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-z]{2,}", token, re.I)
+            if match is None:
+                continue
+            previous = tokens[i - 1].lower().strip(":,") if i > 0 else ""
+            if previous not in self.__EMAIL_INTRODUCTIONS:
+                log.debug(f"Ignoring email address without introduction: {token}")
+                return None
+            return match.group(0).strip(".").lower()
+        return None
+
+    @staticmethod
+    def __extract_sex(text: str) -> Optional[str]:
+        """Finds an explicitly stated sex.
+
+        Args:
+            text (str): The transcribed user speech.
+
+        Returns:
+            Optional[str]: "M", "W" or "D", or None if none or more than one was stated.
+        """
+        lower = text.lower()
+        found = set()
+        if re.search(r"\bmännlich\b|\bich bin ein mann\b", lower):
+            found.add("M")
+        if re.search(r"\bweiblich\b|\bich bin eine frau\b", lower):
+            found.add("W")
+        if re.search(r"\bdivers\b", lower):
+            found.add("D")
+        if len(found) == 1:
+            return found.pop()
+        return None
+
+    def __extract_names(self, text: str) -> tuple[Optional[str], Optional[str]]:
+        """Finds explicitly introduced names.
+
+        Supports "mein Vorname ist X", "mein Nachname ist Y" and "mein Name ist X Y" or
+        "ich heiße X Y" when both names are given. A single name after "mein Name ist"
+        is ambiguous and left to the LLM. Titles like "Doktor" before the names are
+        skipped.
+
+        Args:
+            text (str): The transcribed user speech.
+
+        Returns:
+            tuple[Optional[str], Optional[str]]: The first name and the last name.
+        """
+        firstname = None
+        lastname = None
+
+        # Only the introductions are case-insensitive, names have to be capitalized
+        match = re.search(
+            rf"\b(?i:vorname,? (?:ist|lautet)) {self.__TITLE}{self.__NAME}", text
+        )
+        if match:
+            firstname = match.group(1)
+        match = re.search(
+            rf"\b(?i:(?:nachname|familienname),? (?:ist|lautet)) "
+            rf"{self.__TITLE}{self.__NAME}",
+            text,
+        )
+        if match:
+            lastname = match.group(1)
+
+        match = re.search(
+            rf"\b(?i:mein name ist|ich heiße|ich heisse) "
+            rf"{self.__TITLE}{self.__NAME} {self.__NAME}\b",
+            text,
+        )
+        if match:
+            firstname = firstname or match.group(1)
+            lastname = lastname or match.group(2)
+        return firstname, lastname
@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class ProcessedFileIndex:
+    """Index of the input files that were already processed, persisted across restarts.
+
+    Files are identified by their name, size and modification time, so a file replaced
+    under the same name is processed again. Before a file is queued it is claimed,
+    which makes sure the file observer and the backlog scan don't both queue it.
+
+    Files that failed with an error that may go away are released and retried after a
+    restart, up to `max_attempts` times, then they are recorded as processed.
+
+    The index is a JSON lines file, processed and failed files are appended to it.
+    `compact` rewrites it with only the files that still exist.
+
+    Attributes:
+        __file (Optional[str]): Path of the JSON lines file, None to keep it in memory only.
+        __max_attempts (Optional[int]): Attempts after which a failing file is given
+            up, None to retry it on every restart.
+        __processed (dict[str, tuple[int, int]]): Size and modification time of the
+            processed files, by file name.
+        __failures (dict[str, tuple[tuple[int, int], int]]): Size and modification time
+            of the failed files with their number of failed attempts, by file name.
+        __claimed (set[str]): Names of the files that are queued or being processed.
+        __lock (threading.Lock): Lock guarding the index, files are claimed by the
+            file observer thread and the event loop.
+    """
+
+    def __init__(
+        self, file: Optional[str] = None, max_attempts: Optional[int] = None
+    ) -> None:
+        """Initializes the ProcessedFileIndex and loads the persisted index if a file is given.
+
+        Args:
+            file (Optional[str]): Path of the JSON lines file to persist the index to.
+            max_attempts (Optional[int]): Attempts after which a failing file is given
+                up, None to retry it on every restart.
+        """
+        self.__file = file
+        self.__max_attempts = max_attempts
+        self.__processed = {}
+        self.__failures = {}
+        self.__claimed = set()
+        self.__lock = threading.Lock()
+        self.__load()
+
+    def is_processed(self, path: str) -> bool:
+        """Returns whether a file was already processed.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            bool: True if the file was processed and didn't change since.
+        """
+        signature = self.__signature(path)
+        with self.__lock:
+            return self.__processed.get(os.path.basename(path)) == signature
+
+    def claim(self, path: str) -> bool:
+        """Claims a file for processing, unless it was processed or claimed already.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            bool: True if the file was claimed and should be queued.
+        """
+        signature = self.__signature(path)
+        name = os.path.basename(path)
+        with self.__lock:
+            if name in self.__claimed or self.__processed.get(name) == signature:
+                return False
+            self.__claimed.add(name)
+            return True
+
+    def mark_processed(self, path: str) -> None:
+        """Records a file as processed and releases its claim.
+
+        Args:
+            path (str): Path of the file.
+        """
+        name = os.path.basename(path)
+        signature = self.__signature(path)
+        with self.__lock:
+            self.__claimed.discard(name)
+            if signature is None:
+                return
+            self.__failures.pop(name, None)
+            self.__processed[name] = signature
+            self.__append(name, signature)
+
+    def release(self, path: str) -> None:
+        """Releases the claim of a file that failed, without recording it as processed.
+
+        The file is processed again when it is found after a restart, unless it failed
+        `max_attempts` times, then it is recorded as processed.
+
+        Args:
+            path (str): Path of the file.
+        """
+        name = os.path.basename(path)
+        signature = self.__signature(path)
+        with self.__lock:
+            self.__claimed.discard(name)
+            if signature is None:
+                return
+            previous = self.__failures.get(name)
+            failures = 1
+            if previous is not None and previous[0] == signature:
+                failures = previous[1] + 1
+            if self.__max_attempts is not None and failures >= self.__max_attempts:
+                log.warning(f"Giving up {name} after {failures} failed attempts")
+                self.__failures.pop(name, None)
+                self.__processed[name] = signature
+                self.__append(name, signature)
+                return
+            self.__failures[name] = (signature, failures)
+            self.__append(name, signature, failures)
+
+    def compact(self, directory: str) -> None:
+        """Drops the files that no longer exist in a directory and rewrites the index file.
+
+        Args:
+            directory (str): The directory of the indexed files.
+        """
+        with self.__lock:
+            self.__processed = {
+                name: signature
+                for name, signature in self.__processed.items()
+                if os.path.exists(os.path.join(directory, name))
+            }
+            self.__failures = {
+                name: failure
+                for name, failure in self.__failures.items()
+                if os.path.exists(os.path.join(directory, name))
+            }
+            if self.__file is None:
+                return
+            tmp_file = f"{self.__file}.tmp"
+            try:
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    f.writelines(
+                        self.__encode(name, signature)
+                        for name, signature in self.__processed.items()
+                    )
+                    f.writelines(
+                        self.__encode(name, signature, failures)
+                        for name, (signature, failures) in self.__failures.items()
+                    )
+                os.replace(tmp_file, self.__file)
+            except OSError as e:
+                log.warning(f"Could not persist processed files to {self.__file}: {e}")
+
+    def __len__(self) -> int:
+        """Returns the number of processed files."""
+        return len(self.__processed)
+
+    @staticmethod
+    def __signature(path: str) -> Optional[tuple[int, int]]:
+        """Returns the size and modification time of a file.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            Optional[tuple[int, int]]: Size and modification time in nanoseconds,
+                None if the file doesn't exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def __append(
+        self, name: str, signature: tuple[int, int], failures: int = 0
+    ) -> None:
+        """Appends a processed or failed file to the index file, the lock has to be held.
+
+        Args:
+            name (str): Name of the file.
+            signature (tuple[int, int]): Size and modification time of the file.
+            failures (int, optional): Number of failed attempts, 0 if it was processed.
+                Defaults to 0.
+        """
+        if self.__file is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__file)), exist_ok=True)
+            with open(self.__file, "a", encoding="utf-8") as f:
+                f.write(self.__encode(name, signature, failures))
+        except OSError as e:
+            log.warning(f"Could not persist processed file to {self.__file}: {e}")
+
+    def __load(self) -> None:
+        """Loads the persisted index."""
+        if self.__file is None or not os.path.exists(self.__file):
+            return
+        try:
+            with open(self.__file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        name = entry["name"]
+                        signature = (entry["size"], entry["mtime_ns"])
+                        failures = int(entry.get("failures", 0))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        # Partially written line of a crash
+                        continue
+                    # Later lines are more recent
+                    if failures:
+                        self.__processed.pop(name, None)
+                        self.__failures[name] = (signature, failures)
+                    else:
+                        self.__failures.pop(name, None)
+                        self.__processed[name] = signature
+        except OSError as e:
+            log.warning(f"Could not load processed files from {self.__file}: {e}")
+            return
+        log.info(f"Loaded {len(self.__processed)} processed files")
+
+    @staticmethod
+    def __encode(name: str, signature: tuple[int, int], failures: int = 0) -> str:
+        """Encodes a processed or failed file as JSON line.
+
+        Args:
+            name (str): Name of the file.
+            signature (tuple[int, int]): Size and modification time of the file.
+            failures (int, optional): Number of failed attempts, 0 if it was processed.
+                Defaults to 0.
+
+        Returns:
+            str: The JSON line.
+        """
+        size, mtime_ns = signature
+        entry = {"name": name, "size": size, "mtime_ns": mtime_ns}
+        if failures:
+            entry["failures"] = failures
+        return json.dumps(entry) + "\n"
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class ResponseCache:
+    """Bounded LRU cache with a time to live for LLM extraction results.
+
+    Entries are keyed by request type, normalized transcript, model name and a prompt
+    version, so results are not reused after the model or the prompts change.
+
+    The cache can optionally be persisted to a JSON lines file to survive restarts.
+    Stored results are appended to it, the file is rewritten with only the current
+    entries once it holds twice as many lines as the cache entries.
+
+    Attributes:
+        __max_entries (int): Maximum number of entries, the least recently used is evicted.
+        __ttl_seconds (float): Time in seconds after which an entry expires.
+        __file (Optional[str]): Path of the JSON lines file to persist the cache to,
+            None to disable.
+        __file_lines (int): Number of lines in the cache file.
+        __entries (OrderedDict[str, tuple[float, dict]]): Cached results with their creation time.
+        __lock (threading.Lock): Lock guarding the entries, the cache is used from worker threads.
+    """
+
+    def __init__(
+        self, max_entries: int, ttl_seconds: float, file: Optional[str] = None
+    ) -> None:
+        """Initializes the ResponseCache and loads the persisted entries if a file is given.
+
+        Args:
+            max_entries (int): Maximum number of entries.
+            ttl_seconds (float): Time in seconds after which an entry expires.
+            file (Optional[str]): Path of the JSON lines file to persist the cache to.
+        """
+        self.__max_entries = max_entries
+        self.__ttl_seconds = ttl_seconds
+        self.__file = file
+        self.__file_lines = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__load()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Folds case, whitespace and punctuation around words of a transcript.
+
+        Punctuation inside of words is kept, so "max.mustermann@gmail.com" and
+        "maxmustermann@gmail.com" don't end up with the same key.
+
+        Args:
+            text (str): The transcript to normalize.
+
+        Returns:
+            str: The normalized transcript, e.g. "ja bitte" for " Ja, bitte."
+        """
+        words = (re.sub(r"^\W+|\W+$", "", word) for word in text.lower().split())
+        return " ".join(word for word in words if word)
+
+    @staticmethod
+    def make_key(
+        req_type: str, transcript: str, model_name: str, prompt_version: str
+    ) -> str:
+        """Builds the cache key for an extraction request.
+
+        Args:
+            req_type (str): Name of the request type.
+            transcript (str): The transcript, it is normalized before hashing.
+            model_name (str): Name of the model generating the result.
+            prompt_version (str): Hash of the prompts used for the request.
+
+        Returns:
+            str: The cache key.
+        """
+        parts = [
+            req_type,
+            ResponseCache.normalize(transcript),
+            model_name,
+            prompt_version,
+        ]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns a cached result and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[dict]: A copy of the cached result, or None on a miss or if it expired.
+        """
+        metrics.increment("llm_cache_requests")
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if time.time() - created > self.__ttl_seconds:
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+
+        metrics.increment("llm_cache_hits")
+        return dict(value)
+
+    def put(self, key: str, value: dict) -> None:
+        """Stores a result, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            value (dict): The result to cache.
+        """
+        with self.__lock:
+            created = time.time()
+            self.__entries[key] = (created, dict(value))
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+            if self.__file_lines >= 2 * self.__max_entries:
+                self.__save()
+            else:
+                self.__append(key, created, value)
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries, including expired ones not yet evicted."""
+        return len(self.__entries)
+
+    def __load(self) -> None:
+        """Loads the persisted entries that haven't expired yet."""
+        if self.__file is None or not os.path.exists(self.__file):
+            return
+        now = time.time()
+        try:
+            with open(self.__file, encoding="utf-8") as f:
+                for line in f:
+                    self.__file_lines += 1
+                    try:
+                        entry = json.loads(line)
+                        key, created = entry["key"], float(entry["created"])
+                        value = dict(entry["value"])
+                    except (ValueError, KeyError, TypeError):
+                        # Partially written line of a crash
+                        continue
+                    if now - created <= self.__ttl_seconds:
+                        # Later lines are more recent
+                        self.__entries[key] = (created, value)
+                        self.__entries.move_to_end(key)
+        except OSError as e:
+            log.warning(f"Could not load LLM response cache from {self.__file}: {e}")
+            return
+
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+        log.info(f"Loaded {len(self.__entries)} cached LLM responses")
+
+    def __append(self, key: str, created: float, value: dict) -> None:
+        """Appends an entry to the cache file, the lock has to be held.
+
+        Args:
+            key (str): The cache key.
+            created (float): Creation time of the entry.
+            value (dict): The cached result.
+        """
+        if self.__file is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__file)), exist_ok=True)
+            with open(self.__file, "a", encoding="utf-8") as f:
+                f.write(self.__encode(key, created, value))
+            self.__file_lines += 1
+        except OSError as e:
+            log.warning(f"Could not persist LLM response cache to {self.__file}: {e}")
+
+    def __save(self) -> None:
+        """Rewrites the cache file with the current entries, replacing it atomically.
+
+        The lock has to be held.
+        """
+        if self.__file is None:
+            return
+        tmp_file = f"{self.__file}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.__file)), exist_ok=True)
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.writelines(
+                    self.__encode(key, created, value)
+                    for key, (created, value) in self.__entries.items()
+                )
+            os.replace(tmp_file, self.__file)
+            self.__file_lines = len(self.__entries)
+        except OSError as e:
+            log.warning(f"Could not persist LLM response cache to {self.__file}: {e}")
+
+    @staticmethod
+    def __encode(key: str, created: float, value: dict) -> str:
+        """Encodes a cache entry as JSON line.
+
+        Args:
+            key (str): The cache key.
+            created (float): Creation time of the entry.
+            value (dict): The cached result.
+
+        Returns:
+            str: The JSON line.
+        """
+        return json.dumps({"key": key, "created": created, "value": value}) + "\n"
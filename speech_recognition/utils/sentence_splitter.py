@@ -0,0 +1,82 @@
+import re
+
+
+class SentenceSplitter:
+    """Splits German text into sentences for synthesizing them one by one.
+
+    A sentence ends with ".", "!", "?" or "…", optionally followed by closing quotes
+    or brackets, if whitespace and an uppercase letter, digit or opening quote follow.
+    Periods after numbers ("am 3. Mai"), single letters ("Max M. Mustermann") and
+    common abbreviations ("Dr.", "z. B.", "Nr.", "Hauptstr.") don't end a sentence.
+
+    Attributes:
+        __BOUNDARY (re.Pattern): Candidate sentence ends, the end of the match is the
+            start of the next sentence.
+        __ABBREVIATIONS (frozenset[str]): Lowercase abbreviations without the period.
+    """
+
+    __BOUNDARY = re.compile(r"[.!?…]+[\"'»«“”)\]]*\s+(?=[\"'„»«(\[A-ZÄÖÜ0-9])")
+
+    __ABBREVIATIONS = frozenset(
+        {
+            "abs",
+            "bzw",
+            "ca",
+            "dr",
+            "etc",
+            "evtl",
+            "fr",
+            "ggf",
+            "hr",
+            "inkl",
+            "nr",
+            "prof",
+            "tel",
+            "usw",
+            "vgl",
+        }
+    )
+
+    @staticmethod
+    def split(text: str) -> list[str]:
+        """Splits a text into sentences.
+
+        Args:
+            text (str): The text to split.
+
+        Returns:
+            list[str]: The stripped, non-empty sentences in order.
+        """
+        sentences = []
+        start = 0
+        for match in SentenceSplitter.__BOUNDARY.finditer(text):
+            if match.group().startswith(".") and SentenceSplitter.__is_abbreviation(
+                text[start : match.start()]
+            ):
+                continue
+            sentences.append(text[start : match.end()].strip())
+            start = match.end()
+        sentences.append(text[start:].strip())
+        return [sentence for sentence in sentences if sentence]
+
+    @staticmethod
+    def __is_abbreviation(sentence: str) -> bool:
+        """Checks whether the last word of a sentence before a period is an abbreviation.
+
+        Args:
+            sentence (str): The text up to the period.
+
+        Returns:
+            bool: True if the period belongs to the last word.
+        """
+        words = sentence.split()
+        if not words:
+            return False
+        word = words[-1].split(".")[-1]
+        return (
+            word.isdigit()
+            or len(word) == 1
+            or word.lower() in SentenceSplitter.__ABBREVIATIONS
+            # Street names, e.g. "Hauptstr."
+            or word.lower().endswith("str")
+        )
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
+
+class TTSCache:
+    """Size-bounded, content-addressed cache of generated audio files on disk.
+
+    Files are named after the hash of the normalized text and the voice, so the same
+    prompt spoken with the same voice model is only synthesized once. The modification
+    time of a file is its last use, so the least recently used files are evicted first,
+    also across restarts. Files are handed out as hardlinks where possible, so callers
+    may delete their copy but must not modify it in place.
+
+    Attributes:
+        __directory (Path): Directory the cached files are stored in.
+        __max_bytes (int): Maximum total size of the cached files in bytes.
+        __entries (OrderedDict[str, int]): File sizes by key, least recently used first.
+        __size (int): Total size of the cached files in bytes.
+        __lock (threading.Lock): Lock guarding the entries, files are copied in worker threads.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """Initializes the TTSCache and indexes the files already in the directory.
+
+        Args:
+            directory (str): Directory the cached files are stored in.
+            max_bytes (int): Maximum total size of the cached files in bytes.
+        """
+        self.__directory = Path(directory).resolve()
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+        self.__load()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Folds unicode representation and whitespace of a text.
+
+        Case and punctuation are kept, because Piper reads them for the intonation.
+
+        Args:
+            text (str): The text to normalize.
+
+        Returns:
+            str: The normalized text, e.g. "Guten Tag." for " Guten  Tag. "
+        """
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @staticmethod
+    def voice_id(piper_dir: str, voice: str) -> str:
+        """Builds a hash identifying a voice model.
+
+        The hash covers the name, size and modification time of the model and its
+        config, so replacing the model file invalidates the cached audio.
+
+        Args:
+            piper_dir (str): Path to the Piper directory.
+            voice (str): Voice model passed to Piper, relative to the Piper directory.
+
+        Returns:
+            str: The voice hash.
+        """
+        parts = [voice]
+        model = Path(piper_dir) / voice
+        for file in (model, model.with_name(f"{model.name}.json")):
+            try:
+                stat = file.stat()
+                parts.append([stat.st_size, stat.st_mtime_ns])
+            except OSError:
+                parts.append(None)
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def make_key(text: str, voice_id: str) -> str:
+        """Builds the cache key for a text spoken with a voice.
+
+        Args:
+            text (str): The text, it is normalized before hashing.
+            voice_id (str): Hash identifying the voice model, see `voice_id`.
+
+        Returns:
+            str: The cache key.
+        """
+        parts = [TTSCache.normalize(text), voice_id]
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+    def contains(self, key: str) -> bool:
+        """Returns whether a file is cached for the key, without marking it as used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            bool: True if the file is cached.
+        """
+        with self.__lock:
+            return key in self.__entries
+
+    def get(self, key: str, output_file: str) -> bool:
+        """Links or copies the cached file to the output file and marks it as recently used.
+
+        Args:
+            key (str): The cache key.
+            output_file (str): Path the cached file is linked or copied to.
+
+        Returns:
+            bool: True on a hit, False on a miss or if the file couldn't be provided.
+        """
+        metrics.increment("tts_cache_requests")
+        with self.__lock:
+            if key not in self.__entries:
+                return False
+            self.__entries.move_to_end(key)
+            file = self.__file(key)
+            try:
+                os.utime(file)
+                self.__link_or_copy(file, output_file)
+            except OSError as e:
+                log.warning(f"Could not provide cached audio {file}: {e}")
+                self.__remove(key)
+                return False
+
+        metrics.increment("tts_cache_hits")
+        return True
+
+    def put(self, key: str, file: str) -> None:
+        """Stores a generated file, evicting the least recently used ones if the cache is full.
+
+        Args:
+            key (str): The cache key.
+            file (str): Path of the generated file, it is linked or copied into the cache.
+        """
+        target = self.__file(key)
+        tmp_file = self.__directory / f"{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.__link_or_copy(file, str(tmp_file))
+            size = tmp_file.stat().st_size
+            os.replace(tmp_file, target)
+        except OSError as e:
+            log.warning(f"Could not cache audio {file}: {e}")
+            tmp_file.unlink(missing_ok=True)
+            return
+
+        with self.__lock:
+            self.__size += size - self.__entries.get(key, 0)
+            self.__entries[key] = size
+            self.__entries.move_to_end(key)
+            while self.__size > self.__max_bytes and len(self.__entries) > 1:
+                self.__remove(next(iter(self.__entries)))
+                metrics.increment("tts_cache_evictions")
+
+    def size_bytes(self) -> int:
+        """Returns the total size of the cached files.
+
+        Returns:
+            int: The total size in bytes.
+        """
+        return self.__size
+
+    def __len__(self) -> int:
+        """Returns the number of cached files."""
+        return len(self.__entries)
+
+    def __file(self, key: str) -> Path:
+        """Returns the path of the cached file for a key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Path: Path of the cached file.
+        """
+        return self.__directory / f"{key}.wav"
+
+    def __remove(self, key: str) -> None:
+        """Removes a file from the cache, the lock has to be held.
+
+        Args:
+            key (str): The cache key.
+        """
+        self.__size -= self.__entries.pop(key)
+        self.__file(key).unlink(missing_ok=True)
+
+    def __load(self) -> None:
+        """Indexes the cached files ordered by last use and removes leftover temporary files."""
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        with os.scandir(self.__directory) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    Path(entry.path).unlink(missing_ok=True)
+                elif entry.name.endswith(".wav") and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self.__entries[key] = size
+            self.__size += size
+        log.info(
+            f"Loaded {len(self.__entries)} cached audio files "
+            f"with {self.__size / 2**20:.1f} MB"
+        )
+
+    @staticmethod
+    def __link_or_copy(source: str | Path, target: str | Path) -> None:
+        """Hardlinks a file, falling back to a copy, e.g. across file systems.
+
+        Args:
+            source (str | Path): The existing file.
+            target (str | Path): Path of the new file.
+        """
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from speech_recognition.utils.logger_helper import LoggerHelper
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class WorkCredits:
+    """Free capacity of this node per stage, for pulling jobs from a cluster dispatcher.
+
+    Every job received from the dispatcher takes a credit of its stage until its final
+    result is sent. The dispatcher only hands out as many jobs as the node has credits,
+    so the jobs of the cluster go to the nodes that are idle.
+
+    Attributes:
+        __capacity (dict[str, int]): Number of jobs accepted at once, by stage.
+        __jobs (dict[str, str]): Stage of the jobs in progress, by request id.
+    """
+
+    def __init__(self, capacity: dict[str, int]) -> None:
+        """Initializes the WorkCredits without jobs in progress.
+
+        Args:
+            capacity (dict[str, int]): Number of jobs accepted at once, by stage,
+                e.g. `{"stt": 2, "tts": 3}`.
+        """
+        self.__capacity = dict(capacity)
+        self.__jobs = {}
+
+    def acquire(self, stage: str, request_id: str) -> None:
+        """Takes a credit for a job received from the dispatcher.
+
+        Jobs beyond the capacity are still accepted, the dispatcher is expected
+        not to send them.
+
+        Args:
+            stage (str): Stage of the job, a key of the capacity.
+            request_id (str): Id of the job, its final result releases the credit.
+        """
+        if self.free().get(stage, 0) <= 0:
+            log.warning(f"Received {stage} job {request_id} without a free credit")
+        self.__jobs[request_id] = stage
+
+    def release(self, request_id: str) -> Optional[str]:
+        """Returns the credit of a finished job.
+
+        Args:
+            request_id (str): Id of the job.
+
+        Returns:
+            Optional[str]: Stage of the job, None if it wasn't received from the dispatcher.
+        """
+        return self.__jobs.pop(request_id, None)
+
+    def free(self) -> dict[str, int]:
+        """Returns the number of jobs the node can accept.
+
+        Returns:
+            dict[str, int]: Free credits by stage, never negative.
+        """
+        free = dict(self.__capacity)
+        for stage in self.__jobs.values():
+            free[stage] = free.get(stage, 0) - 1
+        return {stage: max(0, credits) for stage, credits in free.items()}
@@ -1,12 +1,30 @@
 import asyncio
 import os
+import time
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Optional
 
-from speech_recognition import LoggerHelper, ASRService, LLMService, WebSocketClient
+from speech_recognition import (
+    LoggerHelper,
+    ASRService,
+    LLMService,
+    WebSocketClient,
+    config,
+)
 from speech_recognition.exceptions.llm_processing_error import LLMProcessingError
 from speech_recognition.exceptions.transcription_error import TranscriptionError
+from speech_recognition.services.llm_prefill_session import PrefillSession
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.services.memory_manager import MemoryManager
+from speech_recognition.services.request_dispatcher import RequestDispatcher
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
 from speech_recognition.workers.abstract_worker import AbstractWorker
 
 log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
 
 
 class AudioExtractionWorker(AbstractWorker):
@@ -18,12 +36,24 @@ class AudioExtractionWorker(AbstractWorker):
     generates structured JSON data using a language model (LLM) service based on the transcription.
 
     It communicates progress, success, and errors back to a client via WebSocket messages.
+    All messages carry the request id, taken from the request or derived from the file
+    name, so several workers can share the queue and finish requests out of order.
+    Results of requests received by the embedded server carry their connection too.
+
+    The transcript is sent as EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED message with the
+    seconds ASR took as soon as it is known, before the LLM generates the result.
 
     Attributes:
         __speech_queue (asyncio.Queue): Queue of audio processing requests.
         __asr_service (ASRService): Service to transcribe audio to text.
         __llm_service (LLMService): Service to generate structured JSON response from text.
         __client (WebSocketClient): Client to send status and result messages.
+        __memory_manager (Optional[MemoryManager]): Manager pausing the intake while
+            memory is short and trimming the heap after jobs, None to disable.
+        __processed_index (Optional[ProcessedFileIndex]): Index the processed files are
+            recorded in, so they aren't processed again after a restart. Files that
+            failed with an error that may go away are released instead, so they are
+            retried. None to disable.
     """
 
     def __init__(
@@ -32,6 +62,8 @@ class AudioExtractionWorker(AbstractWorker):
         asr_service: ASRService,
         llm_service: LLMService,
         client: WebSocketClient,
+        memory_manager: Optional[MemoryManager] = None,
+        processed_index: Optional[ProcessedFileIndex] = None,
     ):
         """
         Initialize the AudioExtractionWorker.
@@ -41,11 +73,17 @@ class AudioExtractionWorker(AbstractWorker):
             asr_service (ASRService): Instance of the ASR service for audio transcription.
             llm_service (LLMService): Instance of the LLM service for JSON response generation.
             client (WebSocketClient): WebSocket client used to send messages back to the requester.
+            memory_manager (Optional[MemoryManager]): Optional manager pausing the intake
+                while memory is short and trimming the heap after jobs.
+            processed_index (Optional[ProcessedFileIndex]): Optional index the processed
+                files are recorded in.
         """
         self.__speech_queue = speech_queue
         self.__asr_service = asr_service
         self.__llm_service = llm_service
         self.__client = client
+        self.__memory_manager = memory_manager
+        self.__processed_index = processed_index
 
     async def do_work(self):
         """
@@ -54,55 +92,236 @@ class AudioExtractionWorker(AbstractWorker):
         For each request:
         - Validate the request type.
         - Notify the client that processing is starting.
-        - Transcribe the audio file to text using ASR service.
+        - Transcribe the audio file or the uploaded audio to text using ASR service.
+          If enabled, the finalized segments are prefilled into the LLM while ASR runs.
+        - Send the transcript with the ASR duration to the client.
         - Generate a JSON response from the transcription using the LLM service.
+          For PERSON_DATA, each field is sent as a partial result as soon as it is known.
         - Send success or error messages back to the client.
 
         Handles exceptions from transcription and LLM processing and sends error messages accordingly.
         """
         while True:
+            if self.__memory_manager is not None:
+                await self.__memory_manager.wait_for_memory()
             request = await self.__speech_queue.get()
             log.info(f"Received request: {request}")
-            file = request["file"]
+            # Uploaded audio is transcribed from memory, files from disk
+            file = request.get("file")
+            audio = request.get("audio", file)
+            request_id = str(
+                request.get("request_id")
+                or (Path(file).stem if file is not None else uuid.uuid4().hex)
+            )
+            name = (
+                file.split(os.sep)[-1] if file is not None else f"upload {request_id}"
+            )
             req_type = request["req_type"]
+            routing = RequestDispatcher.routing(request)
 
-            if req_type == "BAD_REQUEST":
+            if req_type == RequestType.BAD_REQUEST:
                 log.error(f"Bad request: {req_type}")
-                await self.__client.send_message(
-                    {
-                        "type": "EXTRACT_DATA_FROM_AUDIO_ERROR",
-                        "message": {"text": f"Bad request for file {file}"},
-                    }
+                await self.__send_message(
+                    "EXTRACT_DATA_FROM_AUDIO_ERROR",
+                    request_id,
+                    f"Bad request for file {file or name}",
+                    **routing,
                 )
+                self.__mark_processed(file)
                 continue
 
             try:
-                await self.__client.send_message(
-                    {
-                        "type": "EXTRACT_DATA_FROM_AUDIO_STARTING",
-                        "message": {
-                            "text": f"Starting Data extraction for file: {file.split(os.sep)[-1]}",
-                        },
-                    }
+                await self.__send_message(
+                    "EXTRACT_DATA_FROM_AUDIO_STARTING",
+                    request_id,
+                    f"Starting Data extraction for file: {name}",
+                    **routing,
+                )
+                llm_kwargs = {}
+                prefill_session = await self.__create_prefill_session(req_type)
+                # Only time ASR, creating the session may have loaded the LLM
+                t0 = time.time()
+                if prefill_session is not None:
+                    text = await self.__transcribe_with_prefill(audio, prefill_session)
+                    llm_kwargs["prefill_session"] = prefill_session
+                else:
+                    text = await asyncio.to_thread(self.__asr_service.transcribe, audio)
+                asr_seconds = time.time() - t0
+                metrics.observe("asr_seconds", asr_seconds)
+                await self.__send_message(
+                    "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED",
+                    request_id,
+                    text,
+                    asr_seconds=round(asr_seconds, 3),
+                    **routing,
                 )
-                text = await asyncio.to_thread(self.__asr_service.transcribe, file)
+
+                partials = []
+                if (
+                    req_type == RequestType.PERSON_DATA
+                    and config.LLM_STREAM_PARTIAL_RESULTS
+                ):
+                    llm_kwargs["on_field"] = self.__partial_result_sender(
+                        request_id, partials, routing
+                    )
                 result = await asyncio.to_thread(
-                    self.__llm_service.generate_json_response, text, request["req_type"]
+                    self.__llm_service.generate_json_response,
+                    text,
+                    req_type,
+                    **llm_kwargs,
                 )
-                await self.__client.send_message(
-                    {
-                        "type": "EXTRACT_DATA_FROM_AUDIO_SUCCESS",
-                        "message": {"text": result},
-                    }
+                # Make sure all partial results are sent before the final one
+                await asyncio.gather(*map(asyncio.wrap_future, partials))
+                await self.__send_message(
+                    "EXTRACT_DATA_FROM_AUDIO_SUCCESS", request_id, result, **routing
                 )
 
             except (LLMProcessingError, TranscriptionError) as e:
-                log.exception(
-                    f"Error while extracting data from: {file.split(os.sep)[-1]}: {e}"
+                log.exception(f"Error while extracting data from: {name}: {e}")
+                await self.__send_message(
+                    "EXTRACT_DATA_FROM_AUDIO_ERROR", request_id, e.message, **routing
                 )
-                await self.__client.send_message(
-                    {
-                        "type": "EXTRACT_DATA_FROM_AUDIO_ERROR",
-                        "message": {"text": e.message},
-                    }
+                if e.permanent:
+                    self.__mark_processed(file)
+                else:
+                    # Retried by the backlog scan after a restart
+                    self.__release(file)
+            else:
+                self.__mark_processed(file)
+
+            if self.__memory_manager is not None:
+                await self.__memory_manager.job_finished()
+
+    def __mark_processed(self, file: Optional[str]) -> None:
+        """Records a file as processed, so it isn't processed again after a restart.
+
+        Args:
+            file (Optional[str]): Path of the processed file, None for uploaded audio.
+        """
+        if self.__processed_index is not None and file is not None:
+            self.__processed_index.mark_processed(file)
+
+    def __release(self, file: Optional[str]) -> None:
+        """Releases a file that failed to process, so it is retried after a restart.
+
+        Args:
+            file (Optional[str]): Path of the file, None for uploaded audio.
+        """
+        if self.__processed_index is not None and file is not None:
+            self.__processed_index.release(file)
+
+    async def __create_prefill_session(
+        self, req_type: RequestType
+    ) -> Optional[PrefillSession]:
+        """Creates a session prefilling the LLM prompt while ASR runs, if enabled.
+
+        COMMAND requests are mostly answered by the rule-based classifier, so they are
+        only prefilled if the LLM is loaded anyway, not to reload an unloaded model.
+
+        Args:
+            req_type (RequestType): Type of the request.
+
+        Returns:
+            Optional[PrefillSession]: The session, None to transcribe without prefill.
+        """
+        if not config.LLM_OVERLAP_PREFILL:
+            return None
+        if req_type != RequestType.PERSON_DATA and not self.__llm_service.is_loaded():
+            return None
+        # Loading the model can take a while, keep the event loop responsive
+        return await asyncio.to_thread(
+            self.__llm_service.create_prefill_session, req_type
+        )
+
+    async def __transcribe_with_prefill(
+        self, audio: str | bytes | memoryview, prefill_session: PrefillSession
+    ) -> str:
+        """Transcribes audio segment by segment while the LLM prefills the finalized text.
+
+        ASR and the prefill run in separate threads. If ASR finalizes segments faster
+        than they are prefilled, the prefill skips ahead to the latest transcript.
+        Once ASR is done, the rest of the prompt is left to the generation.
+
+        Args:
+            audio (str | bytes | memoryview): Path to the audio file or the uploaded audio.
+            prefill_session (PrefillSession): Session prefilling the LLM prompt.
+
+        Returns:
+            str: The complete transcript.
+
+        Raises:
+            TranscriptionError: If an error occurs during transcription.
+        """
+        loop = asyncio.get_running_loop()
+        transcripts = asyncio.Queue()
+
+        def transcribe() -> str:
+            text = ""
+            try:
+                for segment in self.__asr_service.transcribe_segments(audio):
+                    text += segment
+                    loop.call_soon_threadsafe(transcripts.put_nowait, text)
+            finally:
+                # Signal the end of the transcript, also if ASR failed
+                loop.call_soon_threadsafe(transcripts.put_nowait, None)
+            return text
+
+        asr_task = asyncio.create_task(asyncio.to_thread(transcribe))
+        while (transcript := await transcripts.get()) is not None:
+            while transcript is not None and not transcripts.empty():
+                transcript = transcripts.get_nowait()
+            if transcript is None:
+                break
+            await asyncio.to_thread(prefill_session.feed, transcript)
+        return await asr_task
+
+    async def __send_message(
+        self, msg_type: str, request_id: str, text: Any, **fields: Any
+    ) -> None:
+        """Sends a message for a request to the client.
+
+        Args:
+            msg_type (str): Type of the message, e.g. EXTRACT_DATA_FROM_AUDIO_SUCCESS.
+            request_id (str): Id of the request the message belongs to.
+            text (Any): The text or the extracted data.
+            **fields (Any): Additional fields of the message.
+        """
+        await self.__client.send_message(
+            {
+                "type": msg_type,
+                "message": {"text": text, "request_id": request_id, **fields},
+            }
+        )
+
+    def __partial_result_sender(
+        self, request_id: str, futures: list[Future], routing: dict
+    ) -> Callable[[str, Any], None]:
+        """Creates a callback sending each completed field as a partial result.
+
+        The callback is called from the LLM thread, so the messages are scheduled on
+        the event loop of the worker.
+
+        Args:
+            request_id (str): Id of the request the fields belong to.
+            futures (list[Future]): List the futures of the scheduled messages are added to.
+            routing (dict): Connection of the request, see `RequestDispatcher.routing`.
+
+        Returns:
+            Callable[[str, Any], None]: The callback for `generate_json_response`.
+        """
+        loop = asyncio.get_running_loop()
+
+        def send_partial_result(field: str, value: Any) -> None:
+            futures.append(
+                asyncio.run_coroutine_threadsafe(
+                    self.__send_message(
+                        "EXTRACT_DATA_FROM_AUDIO_PARTIAL",
+                        request_id,
+                        {field: value},
+                        **routing,
+                    ),
+                    loop,
                 )
+            )
+
+        return send_partial_result
@@ -1,19 +1,47 @@
 import asyncio
 import os
+import time
+from typing import Optional
 
-from speech_recognition import WebSocketClient
+from speech_recognition import WebSocketClient, LoggerHelper, config
 from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.audio_encoder import AudioEncoder
+from speech_recognition.services.request_dispatcher import RequestDispatcher
 from speech_recognition.services.tts_service import TTSService
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.sentence_splitter import SentenceSplitter
 from speech_recognition.workers.abstract_worker import AbstractWorker
 
+log = LoggerHelper(__name__).get_logger()
+metrics = MetricsHelper()
+
 
 class AudioGenerationWorker(AbstractWorker):
     """Worker that listens for text requests, generates audio, and reports back via WebSocket.
 
+    Several workers can share the text queue to generate audio in parallel. Each one
+    reports its throughput as `tts_worker_<id>_requests` and `tts_worker_<id>_seconds`.
+
+    Texts with several sentences can be streamed: each sentence is sent as a
+    GENERATE_AUDIO_PART message with its sequence number as soon as it is synthesized,
+    before the GENERATE_AUDIO_SUCCESS message with the whole text.
+
+    All messages carry the request id, and the connection of requests received by the
+    embedded server. If an audio encoder is set, the audio is sent
+    as binary frame (see `AudioFrame`) with the same type and request id in its header
+    right before the message. Streamed texts send their audio only in the parts, whose
+    files are then deleted once they're merged. Without an encoder, clients read the
+    part files from the output directory, so they are left to the age-based cleanup
+    of `TTSService`.
+
     Attributes:
-        __text_queue (asyncio.Queue): Queue of text strings to convert to audio.
+        __text_queue (asyncio.Queue): Queue of text requests to convert to audio.
         __tts_service (TTSService): Service to generate audio from text.
         __client (WebSocketClient): WebSocket client for sending responses.
+        __worker_id (int): Number of the worker in metrics and log messages.
+        __audio_encoder (Optional[AudioEncoder]): Encoder for sending the audio as
+            binary frames, None to only send the file names.
     """
 
     def __init__(
@@ -21,17 +49,26 @@ class AudioGenerationWorker(AbstractWorker):
         text_queue: asyncio.Queue,
         tts_service: TTSService,
         client: WebSocketClient,
+        worker_id: int = 0,
+        audio_encoder: Optional[AudioEncoder] = None,
     ) -> None:
         """Initialize the AudioGenerationWorker.
 
         Args:
-            text_queue (asyncio.Queue): Queue where text requests are received.
+            text_queue (asyncio.Queue): Queue where text requests are received,
+                as dict with the text, the request id and the optional voice id.
             tts_service (TTSService): Instance to perform text-to-speech generation.
             client (WebSocketClient): WebSocket client to send status and results.
+            worker_id (int, optional): Number of the worker in metrics and log messages.
+                Defaults to 0.
+            audio_encoder (Optional[AudioEncoder], optional): Encoder for sending the
+                audio as binary frames. Defaults to None.
         """
         self.__text_queue = text_queue
         self.__tts_service = tts_service
         self.__client = client
+        self.__worker_id = worker_id
+        self.__audio_encoder = audio_encoder
 
     async def do_work(self) -> None:
         """Continuously process text-to-audio generation requests from the queue.
@@ -41,21 +78,150 @@ class AudioGenerationWorker(AbstractWorker):
         """
         while True:
             request = await self.__text_queue.get()
+            request_id = request["request_id"]
+            routing = RequestDispatcher.routing(request)
+            t0 = time.time()
             try:
-                res = str(await self.__tts_service.generate_audio(request))
-                filename = res.split(os.sep)[-1].rstrip()
-                await self.__client.send_message(
-                    {
-                        "type": "GENERATE_AUDIO_SUCCESS",
-                        "message": {
-                            "text": f"Successfully generated audio file: {filename}",
-                        },
-                    }
-                )
+                sentences = SentenceSplitter.split(request["text"])
+                if config.TTS_STREAM_SENTENCES and len(sentences) > 1:
+                    res = await self.__generate_streamed(
+                        sentences, request_id, request.get("voice"), routing
+                    )
+                    # The audio was already sent in parts
+                    await self.__send_result(
+                        "GENERATE_AUDIO_SUCCESS",
+                        request_id,
+                        res,
+                        f"Successfully generated audio file: {os.path.basename(res)}",
+                        send_audio=False,
+                        parts=len(sentences),
+                        **routing,
+                    )
+                else:
+                    res = str(
+                        await self.__tts_service.generate_audio(
+                            request["text"], request.get("voice")
+                        )
+                    )
+                    await self.__send_result(
+                        "GENERATE_AUDIO_SUCCESS",
+                        request_id,
+                        res,
+                        f"Successfully generated audio file: {os.path.basename(res)}",
+                        **routing,
+                    )
             except AudioGenerationError as e:
                 await self.__client.send_message(
                     {
                         "type": "GENERATE_AUDIO_ERROR",
-                        "message": {"text": f"{e.message}"},
+                        "message": {
+                            "text": f"{e.message}",
+                            "request_id": request_id,
+                            **routing,
+                        },
                     }
                 )
+            self.__record(time.time() - t0)
+
+    async def __generate_streamed(
+        self,
+        sentences: list[str],
+        request_id: str,
+        voice: Optional[str],
+        routing: dict,
+    ) -> str:
+        """Generates the audio sentence by sentence and sends each part when it's ready.
+
+        Args:
+            sentences (list[str]): The sentences of the text.
+            request_id (str): Id of the request the parts belong to.
+            voice (Optional[str]): Id of the voice, None for the default.
+            routing (dict): Connection of the request, see `RequestDispatcher.routing`.
+
+        Returns:
+            str: Path to the audio file of the whole text.
+
+        Raises:
+            AudioGenerationError: If the audio of a sentence could not be generated.
+        """
+        files = []
+        parts = self.__tts_service.generate_audio_parts(
+            sentences, config.TTS_SENTENCE_FAN_OUT, voice
+        )
+        async for file in parts:
+            await self.__send_result(
+                "GENERATE_AUDIO_PART",
+                request_id,
+                file,
+                f"Generated audio part: {os.path.basename(file)}",
+                sequence=len(files),
+                total=len(sentences),
+                **routing,
+            )
+            files.append(file)
+        merged = await self.__tts_service.merge_audio(files)
+        if self.__audio_encoder is not None:
+            # The client got the audio of the parts, not their files
+            await self.__tts_service.delete_audio(files)
+        return merged
+
+    async def __send_result(
+        self,
+        msg_type: str,
+        request_id: str,
+        file: str,
+        text: str,
+        send_audio: bool = True,
+        **fields,
+    ) -> None:
+        """Sends a generated audio file, first as binary frame if enabled, then as message.
+
+        Args:
+            msg_type (str): Type of the message.
+            request_id (str): Id of the request the audio belongs to.
+            file (str): Path to the generated audio file.
+            text (str): Text of the message.
+            send_audio (bool, optional): Whether to send the audio as binary frame,
+                if an encoder is set. Defaults to True.
+            **fields: Further fields of the message and frame header.
+
+        Raises:
+            AudioGenerationError: If the audio couldn't be encoded.
+        """
+        filename = os.path.basename(file)
+        if send_audio and self.__audio_encoder is not None:
+            audio = await self.__audio_encoder.encode(file)
+            header = {
+                "type": msg_type,
+                "request_id": request_id,
+                "file": filename,
+                "format": self.__audio_encoder.format,
+                **fields,
+            }
+            await self.__client.send_binary(AudioFrame.encode(header, audio))
+        await self.__client.send_message(
+            {
+                "type": msg_type,
+                "message": {
+                    "text": text,
+                    "request_id": request_id,
+                    "file": filename,
+                    **fields,
+                },
+            }
+        )
+
+    def __record(self, seconds: float) -> None:
+        """Records the throughput of this worker.
+
+        Args:
+            seconds (float): Time it took to handle the request.
+        """
+        name = f"tts_worker_{self.__worker_id}"
+        metrics.increment(f"{name}_requests")
+        metrics.observe(f"{name}_seconds", seconds)
+        log.info(
+            f"TTS worker {self.__worker_id} handled a request in {seconds:.2f} s, "
+            f"{metrics.get(f'{name}_requests'):.0f} in total, "
+            f"{metrics.average(f'{name}_seconds'):.2f} s on average"
+        )
@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+
+from speech_recognition import config
+from speech_recognition.services.file_observer import FileObserver
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
+from speech_recognition.workers.abstract_worker import AbstractWorker
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class BacklogScanWorker(AbstractWorker):
+    """Worker that queues the files left unprocessed in the input directory at startup.
+
+    The file observer only sees files created while it runs, so files dropped before
+    the start or during a restart would never be processed. The directory is scanned
+    once, files already processed are skipped using the processed file index.
+
+    Files are queued one at a time and only while no requests are waiting, so the
+    backlog doesn't delay new requests by more than one file.
+
+    Attributes:
+        ORDERS (tuple[str, ...]): Available orders the backlog is queued in.
+        __speech_queue (asyncio.Queue): Queue of the audio extraction requests.
+        __directory (str): The input directory to scan.
+        __index (ProcessedFileIndex): Index of the processed files, shared with the
+            file observer so no file is queued twice.
+        __order (str): Order the backlog is queued in, one of `ORDERS`.
+        __poll_interval (float): Seconds to wait while requests are queued.
+    """
+
+    ORDERS = ("oldest", "newest", "type")
+    # Commands are short answers a user is waiting for, so they go first
+    __TYPE_PRIORITY = {RequestType.COMMAND: 0, RequestType.PERSON_DATA: 1}
+
+    def __init__(
+        self,
+        speech_queue: asyncio.Queue,
+        directory: str,
+        index: ProcessedFileIndex,
+        order: str = "oldest",
+        poll_interval: float = 1,
+    ) -> None:
+        """Initialize the BacklogScanWorker.
+
+        Args:
+            speech_queue (asyncio.Queue): Queue of the audio extraction requests.
+            directory (str): The input directory to scan.
+            index (ProcessedFileIndex): Index of the processed files.
+            order (str, optional): "oldest" or "newest" first by modification time,
+                or "type" for commands before person data, each oldest first.
+                Defaults to "oldest".
+            poll_interval (float, optional): Seconds to wait while requests are queued.
+                Defaults to 1.
+
+        Raises:
+            ValueError: If the order is unknown.
+        """
+        if order not in self.ORDERS:
+            raise ValueError(
+                f"Unknown backlog order: {order}, available: {', '.join(self.ORDERS)}"
+            )
+        self.__speech_queue = speech_queue
+        self.__directory = directory
+        self.__index = index
+        self.__order = order
+        self.__poll_interval = poll_interval
+
+    async def do_work(self) -> None:
+        """Queues every file of the backlog that wasn't processed yet, then returns."""
+        backlog = await asyncio.to_thread(self.__scan)
+        log.info(f"Found {len(backlog)} unprocessed files in {self.__directory}")
+        queued = 0
+        for path, mtime in backlog:
+            while not self.__speech_queue.empty():
+                await asyncio.sleep(self.__poll_interval)
+            # Files still being written are completed by the file observer
+            while time.time() - mtime < config.FILE_STABLE_SECONDS:
+                await asyncio.sleep(self.__poll_interval)
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    break
+            if os.path.exists(path) and self.__index.claim(path):
+                await self.__speech_queue.put(FileObserver.create_request(path))
+                queued += 1
+        log.info(f"Queued {queued} files of the backlog")
+
+    def __scan(self) -> list[tuple[str, float]]:
+        """Lists the unprocessed files of the input directory in the configured order.
+
+        The processed file index is compacted first, so it doesn't grow with files
+        removed from the directory.
+
+        Returns:
+            list[tuple[str, float]]: Path and modification time of the files.
+        """
+        self.__index.compact(self.__directory)
+        backlog = []
+        with os.scandir(self.__directory) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_file() or entry.name.endswith(
+                        FileObserver.PART_SUFFIX
+                    ):
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if not self.__index.is_processed(entry.path):
+                    backlog.append((entry.path, mtime))
+
+        if self.__order == "type":
+            backlog.sort(key=lambda file: (self.__type_priority(file[0]), file[1]))
+        else:
+            backlog.sort(key=lambda file: file[1], reverse=self.__order == "newest")
+        return backlog
+
+    def __type_priority(self, path: str) -> int:
+        """Returns the position of a file's request type in the "type" order.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            int: Lower values are queued first.
+        """
+        req_type = FileObserver.create_request(path)["req_type"]
+        return self.__TYPE_PRIORITY.get(req_type, len(self.__TYPE_PRIORITY))
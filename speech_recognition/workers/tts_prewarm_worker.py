@@ -0,0 +1,55 @@
+import asyncio
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.tts_service import TTSService
+from speech_recognition.utils.logger_helper import LoggerHelper
+from speech_recognition.workers.abstract_worker import AbstractWorker
+
+log = LoggerHelper(__name__).get_logger()
+
+
+class TTSPrewarmWorker(AbstractWorker):
+    """Worker that renders a list of common phrases into the TTS cache.
+
+    Phrases are synthesized one at a time and only while no text requests are
+    waiting, so the pre-warming doesn't delay real requests by more than one phrase.
+
+    Attributes:
+        __text_queue (asyncio.Queue): Queue of the text requests.
+        __tts_service (TTSService): Service to generate audio from text.
+        __phrases (list[str]): Phrases to render into the cache.
+        __poll_interval (float): Seconds to wait while requests are queued.
+    """
+
+    def __init__(
+        self,
+        text_queue: asyncio.Queue,
+        tts_service: TTSService,
+        phrases: list[str],
+        poll_interval: float = 1,
+    ) -> None:
+        """Initialize the TTSPrewarmWorker.
+
+        Args:
+            text_queue (asyncio.Queue): Queue of the text requests.
+            tts_service (TTSService): Service to generate audio from text.
+            phrases (list[str]): Phrases to render into the cache.
+            poll_interval (float, optional): Seconds to wait while requests are queued.
+                Defaults to 1.
+        """
+        self.__text_queue = text_queue
+        self.__tts_service = tts_service
+        self.__phrases = phrases
+        self.__poll_interval = poll_interval
+
+    async def do_work(self) -> None:
+        """Renders every phrase that isn't cached yet, then returns."""
+        rendered = 0
+        for phrase in self.__phrases:
+            while not self.__text_queue.empty():
+                await asyncio.sleep(self.__poll_interval)
+            try:
+                rendered += await self.__tts_service.prewarm(phrase)
+            except AudioGenerationError as e:
+                log.warning(f"Could not pre-warm '{phrase}': {e.message}")
+        log.info(f"Pre-warmed {rendered} of {len(self.__phrases)} phrases")
@@ -2,11 +2,13 @@ import asyncio
 import json
 import threading
 import traceback
+from collections import deque
 
 from websockets import ConnectionClosed
 from websockets.asyncio.server import serve
 
 from speech_recognition import LoggerHelper
+from speech_recognition.utils.audio_frame import AudioFrame
 
 log = LoggerHelper(__name__).get_logger()
 
@@ -121,5 +123,91 @@ def start_server_thread(
     return thread
 
 
+class MockDispatcher:
+    """Local stand-in for a cluster dispatcher speaking the pull protocol.
+
+    Nodes connect and advertise their free capacity per stage with WORK_CREDITS
+    messages. Submitted jobs are queued per stage and only sent to a node with a
+    credit of that stage left, the node with the most free credits first. All other
+    messages of the nodes, e.g. results, are put on the results queue.
+    """
+
+    def __init__(self):
+        self.jobs = {"stt": deque(), "tts": deque()}
+        self.credits = {}
+        self.results = asyncio.Queue()
+        self.assigned = {}
+
+    def submit_text(self, text, request_id):
+        self.jobs["tts"].append(
+            (
+                request_id,
+                json.dumps(
+                    {
+                        "type": "GENERATE_AUDIO_REQUEST",
+                        "message": {"text": text, "request_id": request_id},
+                    }
+                ),
+            )
+        )
+
+    def submit_audio(self, audio, req_type, request_id):
+        self.jobs["stt"].append(
+            (
+                request_id,
+                AudioFrame.encode(
+                    {
+                        "type": "EXTRACT_DATA_FROM_AUDIO_REQUEST",
+                        "request_id": request_id,
+                        "req_type": req_type,
+                    },
+                    audio,
+                ),
+            )
+        )
+
+    async def dispatch(self):
+        for stage, jobs in self.jobs.items():
+            while jobs:
+                nodes = [ws for ws, credits in self.credits.items() if credits[stage]]
+                if not nodes:
+                    break
+                node = max(nodes, key=lambda ws: self.credits[ws][stage])
+                request_id, job = jobs.popleft()
+                self.credits[node][stage] -= 1
+                self.assigned[request_id] = node
+                try:
+                    await node.send(job)
+                except ConnectionClosed:
+                    # Hand the job to another node
+                    jobs.appendleft((request_id, job))
+                    del self.credits[node]
+
+    async def handler(self, websocket):
+        self.credits[websocket] = {"stt": 0, "tts": 0}
+        try:
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    await self.results.put(message)
+                    continue
+                parsed = json.loads(message) if message.startswith("{") else None
+                if parsed is None or parsed["type"] != "WORK_CREDITS":
+                    await self.results.put(message)
+                    continue
+                credits = parsed["message"]["credits"]
+                if parsed["message"].get("reset"):
+                    self.credits[websocket] = {"stt": 0, "tts": 0}
+                for stage, amount in credits.items():
+                    self.credits[websocket][stage] += amount
+                await self.dispatch()
+        except ConnectionClosed:
+            log.info("Dispatcher: Node disconnected.")
+        finally:
+            self.credits.pop(websocket, None)
+
+    async def start(self, host="localhost", port=8080):
+        return await serve(self.handler, host, port)
+
+
 if __name__ == "__main__":
     serve_mock()
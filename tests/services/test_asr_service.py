@@ -1,5 +1,6 @@
 import logging
 
+import numpy as np
 import pytest
 
 from speech_recognition.exceptions.transcription_error import TranscriptionError
@@ -97,3 +98,82 @@ def test_asrservice_transcribe_exception_during_inference(
 
     with pytest.raises(TranscriptionError, match="Error while transcribing"):
         service.transcribe(str(dummy_audio_path))
+
+
+def test_asrservice_transcribe_segments(mocker, dummy_audio_path):
+    # Mock the model, every segment gets its own text
+    mock_model = mocker.Mock(side_effect=[{"text": " Hallo"}, {"text": " Welt"}])
+    mock_model.feature_extractor.sampling_rate = 16000
+    mocker.patch(
+        "speech_recognition.services.asr_service.pipeline", return_value=mock_model
+    )
+    mock_audio_helper = mocker.patch(
+        "speech_recognition.services.asr_service.AudioHelper"
+    ).return_value
+    mock_audio_helper.is_file_empty.return_value = False
+    mock_audio_helper.split_on_silence.return_value = ["segment 1", "segment 2"]
+
+    service = ASRService()
+    segments = service.transcribe_segments(str(dummy_audio_path))
+
+    # Segments are transcribed lazily, one at a time
+    assert next(segments) == " Hallo"
+    assert mock_model.call_count == 1
+    assert list(segments) == [" Welt"]
+    assert mock_model.call_args.args[0]["sampling_rate"] == 16000
+
+
+def test_asrservice_transcribe_segments_exception_during_inference(
+    mocker, dummy_audio_path
+):
+    mock_model = mocker.Mock(side_effect=Exception("Model failure"))
+    mocker.patch(
+        "speech_recognition.services.asr_service.pipeline", return_value=mock_model
+    )
+    mock_audio_helper = mocker.patch(
+        "speech_recognition.services.asr_service.AudioHelper"
+    ).return_value
+    mock_audio_helper.is_file_empty.return_value = False
+    mock_audio_helper.split_on_silence.return_value = ["segment 1"]
+
+    service = ASRService()
+
+    with pytest.raises(TranscriptionError, match="Error while transcribing segment 0"):
+        list(service.transcribe_segments(str(dummy_audio_path)))
+
+
+def test_asrservice_transcribe_uploaded_audio(mocker):
+    mock_model = mocker.Mock(return_value={"text": "Hallo"})
+    mocker.patch(
+        "speech_recognition.services.asr_service.pipeline", return_value=mock_model
+    )
+    mock_audio_helper = mocker.patch(
+        "speech_recognition.services.asr_service.AudioHelper"
+    ).return_value
+    samples = np.zeros(16000, dtype=np.float32)
+    mock_audio_helper.decode_audio.return_value = samples
+    mock_audio_helper.is_samples_empty.return_value = False
+
+    service = ASRService()
+    text = service.transcribe(b"encoded audio")
+
+    assert text == "Hallo"
+    # Uploaded audio never touches the disk
+    mock_audio_helper.convert_audio_to_wav.assert_not_called()
+    mock_audio_helper.decode_audio.assert_called_once_with(b"encoded audio", 16000)
+    inputs = mock_model.call_args.args[0]
+    assert inputs["raw"] is samples
+    assert inputs["sampling_rate"] == 16000
+
+
+def test_asrservice_transcribe_empty_uploaded_audio_raises(mocker):
+    mocker.patch("speech_recognition.services.asr_service.pipeline")
+    mock_audio_helper = mocker.patch(
+        "speech_recognition.services.asr_service.AudioHelper"
+    ).return_value
+    mock_audio_helper.is_samples_empty.return_value = True
+
+    service = ASRService()
+
+    with pytest.raises(TranscriptionError, match="empty or contains only silence"):
+        service.transcribe(np.zeros(100, dtype=np.float32))
@@ -0,0 +1,86 @@
+import logging
+import wave
+
+import pytest
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.audio_encoder import AudioEncoder
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def wav_file(tmp_path):
+    path = tmp_path / "audio.wav"
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(22050)
+        f.writeframes(b"\x00\x01" * 22050)
+    return str(path)
+
+
+@pytest.fixture
+def encoder_factory():
+    encoders = []
+
+    def create(codec):
+        encoders.append(AudioEncoder(codec, workers=2))
+        return encoders[-1]
+
+    yield create
+    for encoder in encoders:
+        encoder.stop()
+
+
+@pytest.mark.asyncio
+async def test_wav_is_sent_as_is(encoder_factory, wav_file):
+    encoder = encoder_factory(None)
+
+    assert encoder.format == "wav"
+    with open(wav_file, "rb") as f:
+        assert await encoder.encode(wav_file) == f.read()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("codec,magic", [("flac", b"fLaC"), ("opus", b"OggS")])
+async def test_compression(encoder_factory, wav_file, codec, magic):
+    encoder = encoder_factory(codec)
+
+    audio = await encoder.encode(wav_file)
+
+    assert encoder.format == codec
+    assert audio.startswith(magic)
+
+
+@pytest.mark.asyncio
+async def test_compression_failure(encoder_factory, tmp_path):
+    broken = tmp_path / "broken.wav"
+    broken.write_bytes(b"no wav")
+
+    with pytest.raises(AudioGenerationError):
+        await encoder_factory("flac").encode(str(broken))
+    with pytest.raises(AudioGenerationError):
+        await encoder_factory(None).encode(str(tmp_path / "missing.wav"))
+
+
+@pytest.mark.asyncio
+async def test_compression_without_ffmpeg(mocker, encoder_factory, tmp_path):
+    mocker.patch(
+        "speech_recognition.services.audio_encoder.subprocess.run",
+        side_effect=FileNotFoundError("ffmpeg"),
+    )
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"RIFF")
+
+    with pytest.raises(AudioGenerationError):
+        await encoder_factory("flac").encode(str(audio))
+
+
+def test_unsupported_codec():
+    with pytest.raises(ValueError):
+        AudioEncoder("mp3", workers=1)
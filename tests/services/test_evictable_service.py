@@ -0,0 +1,80 @@
+import logging
+import threading
+
+import pytest
+
+from speech_recognition.services.evictable_service import EvictableService
+
+
+class DummyService(EvictableService):
+    def __init__(self):
+        super().__init__("Dummy")
+        self.model = None
+        self.loads = 0
+
+    def predict(self):
+        with self._in_use():
+            return self.model
+
+    def _load_models(self):
+        self.loads += 1
+        self.model = f"model {self.loads}"
+
+    def _unload_models(self):
+        self.model = None
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+def test_models_are_loaded_on_first_use():
+    service = DummyService()
+
+    assert not service.is_loaded()
+    assert service.predict() == "model 1"
+    assert service.is_loaded()
+
+
+def test_unload_if_idle_and_reload_on_demand():
+    service = DummyService()
+    service.load()
+
+    assert service.unload_if_idle(0)
+    assert not service.is_loaded()
+    assert service.model is None
+
+    # The next use loads the model again
+    assert service.predict() == "model 2"
+
+
+def test_recently_used_models_stay_loaded():
+    service = DummyService()
+    service.predict()
+
+    assert not service.unload_if_idle(60)
+    assert service.is_loaded()
+
+
+def test_models_in_use_are_not_unloaded():
+    service = DummyService()
+    service.load()
+    unloaded = []
+
+    with service._in_use():
+        thread = threading.Thread(
+            target=lambda: unloaded.append(service.unload_if_idle(0))
+        )
+        thread.start()
+        thread.join()
+
+    assert unloaded == [False]
+    assert service.model == "model 1"
+
+
+def test_unloaded_service_is_not_unloaded_again():
+    service = DummyService()
+
+    assert not service.unload_if_idle(0)
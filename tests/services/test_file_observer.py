@@ -1,8 +1,13 @@
 import asyncio
 import logging
+import shutil
+import threading
 
 import pytest
-from watchdog.events import FileCreatedEvent
+from watchdog.events import FileClosedEvent, FileCreatedEvent, FileMovedEvent
+from watchdog.utils import platform
+
+import speech_recognition
 
 from speech_recognition.services.file_observer import FileObserver
 from speech_recognition.services.llm_service import RequestType
@@ -29,8 +34,8 @@ async def test_on_created_real_queue(tmp_path, test_input, expected):
     file_observer = FileObserver(loop, queue, str(tmp_path))
 
     # Create fake events for every corresponding filename and RequestType
-    event = FileCreatedEvent(src_path=str(tmp_path / test_input))
-    file_observer.on_created(event)
+    file_observer.on_created(FileCreatedEvent(src_path=str(tmp_path / test_input)))
+    file_observer.on_closed(FileClosedEvent(src_path=str(tmp_path / test_input)))
 
     await asyncio.sleep(0.1)
     assert not queue.empty(), "Queue should have one item after file creation"
@@ -38,6 +43,120 @@ async def test_on_created_real_queue(tmp_path, test_input, expected):
 
     assert test_input in item["file"]
     assert item["req_type"] == expected
+    assert item["request_id"] == test_input.removesuffix(".m4a")
+
+
+@pytest.mark.asyncio
+async def test_file_is_queued_once_closed(tmp_path):
+    queue = asyncio.Queue()
+    file_observer = FileObserver(asyncio.get_running_loop(), queue, str(tmp_path))
+    file_observer._FileObserver__close_events = True
+    path = str(tmp_path / "person-test.wav")
+
+    file_observer.on_created(FileCreatedEvent(src_path=path))
+    await asyncio.sleep(0.1)
+    assert queue.empty(), "File still being written"
+
+    file_observer.on_closed(FileClosedEvent(src_path=path))
+    # Only new files are queued, not files written again
+    file_observer.on_closed(FileClosedEvent(src_path=path))
+    await asyncio.sleep(0.1)
+    assert queue.qsize() == 1
+    assert (await queue.get())["file"] == path
+
+
+@pytest.mark.asyncio
+async def test_file_is_queued_once_stable(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_recognition.config, "FILE_STABLE_SECONDS", 0.1)
+    queue = asyncio.Queue()
+    file_observer = FileObserver(asyncio.get_running_loop(), queue, str(tmp_path))
+    file_observer._FileObserver__close_events = False
+    path = tmp_path / "command-test.wav"
+    path.write_bytes(b"RIFF")
+
+    file_observer.on_created(FileCreatedEvent(src_path=str(path)))
+    await asyncio.sleep(0.05)
+    with path.open("ab") as f:
+        f.write(b"more audio")
+    await asyncio.sleep(0.1)
+    assert queue.empty(), "File still growing"
+
+    item = await asyncio.wait_for(queue.get(), 1)
+    assert item["file"] == str(path)
+    assert item["req_type"] == RequestType.COMMAND
+
+
+@pytest.mark.asyncio
+async def test_part_file_is_queued_when_renamed(tmp_path):
+    queue = asyncio.Queue()
+    file_observer = FileObserver(asyncio.get_running_loop(), queue, str(tmp_path))
+    part = str(tmp_path / "person-test.wav.part")
+    path = str(tmp_path / "person-test.wav")
+
+    file_observer.on_created(FileCreatedEvent(src_path=part))
+    file_observer.on_closed(FileClosedEvent(src_path=part))
+    await asyncio.sleep(0.1)
+    assert queue.empty()
+
+    file_observer.on_moved(FileMovedEvent(src_path=part, dest_path=path))
+    await asyncio.sleep(0.1)
+    item = await queue.get()
+    assert item["file"] == path
+    assert item["request_id"] == "person-test"
+    # Moving it away doesn't queue it again
+    file_observer.on_moved(FileMovedEvent(src_path=path, dest_path="/elsewhere.wav"))
+    await asyncio.sleep(0.1)
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_file_moved_in_is_queued_with_real_observer(monkeypatch, tmp_path):
+    monkeypatch.setattr(speech_recognition.config, "FILE_STABLE_SECONDS", 0.1)
+    watched = tmp_path / "in"
+    watched.mkdir()
+    source = tmp_path / "command-moved.wav"
+    source.write_bytes(b"RIFF")
+    queue = asyncio.Queue()
+    file_observer = FileObserver(asyncio.get_running_loop(), queue, str(watched))
+    thread = threading.Thread(target=file_observer.start, daemon=True)
+    thread.start()
+    try:
+        await asyncio.sleep(0.2)
+        shutil.move(source, watched / source.name)
+
+        item = await asyncio.wait_for(queue.get(), 2)
+        assert item["file"] == str(watched / source.name)
+        assert item["req_type"] == RequestType.COMMAND
+    finally:
+        file_observer.stop()
+        thread.join(1)
+
+
+@pytest.mark.skipif(not platform.is_linux(), reason="Close events need inotify")
+@pytest.mark.asyncio
+async def test_paused_writer_is_queued_once_closed_with_real_observer(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setattr(speech_recognition.config, "FILE_STABLE_SECONDS", 0.1)
+    queue = asyncio.Queue()
+    file_observer = FileObserver(asyncio.get_running_loop(), queue, str(tmp_path))
+    thread = threading.Thread(target=file_observer.start, daemon=True)
+    thread.start()
+    try:
+        await asyncio.sleep(0.2)
+        with (tmp_path / "person-slow.wav").open("wb") as f:
+            f.write(b"RIFF")
+            f.flush()
+            # The writer pauses longer than the file has to be stable elsewhere
+            await asyncio.sleep(0.5)
+            assert queue.empty(), "File still being written"
+            f.write(b"more audio")
+
+        item = await asyncio.wait_for(queue.get(), 2)
+        assert item["file"] == str(tmp_path / "person-slow.wav")
+    finally:
+        file_observer.stop()
+        thread.join(1)
 
 
 @pytest.mark.asyncio
@@ -59,6 +178,7 @@ def test_start_observer(mocker, tmp_path):
     loop = asyncio.get_event_loop()
     queue = asyncio.Queue()
     file_observer = FileObserver(loop, queue, str(tmp_path))
+    file_observer._FileObserver__close_events = False
 
     # Patch Observer
     mock_observer = mocker.patch(
@@ -94,3 +214,24 @@ def test_stop_observer(mocker, tmp_path):
     # Assert that it was actually stopped
     mock_observer.stop.assert_called_once()
     mock_observer.join.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_claimed_file_is_skipped(tmp_path, mocker):
+    queue = asyncio.Queue()
+    index = mocker.Mock()
+    index.claim.side_effect = [True, False]
+    file_observer = FileObserver(
+        asyncio.get_running_loop(), queue, str(tmp_path), index
+    )
+
+    for name in ("person-new.wav", "person-queued.wav"):
+        file_observer.on_moved(
+            FileMovedEvent(
+                src_path=str(tmp_path / f"{name}.part"), dest_path=str(tmp_path / name)
+            )
+        )
+    await asyncio.sleep(0.1)
+
+    assert queue.qsize() == 1
+    assert (await queue.get())["file"] == str(tmp_path / "person-new.wav")
@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+
+from speech_recognition.services.llama_cpp_engine import LlamaCppEngine
+
+SCHEMA = {"type": "object", "properties": {"result": {"enum": ["YES", "NO"]}}}
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def mock_llama(mocker):
+    # Mock llama.cpp, so we neither need the package nor a model file
+    mock_llama = mocker.patch("speech_recognition.services.llama_cpp_engine.Llama")
+    mocker.patch("speech_recognition.services.llama_cpp_engine.LlamaRAMCache")
+    mocker.patch("speech_recognition.services.llama_cpp_engine.LlamaGrammar")
+    return mock_llama
+
+
+def test_init_loads_model(mock_llama):
+    LlamaCppEngine("model.gguf", n_threads=4, n_ctx=1024, cache_bytes=1024)
+
+    mock_llama.assert_called_once_with(
+        model_path="model.gguf", n_threads=4, n_ctx=1024, verbose=False
+    )
+    mock_llama.return_value.set_cache.assert_called_once()
+
+
+def test_init_without_llama_cpp_raises(mocker):
+    mocker.patch("speech_recognition.services.llama_cpp_engine.Llama", None)
+
+    with pytest.raises(ImportError, match="llama-cpp-python"):
+        LlamaCppEngine("model.gguf", n_threads=None, n_ctx=1024, cache_bytes=1024)
+
+
+def test_generate_streams_text(mock_llama):
+    llm = mock_llama.return_value
+    llm.create_chat_completion.return_value = iter(
+        [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": '{"result": '}}]},
+            {"choices": [{"delta": {"content": '"YES"}'}}]},
+            {"choices": [{"delta": {}}]},
+        ]
+    )
+    llm.tokenize.return_value = [1, 2, 3, 4]
+    engine = LlamaCppEngine("model.gguf", n_threads=None, n_ctx=1024, cache_bytes=1)
+    chunks = []
+
+    output, generated = engine.generate(
+        [{"role": "user", "content": "Ja"}], 32, SCHEMA, chunks.append
+    )
+
+    assert output == '{"result": "YES"}'
+    assert generated == 4
+    assert chunks == ['{"result": ', '"YES"}']
+    assert llm.create_chat_completion.call_args.kwargs["max_tokens"] == 32
+
+
+def test_grammar_is_compiled_once_per_schema(mocker, mock_llama):
+    mock_grammar = mocker.patch(
+        "speech_recognition.services.llama_cpp_engine.LlamaGrammar"
+    )
+    llm = mock_llama.return_value
+    llm.create_chat_completion.side_effect = lambda **kwargs: iter([])
+    llm.tokenize.return_value = []
+    engine = LlamaCppEngine("model.gguf", n_threads=None, n_ctx=1024, cache_bytes=1)
+
+    engine.generate([], 32, SCHEMA)
+    engine.generate([], 32, dict(SCHEMA))
+    engine.generate([], 32, {"type": "object"})
+
+    assert mock_grammar.from_json_schema.call_count == 2
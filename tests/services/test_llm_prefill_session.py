@@ -0,0 +1,115 @@
+import logging
+
+import pytest
+import torch
+from transformers import Qwen2Config, Qwen2ForCausalLM
+
+from speech_recognition.services.llm_prefill_session import PrefillSession
+
+# Every character is a token of the tiny model
+VOCAB = "<>|:abcdefghijklmnopqrstuvwxyz ,."
+
+
+class CharTokenizer:
+    def __call__(self, text):
+        return {"input_ids": [VOCAB.index(char) for char in text]}
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def model():
+    # A tiny randomly initialized model, so we don't have to load a real one
+    torch.manual_seed(0)
+    config = Qwen2Config(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+    )
+    model = Qwen2ForCausalLM(config).eval()
+    model.generation_config.eos_token_id = 63
+    model.generation_config.pad_token_id = 63
+    return model
+
+
+def generate(model, input_ids, past_key_values=None):
+    input_ids = torch.tensor([input_ids])
+    return model.generate(
+        input_ids,
+        attention_mask=torch.ones_like(input_ids),
+        past_key_values=past_key_values,
+        max_new_tokens=10,
+        do_sample=False,
+    ).tolist()
+
+
+@pytest.mark.parametrize(
+    "segments",
+    [
+        ["ich bin", "ich bin max", "ich bin max muster"],
+        # The end of a segment can change once the next one is known
+        ["ich bin ma", "ich bin max, muster"],
+    ],
+)
+def test_prefilled_cache_gives_same_output(model, segments):
+    session = PrefillSession(model, CharTokenizer(), "<|system|>")
+    for segment in segments:
+        session.feed(segment)
+
+    input_ids = CharTokenizer()("<|system|>ich bin max, muster. <|assistant|>")[
+        "input_ids"
+    ]
+    cache = session.take_cache(input_ids)
+
+    assert cache is not None
+    assert generate(model, input_ids, cache) == generate(model, input_ids)
+
+
+def test_feed_only_computes_new_tokens(mocker, model):
+    session = PrefillSession(model, CharTokenizer(), "<|system|>")
+    forward = mocker.spy(model, "forward")
+
+    session.feed("ich")
+    session.feed("ich bin")
+
+    assert [call.kwargs["input_ids"].shape[1] for call in forward.call_args_list] == [
+        len("<|system|>ich"),
+        len(" bin"),
+    ]
+
+
+def test_take_cache_leaves_last_token(model):
+    session = PrefillSession(model, CharTokenizer(), "<|system|>")
+    session.feed("ja")
+
+    input_ids = CharTokenizer()("<|system|>ja")["input_ids"]
+    cache = session.take_cache(input_ids)
+
+    assert cache.get_seq_length() == len(input_ids) - 1
+
+
+def test_take_cache_without_common_prefix(model):
+    session = PrefillSession(model, CharTokenizer(), "<|system|>")
+    session.feed("ja")
+
+    assert session.take_cache(CharTokenizer()("nein")["input_ids"]) is None
+
+
+def test_failed_prefill_discards_cache(mocker, model):
+    session = PrefillSession(model, CharTokenizer(), "<|system|>")
+    session.feed("ja")
+    mocker.patch.object(model, "forward", side_effect=RuntimeError("out of memory"))
+
+    session.feed("ja bitte")
+
+    assert (
+        session.take_cache(CharTokenizer()("<|system|>ja bitte.")["input_ids"]) is None
+    )
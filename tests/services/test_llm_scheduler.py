@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+
+import pytest
+import torch
+from transformers import Qwen2Config, Qwen2ForCausalLM
+
+from speech_recognition.services.llm_scheduler import ContinuousBatchingScheduler
+
+EOS_TOKEN_ID = 63
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def model():
+    # A tiny randomly initialized model, so we don't have to load a real one
+    torch.manual_seed(0)
+    config = Qwen2Config(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+    )
+    return Qwen2ForCausalLM(config).eval()
+
+
+@pytest.fixture
+def scheduler(model):
+    scheduler = ContinuousBatchingScheduler(model, [EOS_TOKEN_ID], max_batch_size=3)
+    yield scheduler
+    scheduler.stop()
+
+
+def generate_reference(model, prompt, max_new_tokens):
+    output = model.generate(
+        torch.tensor([prompt]),
+        max_new_tokens=max_new_tokens,
+        do_sample=False,
+        eos_token_id=EOS_TOKEN_ID,
+        pad_token_id=0,
+    )
+    return output[0, len(prompt) :].tolist()
+
+
+def test_concurrent_requests_match_single_generation(model, scheduler):
+    # Different prompt lengths and budgets, more requests than the batch size
+    prompts = [[1, 2, 3, 4, 5], [7, 8], [9, 10, 11, 12, 13, 14, 15, 16], [3, 3, 3]]
+    budgets = [12, 5, 20, 8]
+    results = [None] * len(prompts)
+
+    def run(index):
+        results[index] = scheduler.generate(prompts[index], budgets[index])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    expected = [generate_reference(model, p, b) for p, b in zip(prompts, budgets)]
+    assert results == expected
+
+
+def test_stopping_criteria_ends_sequence(model, scheduler):
+    reference = generate_reference(model, [1, 2, 3], 10)
+
+    result = scheduler.generate(
+        [1, 2, 3], 10, stopping_criteria=lambda generated: len(generated) == 3
+    )
+
+    assert result == reference[:3]
+
+
+def test_model_error_is_raised_to_caller(mocker, scheduler, model):
+    mocker.patch.object(model, "forward", side_effect=RuntimeError("Inference crashed"))
+
+    with pytest.raises(RuntimeError, match="Inference crashed"):
+        scheduler.generate([1, 2, 3], 10)
+
+
+def test_waiting_requests_fail_on_stop(model):
+    scheduler = ContinuousBatchingScheduler(model, [EOS_TOKEN_ID], max_batch_size=1)
+    decoding = threading.Event()
+    resume = threading.Event()
+    results = {}
+
+    def block_decode_loop(generated):
+        decoding.set()
+        return not resume.wait(timeout=30)
+
+    def run(name, **kwargs):
+        try:
+            results[name] = scheduler.generate([1, 2, 3], 5, **kwargs)
+        except RuntimeError as e:
+            results[name] = e
+
+    running = threading.Thread(
+        target=run, args=("running",), kwargs={"stopping_criteria": block_decode_loop}
+    )
+    running.start()
+    assert decoding.wait(timeout=30)
+    # The batch is full, the request has to wait
+    waiting = threading.Thread(target=run, args=("waiting",))
+    waiting.start()
+    pending = scheduler._ContinuousBatchingScheduler__pending
+    while pending.empty():
+        time.sleep(0.01)
+    stopping = threading.Thread(target=scheduler.stop)
+    stopping.start()
+
+    waiting.join(timeout=30)
+    assert str(results["waiting"]) == "Scheduler stopped"
+    resume.set()
+    for thread in (running, stopping):
+        thread.join(timeout=30)
+    assert not stopping.is_alive()
+    assert isinstance(results["running"], list)
@@ -1,7 +1,9 @@
 import logging
 
 import pytest
+import torch
 
+import speech_recognition
 from speech_recognition import LLMService
 from speech_recognition.exceptions.llm_processing_error import LLMProcessingError
 from speech_recognition.services.llm_service import RequestType
@@ -56,8 +58,10 @@ def test_generate_json_response(mocker, mock_service):
         return_value='```json{"result": "YES"}```',
     )
 
-    # Call the method
-    output = mock_service.generate_json_response("yes", req_type=RequestType.COMMAND)
+    # Call the method, with a text the rule-based classifier can't decide on
+    output = mock_service.generate_json_response(
+        "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+    )
 
     # Assert that it did the right things
     assert output == {"result": "YES"}
@@ -88,4 +92,287 @@ def test_generate_json_response_output_raises(mocker, mock_service):
 
     # Assert that it caught the exception and threw the custom one
     with pytest.raises(LLMProcessingError, match="Error during processing of prompt"):
-        mock_service.generate_json_response("yes", req_type=RequestType.COMMAND)
+        mock_service.generate_json_response(
+            "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+        )
+
+
+def test_generate_json_response_invalid_json_raises(mocker, mock_service):
+    # Mock an output that was cut off, e.g. by the repetition criteria
+    mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"result": "YESYESYESYES',
+    )
+
+    # Assert that the parsing error is wrapped in the custom one
+    with pytest.raises(LLMProcessingError, match="Invalid JSON output"):
+        mock_service.generate_json_response(
+            "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+        )
+
+
+@pytest.mark.parametrize(
+    "prompt,expected",
+    [(" Ja, bitte.", {"result": "YES"}), ("Auf keinen Fall!", {"result": "NO"})],
+)
+def test_generate_json_response_rule_based_command(
+    mocker, mock_service, prompt, expected
+):
+    # Mock the llm generation, it shouldn't be needed for clear answers
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"result": "YES"}',
+    )
+
+    output = mock_service.generate_json_response(prompt, req_type=RequestType.COMMAND)
+
+    assert output == expected
+    assert mock_llm.call_count == 0
+
+
+def test_generate_json_response_rule_based_command_disabled(
+    mocker, monkeypatch, mock_service
+):
+    monkeypatch.setattr(speech_recognition.config, "LLM_RULE_BASED_COMMANDS", False)
+    mocker.patch(
+        "speech_recognition.services.llm_service.AutoModelForCausalLM.from_pretrained",
+        return_value=mocker.Mock(),
+    )
+    mocker.patch(
+        "speech_recognition.services.llm_service.AutoTokenizer.from_pretrained",
+        return_value=mocker.Mock(),
+    )
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"result": "NO"}',
+    )
+
+    output = LLMService().generate_json_response("Ja", req_type=RequestType.COMMAND)
+
+    # The LLM has the last word when the classifier is disabled
+    assert output == {"result": "NO"}
+    mock_llm.assert_called_once()
+
+
+def test_generate_json_response_person_data_only_asks_for_missing_fields(
+    mocker, mock_service
+):
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"firstname": "Max", "lastname": "Mustermann", "sex": "W"}',
+    )
+
+    output = mock_service.generate_json_response(
+        "Ich bin Max Mustermann, meine Telefonnummer ist 0176 1234567",
+        req_type=RequestType.PERSON_DATA,
+    )
+
+    # The LLM value for phone_number is ignored, the rule-based one is used
+    assert output == {
+        "firstname": "Max",
+        "lastname": "Mustermann",
+        "sex": "W",
+        "date_of_birth": None,
+        "phone_number": "0176 1234567",
+        "email_address": None,
+    }
+    # The required fields are listed after the transcript
+    user_prompt = mock_llm.call_args.args[0][1]["content"]
+    assert user_prompt.endswith(
+        "Required fields: firstname, lastname, sex, date_of_birth, email_address."
+    )
+
+
+def test_generate_json_response_person_data_skips_llm(mocker, mock_service):
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+    )
+
+    fields = []
+
+    output = mock_service.generate_json_response(
+        "Mein Name ist Max Mustermann, männlich, geboren am 15. Mai 1995, "
+        "Telefon 0176 1234567, E-Mail ist max@example.com",
+        req_type=RequestType.PERSON_DATA,
+        on_field=lambda field, value: fields.append((field, value)),
+    )
+
+    assert output["email_address"] == "max@example.com"
+    assert mock_llm.call_count == 0
+    assert fields == list(output.items())
+
+
+def test_generate_json_response_uses_cache(mocker, mock_service):
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"result": "YES"}',
+    )
+
+    first = mock_service.generate_json_response(
+        "Ja, das machen wir so.", req_type=RequestType.COMMAND
+    )
+    second = mock_service.generate_json_response(
+        "ja das machen wir so", req_type=RequestType.COMMAND
+    )
+
+    assert first == second == {"result": "YES"}
+    mock_llm.assert_called_once()
+
+
+def test_generate_json_response_streams_fields(mocker, mock_service):
+    def generate_output(messages, req_type, on_text, *_):
+        for chunk in ['{"firstname": "Max", ', '"lastname": "Muster", ', '"sex": "M"}']:
+            on_text(chunk)
+        return '{"firstname": "Max", "lastname": "Muster", "sex": "M"}'
+
+    mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        side_effect=generate_output,
+    )
+    fields = []
+
+    mock_service.generate_json_response(
+        "Ich bin Max Muster, männlich, Telefon 0176 1234567",
+        req_type=RequestType.PERSON_DATA,
+        on_field=lambda field, value: fields.append((field, value)),
+    )
+
+    # Rule-based fields come first, the LLM value for sex is ignored
+    assert fields == [
+        ("sex", "M"),
+        ("phone_number", "0176 1234567"),
+        ("firstname", "Max"),
+        ("lastname", "Muster"),
+    ]
+
+
+def test_generate_json_response_streams_cached_fields(mocker, mock_service):
+    mock_llm = mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"firstname": "Max", "lastname": "Muster"}',
+    )
+    fields = []
+
+    first = mock_service.generate_json_response(
+        "Ich bin Max Muster", req_type=RequestType.PERSON_DATA
+    )
+    second = mock_service.generate_json_response(
+        "Ich bin Max Muster",
+        req_type=RequestType.PERSON_DATA,
+        on_field=lambda field, value: fields.append((field, value)),
+    )
+
+    assert first == second
+    mock_llm.assert_called_once()
+    assert fields == list(first.items())
+
+
+@pytest.mark.parametrize("lookup_tokens", [10, 0])
+def test_prompt_lookup_tokens_are_passed_to_generate(
+    mocker, monkeypatch, lookup_tokens
+):
+    monkeypatch.setattr(
+        speech_recognition.config, "LLM_PROMPT_LOOKUP_TOKENS", lookup_tokens
+    )
+    monkeypatch.setattr(speech_recognition.config, "LLM_CONTINUOUS_BATCHING", False)
+    mock_model = mocker.MagicMock()
+    mock_model.generate.return_value = [[1, 2, 3, 4]]
+    mock_tokenizer = mocker.MagicMock()
+    mock_tokenizer.return_value.to.return_value.input_ids = torch.tensor([[1, 2, 3]])
+    mock_tokenizer.batch_decode.return_value = ['{"result": "YES"}']
+    mocker.patch(
+        "speech_recognition.services.llm_service.AutoModelForCausalLM.from_pretrained",
+        return_value=mock_model,
+    )
+    mocker.patch(
+        "speech_recognition.services.llm_service.AutoTokenizer.from_pretrained",
+        return_value=mock_tokenizer,
+    )
+
+    output = LLMService().generate_json_response(
+        "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+    )
+
+    assert output == {"result": "YES"}
+    kwargs = mock_model.generate.call_args.kwargs
+    if lookup_tokens:
+        assert kwargs["prompt_lookup_num_tokens"] == lookup_tokens
+    else:
+        # Disabled, generate decodes without drafts
+        assert "prompt_lookup_num_tokens" not in kwargs
+
+
+def test_llama_cpp_backend(mocker, monkeypatch):
+    monkeypatch.setattr(speech_recognition.config, "LLM_BACKEND", "llama_cpp")
+    monkeypatch.setattr(speech_recognition.config, "LLM_CACHE_ENABLED", False)
+    mock_from_pretrained = mocker.patch(
+        "speech_recognition.services.llm_service.AutoModelForCausalLM.from_pretrained"
+    )
+    mock_engine = mocker.patch(
+        "speech_recognition.services.llm_service.LlamaCppEngine"
+    ).return_value
+    mock_engine.generate.return_value = ('{"result": "NO"}', 5)
+
+    service = LLMService()
+    output = service.generate_json_response(
+        "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+    )
+
+    # Assert that the engine generated the output instead of transformers
+    assert output == {"result": "NO"}
+    mock_from_pretrained.assert_not_called()
+    messages, max_new_tokens, json_schema, on_text = mock_engine.generate.call_args[0]
+    assert max_new_tokens == speech_recognition.config.LLM_MAX_NEW_TOKENS["COMMAND"]
+    assert "oneOf" in json_schema
+
+
+def test_llama_cpp_backend_schema_has_missing_fields(mocker, monkeypatch):
+    monkeypatch.setattr(speech_recognition.config, "LLM_BACKEND", "llama_cpp")
+    monkeypatch.setattr(speech_recognition.config, "LLM_CACHE_ENABLED", False)
+    mock_engine = mocker.patch(
+        "speech_recognition.services.llm_service.LlamaCppEngine"
+    ).return_value
+    mock_engine.generate.return_value = ('{"firstname": "Max"}', 8)
+
+    service = LLMService()
+    service.generate_json_response(
+        "Ich heiße Max, Telefon 0176 1234567", req_type=RequestType.PERSON_DATA
+    )
+
+    # The grammar only allows the fields the rules couldn't fill
+    json_schema = mock_engine.generate.call_args[0][2]
+    assert "phone_number" not in json_schema["properties"]
+    assert json_schema["required"] == list(json_schema["properties"])
+
+
+def test_unknown_backend_raises(monkeypatch):
+    monkeypatch.setattr(speech_recognition.config, "LLM_BACKEND", "onnx")
+
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        LLMService()
+
+
+def test_unloaded_model_is_reloaded_on_demand(mocker):
+    mock_from_pretrained = mocker.patch(
+        "speech_recognition.services.llm_service.AutoModelForCausalLM.from_pretrained"
+    )
+    mocker.patch(
+        "speech_recognition.services.llm_service.AutoTokenizer.from_pretrained"
+    )
+    mocker.patch(
+        "speech_recognition.services.llm_service.LLMService._LLMService__generate_output",
+        return_value='{"result": "NO"}',
+    )
+    service = LLMService()
+
+    assert service.unload_if_idle(0)
+
+    # Rule-based answers don't need the model
+    service.generate_json_response("Nein", req_type=RequestType.COMMAND)
+    assert mock_from_pretrained.call_count == 1
+
+    service.generate_json_response(
+        "Ich rufe wegen meiner Rechnung an", req_type=RequestType.COMMAND
+    )
+    assert mock_from_pretrained.call_count == 2
+    assert service.is_loaded()
@@ -0,0 +1,89 @@
+import pytest
+import torch
+
+from speech_recognition.services.llm_stopping_criteria import (
+    JsonCompleteCriteria,
+    RepetitionCriteria,
+)
+
+# Every token id decodes to a single character of this vocabulary
+VOCAB = '{}":,_ abcdefghijklmnopqrstuvwxyz0123456789`\n'
+
+
+class CharTokenizer:
+    def decode(self, ids):
+        return "".join(VOCAB[i] for i in ids)
+
+
+def encode(text):
+    return [VOCAB.index(char) for char in text]
+
+
+def test_json_complete_stops_at_closing_brace():
+    criteria = JsonCompleteCriteria(CharTokenizer())
+    text = '```json\n{"result": "yes"}'
+
+    # Feed the tokens one by one like generate does
+    stops = [criteria.check(encode(text[: i + 1])) for i in range(len(text))]
+
+    assert stops == [False] * (len(text) - 1) + [True]
+    assert criteria.triggered
+
+
+def test_json_complete_ignores_braces_in_strings_and_nested_objects():
+    criteria = JsonCompleteCriteria(CharTokenizer())
+
+    assert not criteria.check(encode('{"a": "}", "b": {"c": 1}'))
+    assert criteria.check(encode('{"a": "}", "b": {"c": 1}}'))
+
+
+def test_json_complete_skips_prompt_tokens():
+    prompt = encode('{"x": 1}')
+    criteria = JsonCompleteCriteria(CharTokenizer(), prompt_length=len(prompt))
+
+    # The closed object in the prompt must not stop the generation
+    input_ids = torch.tensor([prompt + encode('{"a"')])
+    assert not criteria(input_ids, None).item()
+
+    input_ids = torch.tensor([prompt + encode('{"a": 1}')])
+    assert criteria(input_ids, None).item()
+
+
+@pytest.mark.parametrize(
+    "generated",
+    [
+        [5] * 24,
+        [1, 2] * 12,
+        [7, 8, 9, 10, 11] * 5,
+        [3] * 4 + list(range(16)) * 3,
+    ],
+)
+def test_repetition_detects_loops(generated):
+    criteria = RepetitionCriteria()
+
+    assert criteria.check(generated)
+    assert criteria.triggered
+
+
+@pytest.mark.parametrize(
+    "generated",
+    [
+        # A phone number with some repeated digits is fine
+        encode('{"phone_number": "0800000000"}'),
+        [5] * 23,
+        [1, 2] * 11,
+        list(range(40)),
+    ],
+)
+def test_repetition_ignores_short_repeats(generated):
+    criteria = RepetitionCriteria()
+
+    assert not criteria.check(generated)
+    assert not criteria.triggered
+
+
+def test_repetition_skips_prompt_tokens():
+    prompt = [4] * 30
+    criteria = RepetitionCriteria(prompt_length=len(prompt))
+
+    assert not criteria(torch.tensor([prompt + [1, 2, 3]]), None).item()
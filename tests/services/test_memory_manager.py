@@ -0,0 +1,141 @@
+import asyncio
+import logging
+
+import pytest
+
+from speech_recognition.services.memory_manager import MemoryManager
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def rss(mocker):
+    # Mock the resident set size, tests set the return value
+    return mocker.patch(
+        "speech_recognition.services.memory_manager.MemoryManager.rss_bytes",
+        return_value=1000 * MB,
+    )
+
+
+def create_manager(services=(), idle_seconds=None, high_watermark_mb=None):
+    return MemoryManager(
+        list(services),
+        idle_seconds=idle_seconds,
+        high_watermark_mb=high_watermark_mb,
+        trim_threshold_mb=100,
+        check_interval=0.01,
+    )
+
+
+def test_rss_bytes():
+    assert MemoryManager.rss_bytes() > 0
+
+
+@pytest.mark.asyncio
+async def test_job_finished_trims_after_growth(mocker, rss):
+    manager = create_manager()
+    trim = mocker.patch.object(manager, "trim")
+
+    rss.return_value = 1050 * MB
+    await manager.job_finished()
+    trim.assert_not_called()
+
+    rss.return_value = 1200 * MB
+    await manager.job_finished()
+    trim.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_trim(rss):
+    manager = create_manager()
+
+    # Runs malloc_trim for real, it must not fail
+    manager.trim()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_memory_below_watermark(mocker, rss):
+    service = mocker.Mock()
+    manager = create_manager([service], high_watermark_mb=2000)
+
+    await manager.wait_for_memory()
+
+    service.unload_if_idle.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_memory_pauses_above_watermark(mocker, rss):
+    service = mocker.Mock()
+    service.unload_if_idle.return_value = False
+    manager = create_manager([service], high_watermark_mb=500)
+    mocker.patch.object(manager, "trim")
+
+    waiter = asyncio.create_task(manager.wait_for_memory())
+    await asyncio.sleep(0.05)
+
+    # Intake is paused and unused models are unloaded right away
+    assert not waiter.done()
+    service.unload_if_idle.assert_called_with(0)
+
+    rss.return_value = 400 * MB
+    await asyncio.wait_for(waiter, 1)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_memory_unloads_models_busy_at_first(mocker, rss):
+    service = mocker.Mock()
+    # In use during the first pass, idle afterwards
+    service.unload_if_idle.side_effect = [False, True]
+    manager = create_manager([service], high_watermark_mb=500)
+
+    def trim():
+        if service.unload_if_idle.call_count == 2:
+            rss.return_value = 400 * MB
+
+    mocker.patch.object(manager, "trim", side_effect=trim)
+
+    await asyncio.wait_for(manager.wait_for_memory(), 1)
+
+    assert service.unload_if_idle.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_wait_for_memory_resumes_without_rss(mocker, rss):
+    service = mocker.Mock()
+    service.unload_if_idle.return_value = False
+    manager = create_manager([service], high_watermark_mb=500)
+    mocker.patch.object(manager, "trim")
+    rss.side_effect = [1000 * MB, None]
+
+    await asyncio.wait_for(manager.wait_for_memory(), 1)
+
+
+@pytest.mark.asyncio
+async def test_do_work_unloads_idle_models(mocker, rss):
+    service = mocker.Mock()
+    service.unload_if_idle.return_value = True
+    manager = create_manager([service], idle_seconds=60)
+    trim = mocker.patch.object(manager, "trim")
+
+    task = asyncio.create_task(manager.do_work())
+    await asyncio.sleep(0.05)
+    task.cancel()
+
+    service.unload_if_idle.assert_called_with(60)
+    trim.assert_called()
+
+
+@pytest.mark.asyncio
+async def test_do_work_disabled(mocker, rss):
+    service = mocker.Mock()
+    manager = create_manager([service], idle_seconds=None)
+
+    await asyncio.wait_for(manager.do_work(), 1)
+
+    service.unload_if_idle.assert_not_called()
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+import pytest
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.piper_pool import PiperPool
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def processes(mocker):
+    """Mocks the Piper processes, recording which one synthesized which text."""
+    created = []
+
+    def create(*_):
+        process = mocker.Mock()
+        process.texts = []
+
+        async def synthesize(text, output_file):
+            process.texts.append(text)
+            await asyncio.sleep(0.01)
+            if text == "fail":
+                raise AudioGenerationError("failed")
+            return output_file
+
+        process.synthesize = synthesize
+        process.stop = mocker.AsyncMock()
+        created.append(process)
+        return process
+
+    mocker.patch(
+        "speech_recognition.services.piper_pool.PiperProcess", side_effect=create
+    )
+    return created
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_use_one_process(processes):
+    pool = PiperPool("piper", "voice", 5, size=3)
+
+    for text in ("a", "b", "c"):
+        assert await pool.synthesize(text, f"{text}.wav") == f"{text}.wav"
+
+    assert pool.size() == 3
+    assert processes[0].texts == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_spread(processes):
+    pool = PiperPool("piper", "voice", 5, size=2)
+
+    await asyncio.gather(*(pool.synthesize(text, "") for text in "abcd"))
+
+    assert [len(process.texts) for process in processes] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_process_is_returned_after_failure(processes):
+    pool = PiperPool("piper", "voice", 5, size=1)
+
+    with pytest.raises(AudioGenerationError):
+        await pool.synthesize("fail", "")
+    assert await asyncio.wait_for(pool.synthesize("a", "a.wav"), 1) == "a.wav"
+
+
+@pytest.mark.asyncio
+async def test_stop_stops_all_processes(processes):
+    pool = PiperPool("piper", "voice", 5, size=2)
+
+    await pool.stop()
+
+    for process in processes:
+        process.stop.assert_awaited_once()
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+
+import pytest
+
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.services.request_dispatcher import RequestDispatcher
+from speech_recognition.utils.audio_frame import AudioFrame
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def text_queue():
+    return asyncio.Queue()
+
+
+@pytest.fixture
+def speech_queue():
+    return asyncio.Queue()
+
+
+@pytest.fixture
+def replies():
+    return []
+
+
+@pytest.fixture
+def reply(replies):
+    async def reply(message):
+        replies.append(message)
+
+    return reply
+
+
+@pytest.mark.asyncio
+async def test_requests_are_tagged_with_their_connection(
+    text_queue, speech_queue, reply
+):
+    dispatcher = RequestDispatcher(text_queue, speech_queue)
+    frame = AudioFrame.encode(
+        {
+            "type": "EXTRACT_DATA_FROM_AUDIO_REQUEST",
+            "request_id": "a",
+            "req_type": "COMMAND",
+        },
+        b"RIFF",
+    )
+
+    await dispatcher.dispatch(
+        {"type": "GENERATE_AUDIO_REQUEST", "message": {"text": "Hallo"}}, reply
+    )
+    await dispatcher.dispatch(
+        {
+            "type": "GENERATE_AUDIO_REQUEST",
+            "message": {"text": "Hallo", "request_id": "a"},
+        },
+        reply,
+        connection="3",
+    )
+    await dispatcher.dispatch(frame, reply, connection="3")
+
+    request = text_queue.get_nowait()
+    assert "connection" not in request
+    assert RequestDispatcher.routing(request) == {}
+    request = text_queue.get_nowait()
+    assert request == {
+        "text": "Hallo",
+        "voice": None,
+        "request_id": "3:a",
+        "connection": "3",
+    }
+    assert RequestDispatcher.routing(request) == {"connection": "3"}
+    request = speech_queue.get_nowait()
+    assert request["request_id"] == "3:a"
+    assert request["req_type"] == RequestType.COMMAND
+
+
+@pytest.mark.asyncio
+async def test_errors_are_replied_with_the_original_request_id(
+    text_queue, reply, replies
+):
+    dispatcher = RequestDispatcher(text_queue)
+
+    await dispatcher.dispatch(
+        {"type": "GENERATE_AUDIO_REQUEST", "message": {"text": " ", "request_id": "a"}},
+        reply,
+        connection="3",
+    )
+
+    assert text_queue.empty()
+    assert replies[0]["type"] == "GENERATE_AUDIO_ERROR"
+    assert replies[0]["message"]["request_id"] == "a"
@@ -1,12 +1,32 @@
 import asyncio
 import logging
+import os
+import stat
+import sys
+import wave
 from pathlib import Path
 
 import pytest
 
 import speech_recognition
-import speech_recognition.services.tts_service
 from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.services.piper_process import PiperProcess
+from speech_recognition.services.tts_service import TTSService
+
+# Stand-in for the Piper binary, speaking the same JSON line protocol
+FAKE_PIPER = f"""#!{sys.executable}
+import json
+import sys
+
+print("loading voice " + sys.argv[2], file=sys.stderr, flush=True)
+for line in sys.stdin:
+    request = json.loads(line)
+    if request["text"] == "crash":
+        sys.exit(1)
+    with open(request["output_file"], "w") as f:
+        f.write(request["text"])
+    print(request["output_file"], flush=True)
+"""
 
 
 @pytest.fixture(autouse=True)
@@ -15,64 +35,279 @@ def disable_logging():
     logging.disable(logging.CRITICAL)
 
 
+@pytest.fixture
+def piper_dir(tmp_path, monkeypatch):
+    piper = tmp_path / "piper"
+    piper.write_text(FAKE_PIPER)
+    piper.chmod(piper.stat().st_mode | stat.S_IEXEC)
+    output_dir = tmp_path / "generated"
+    output_dir.mkdir()
+
+    monkeypatch.setattr(speech_recognition.config, "PIPER_DIR", str(tmp_path))
+    monkeypatch.setattr(speech_recognition.config, "VOICE_NAME", "mock_voice")
+    monkeypatch.setattr(
+        speech_recognition.config, "GENERATE_AUDIO_DIR", str(output_dir)
+    )
+    monkeypatch.setattr(speech_recognition.config, "TTS_TIMEOUT_SECONDS", 5)
+    monkeypatch.setattr(
+        speech_recognition.config, "TTS_CACHE_DIR", str(tmp_path / "cache")
+    )
+    monkeypatch.setattr(speech_recognition.config, "TTS_CACHE_MAX_MB", 1)
+    monkeypatch.setattr(speech_recognition.config, "TTS_WORKERS", 2)
+    monkeypatch.setattr(
+        speech_recognition.config,
+        "TTS_VOICES",
+        {"mock": "mock_voice", "other": "other_voice"},
+    )
+    monkeypatch.setattr(speech_recognition.config, "TTS_MAX_LOADED_VOICES", 2)
+    return tmp_path
+
+
+@pytest.fixture
+async def service(piper_dir):
+    service = TTSService()
+    yield service
+    await service.stop()
+
+
 @pytest.mark.asyncio
-async def test_run_command_in_subprocess_is_called(mocker, monkeypatch):
-    # Mock the piper directory
-    monkeypatch.setattr(speech_recognition.config, "PIPER_DIR", "/mock/piper")
-    # Mock the creation of a subprocess shell
-    mock_proc = mocker.AsyncMock()
-    mock_proc.communicate.return_value = (b"Hello stdout", b"Hello stderr")
-    mock_sub_shell = mocker.patch(
-        "speech_recognition.services.tts_service.asyncio.create_subprocess_shell",
-        return_value=mock_proc,
+async def test_generate_audio(service, piper_dir):
+    path = await service.generate_audio('Sag "hallo" & tschüss $HOME')
+
+    # The text arrives unchanged, without any shell in between
+    assert Path(path).parent == piper_dir / "generated"
+    assert Path(path).read_text() == 'Sag "hallo" & tschüss $HOME'
+
+
+@pytest.mark.asyncio
+async def test_old_outputs_are_deleted(monkeypatch, service, piper_dir):
+    monkeypatch.setattr(
+        speech_recognition.config, "GENERATE_AUDIO_MAX_AGE_SECONDS", 3600
     )
+    output_dir = piper_dir / "generated"
+    old = output_dir / "audio-old.wav"
+    recent = output_dir / "audio-recent.wav"
+    other = output_dir / "other.wav"
+    for file in (old, recent, other):
+        file.write_text("audio")
+    os.utime(old, (0, 0))
+    os.utime(other, (0, 0))
+
+    path = await service.generate_audio("Hallo")
+
+    assert not old.exists()
+    assert recent.exists()
+    # Only files generated by the service are deleted
+    assert other.exists()
+    assert Path(path).exists()
+
 
-    # Create an instance with a dummy ws client
-    service = speech_recognition.services.tts_service.TTSService()
-
-    # Run it
-    await service._TTSService__run_command_in_subprocess("echo hi")
-
-    expected_cwd = str(Path("/mock/piper").absolute())
-    # Assert it was called correctly
-    mock_proc.communicate.assert_called_once()
-    mock_sub_shell.assert_called_once_with(
-        "echo hi",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        shell=True,
-        cwd=expected_cwd,
+@pytest.mark.asyncio
+async def test_piper_process_is_reused_with_unique_outputs(service, spawn):
+    first = await service.generate_audio("eins")
+    second = await service.generate_audio("zwei")
+
+    assert spawn.call_count == 1
+    assert first != second
+    assert Path(first).read_text() == "eins"
+    assert Path(second).read_text() == "zwei"
+    assert spawn.call_args.args[1:] == ("-m", "mock_voice", "--json-input")
+
+
+@pytest.mark.asyncio
+async def test_texts_are_synthesized_in_parallel(service, spawn):
+    paths = await asyncio.gather(
+        *(service.generate_audio(text) for text in ("eins", "zwei", "drei"))
     )
 
+    # Both processes of the pool are started, the third text reuses one of them
+    assert spawn.call_count == 2
+    assert [Path(path).read_text() for path in paths] == ["eins", "zwei", "drei"]
+
 
 @pytest.mark.asyncio
-async def test_text_to_speech_creates_correct_command(mocker, monkeypatch):
-    # Mock config values
-    monkeypatch.setattr(speech_recognition.config, "PIPER_DIR", "/mock/piper")
-    monkeypatch.setattr(speech_recognition.config, "VOICE_NAME", "mock_voice")
-    monkeypatch.setattr(speech_recognition.config, "GENERATE_AUDIO_DIR", "/mock/output")
+async def test_piper_is_restarted_after_crash(service, piper_dir):
+    with pytest.raises(AudioGenerationError):
+        await service.generate_audio("crash")
+
+    # A new process handles the next request
+    path = await service.generate_audio("weiter")
+    assert Path(path).read_text() == "weiter"
+
+
+@pytest.mark.asyncio
+async def test_request_is_retried_once_after_crash(mocker, service, spawn):
+    crashes = []
+
+    # Crash on the first attempt only
+    real_synthesize = PiperProcess._PiperProcess__synthesize
+
+    async def synthesize(process, text, output_file):
+        if not crashes:
+            crashes.append(text)
+            text = "crash"
+        return await real_synthesize(process, text, output_file)
+
+    mocker.patch.object(PiperProcess, "_PiperProcess__synthesize", synthesize)
+
+    path = await service.generate_audio("nochmal")
+
+    assert crashes == ["nochmal"]
+    assert spawn.call_count == 2
+    assert os.path.exists(path)
+
+
+@pytest.fixture
+def spawn(mocker):
+    return mocker.spy(
+        speech_recognition.services.piper_process.asyncio, "create_subprocess_exec"
+    )
+
+
+@pytest.fixture
+def synthesize(mocker, service):
+    return mocker.spy(service._TTSService__voices, "synthesize")
+
+
+@pytest.mark.asyncio
+async def test_repeated_text_is_served_from_cache(service, synthesize):
+    first = await service.generate_audio("Bitte nennen Sie Ihr Geburtsdatum.")
+    second = await service.generate_audio(" Bitte nennen Sie  Ihr Geburtsdatum. ")
+
+    assert synthesize.call_count == 1
+    assert first != second
+    assert Path(second).read_text() == "Bitte nennen Sie Ihr Geburtsdatum."
+
 
-    # Create the service instance
-    service = speech_recognition.services.tts_service.TTSService()
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced(service, synthesize):
+    paths = await asyncio.gather(*(service.generate_audio("Hallo") for _ in range(3)))
+
+    assert synthesize.call_count == 1
+    assert len(set(paths)) == 3
+    assert all(Path(path).read_text() == "Hallo" for path in paths)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_requests_share_the_failure(service, synthesize):
+    results = await asyncio.gather(
+        service.generate_audio("crash"),
+        service.generate_audio("crash"),
+        return_exceptions=True,
+    )
 
-    # Replace real _run_command_in_subprocess so we can look at the args it was called with
-    mock_run = mocker.AsyncMock()
-    mocker.patch.object(service, "_TTSService__run_command_in_subprocess", mock_run)
+    assert synthesize.call_count == 1
+    assert all(isinstance(result, AudioGenerationError) for result in results)
 
-    # Await for the task to start
-    task = asyncio.create_task(service.generate_audio("hello world"))
-    await asyncio.sleep(0.1)
 
-    # We don't need it to actually do anything
-    task.cancel()
+@pytest.mark.asyncio
+async def test_cache_can_be_disabled(monkeypatch, piper_dir):
+    monkeypatch.setattr(speech_recognition.config, "TTS_CACHE_DIR", None)
+    service = TTSService()
+    try:
+        await service.generate_audio("Hallo")
+        await service.generate_audio("Hallo")
+        assert not await service.prewarm("Hallo")
+    finally:
+        await service.stop()
+
+    assert not (piper_dir / "cache").exists()
+    assert len(list((piper_dir / "generated").iterdir())) == 2
+
+
+@pytest.mark.asyncio
+async def test_prewarm(service, synthesize, piper_dir):
+    assert await service.prewarm("Vielen Dank.")
+    assert not await service.prewarm("Vielen Dank.")
+
+    # Only the cache holds the pre-warmed audio
+    assert list((piper_dir / "generated").iterdir()) == []
+    path = await service.generate_audio("Vielen Dank.")
+    assert Path(path).read_text() == "Vielen Dank."
+    assert synthesize.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fan_out", [True, False])
+async def test_generate_audio_parts_in_order(service, spawn, fan_out):
+    sentences = ["Eins.", "Zwei.", "Drei."]
+
+    files = [
+        Path(file).read_text()
+        async for file in service.generate_audio_parts(sentences, fan_out)
+    ]
+
+    assert files == sentences
+    # Without fan out one sentence is synthesized at a time, on one process
+    assert spawn.call_count == (2 if fan_out else 1)
+
+
+@pytest.mark.asyncio
+async def test_generate_audio_parts_stops_at_failure(service):
+    sentences = ["Eins.", "crash", "Drei."]
+    files = []
+
     with pytest.raises(AudioGenerationError):
-        await task
-
-    expected_output = str(Path("/mock/output").absolute())
-    # Assert the things
-    assert mock_run.call_count == 1
-    called_command = mock_run.call_args.args[0]
-    assert "hello world" in called_command
-    assert ".\\piper" in called_command or "./piper" in called_command
-    assert "-m mock_voice" in called_command
-    assert "-f " + expected_output in called_command
+        async for file in service.generate_audio_parts(sentences, True):
+            files.append(Path(file).read_text())
+
+    assert files == ["Eins."]
+
+
+@pytest.mark.asyncio
+async def test_merge_audio(service, piper_dir):
+    files = []
+    for i in range(2):
+        files.append(str(piper_dir / f"part{i}.wav"))
+        with wave.open(files[-1], "wb") as f:
+            f.setparams((1, 2, 22050, 0, "NONE", "not compressed"))
+            f.writeframes(bytes([i, 0]) * 10)
+
+    merged = await service.merge_audio(files)
+
+    assert Path(merged).parent == piper_dir / "generated"
+    with wave.open(merged, "rb") as f:
+        assert f.getnframes() == 20
+    # Clients may still read the parts
+    assert all(os.path.exists(file) for file in files)
+
+    await service.delete_audio(files)
+    assert not any(os.path.exists(file) for file in files)
+
+
+@pytest.mark.asyncio
+async def test_merge_audio_failure(service, piper_dir):
+    (piper_dir / "broken.wav").write_text("no wav")
+
+    with pytest.raises(AudioGenerationError):
+        await service.merge_audio([str(piper_dir / "broken.wav")])
+
+
+@pytest.mark.asyncio
+async def test_voice_selection(service, spawn):
+    await service.generate_audio("Hallo", "other")
+    await service.generate_audio("Hallo", "mock")
+    await service.generate_audio("Hallo")
+
+    # The default voice is the same model as "mock"
+    assert [c.args[2] for c in spawn.call_args_list] == ["other_voice", "mock_voice"]
+
+
+@pytest.mark.asyncio
+async def test_voices_are_cached_separately(service, synthesize):
+    await service.generate_audio("Hallo", "other")
+    await service.generate_audio("Hallo", "mock")
+    await service.generate_audio("Hallo", "other")
+
+    assert synthesize.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_voice(service, spawn):
+    with pytest.raises(AudioGenerationError, match="Unknown voice"):
+        await service.generate_audio("Hallo", "../../etc/passwd")
+    with pytest.raises(AudioGenerationError, match="Unknown voice"):
+        async for _ in service.generate_audio_parts(["Eins.", "Zwei."], True, "x"):
+            pass
+
+    spawn.assert_not_called()
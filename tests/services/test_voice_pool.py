@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+import pytest
+
+from speech_recognition.services.voice_pool import VoicePool
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def pools(mocker):
+    """Mocks the Piper pools, one per voice, keyed by voice."""
+    created = {}
+
+    def create(piper_dir, voice, timeout, size):
+        pool = mocker.Mock()
+        pool.release = asyncio.Event()
+        pool.release.set()
+
+        async def synthesize(text, output_file):
+            await pool.release.wait()
+            return output_file
+
+        pool.synthesize = synthesize
+        pool.stop = mocker.AsyncMock()
+        created[voice] = pool
+        return pool
+
+    mocker.patch("speech_recognition.services.voice_pool.PiperPool", side_effect=create)
+    return created
+
+
+@pytest.mark.asyncio
+async def test_voices_are_loaded_once(pools):
+    voices = VoicePool("piper", 5, 2, max_voices=2)
+
+    for voice in ("a", "b", "a"):
+        assert await voices.synthesize(voice, "Hallo", "out.wav") == "out.wav"
+
+    assert list(pools) == ["a", "b"]
+    assert voices.loaded_voices() == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_voice_is_evicted(pools):
+    voices = VoicePool("piper", 5, 2, max_voices=2)
+
+    for voice in ("a", "b", "a", "c"):
+        await voices.synthesize(voice, "Hallo", "out.wav")
+
+    pools["b"].stop.assert_awaited_once()
+    pools["a"].stop.assert_not_called()
+    assert voices.loaded_voices() == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_busy_voice_is_not_evicted(pools):
+    voices = VoicePool("piper", 5, 2, max_voices=1)
+    await voices.synthesize("a", "Hallo", "out.wav")
+    pools["a"].release.clear()
+    busy = asyncio.create_task(voices.synthesize("a", "Hallo", "out.wav"))
+    await asyncio.sleep(0)
+
+    await voices.synthesize("b", "Hallo", "out.wav")
+    pools["a"].stop.assert_not_called()
+    assert voices.loaded_voices() == ["a", "b"]
+
+    # Once idle, it is evicted by the next request
+    pools["a"].release.set()
+    await busy
+    await voices.synthesize("b", "Hallo", "out.wav")
+    pools["a"].stop.assert_awaited_once()
+    assert voices.loaded_voices() == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_stop(pools):
+    voices = VoicePool("piper", 5, 2, max_voices=2)
+    for voice in ("a", "b"):
+        await voices.synthesize(voice, "Hallo", "out.wav")
+
+    await voices.stop()
+
+    for pool in pools.values():
+        pool.stop.assert_awaited_once()
+    assert voices.loaded_voices() == []
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import logging
+import socket
+
+import pytest
+from websockets import ConnectionClosedError
+
+import speech_recognition
+from speech_recognition.services.llm_service import RequestType
+from speech_recognition.services.websocket_client import WebSocketClient
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.work_credits import WorkCredits
+from tests.mock_server import MockDispatcher
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def unused_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def queue():
+    return asyncio.Queue()
+
+
+@pytest.fixture
+def client(mocker, queue):
+    client = WebSocketClient("ws://localhost:8080", queue)
+    client._WebSocketClient__ws = mocker.AsyncMock()
+    return client
+
+
+def request(text, **fields):
+    return json.dumps(
+        {"type": "GENERATE_AUDIO_REQUEST", "message": {"text": text, **fields}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_audio_request_is_queued_with_its_id(client, queue):
+    await client._WebSocketClient__message_handler(request("Hallo", request_id=7))
+    await client._WebSocketClient__message_handler(
+        request("Hallo", request_id="8", voice="hessisch")
+    )
+
+    assert queue.get_nowait() == {"text": "Hallo", "request_id": "7", "voice": None}
+    assert queue.get_nowait()["voice"] == "hessisch"
+
+
+@pytest.mark.asyncio
+async def test_audio_request_without_id_gets_one(client, queue):
+    await client._WebSocketClient__message_handler(request("Hallo"))
+    await client._WebSocketClient__message_handler(request("Hallo"))
+
+    first, second = queue.get_nowait(), queue.get_nowait()
+    assert first["request_id"] and first["request_id"] != second["request_id"]
+
+
+@pytest.mark.asyncio
+async def test_empty_audio_request_is_rejected(client, queue):
+    await client._WebSocketClient__message_handler(request("  ", request_id="r1"))
+
+    assert queue.empty()
+    sent = json.loads(client._WebSocketClient__ws.send.call_args.args[0])
+    assert sent["type"] == "GENERATE_AUDIO_ERROR"
+    assert sent["message"]["request_id"] == "r1"
+
+
+def upload(req_type, audio=b"RIFF", **fields):
+    header = {"type": "EXTRACT_DATA_FROM_AUDIO_REQUEST", "req_type": req_type}
+    return AudioFrame.encode({**header, **fields}, audio)
+
+
+@pytest.mark.asyncio
+async def test_uploaded_audio_is_queued_without_copy(mocker, queue):
+    speech_queue = asyncio.Queue()
+    client = WebSocketClient("ws://localhost:8080", queue, speech_queue)
+    client._WebSocketClient__ws = mocker.AsyncMock()
+    frame = upload("person_data", request_id="r1")
+
+    await client._WebSocketClient__message_handler(frame)
+
+    request = speech_queue.get_nowait()
+    assert request["req_type"] == RequestType.PERSON_DATA
+    assert request["request_id"] == "r1"
+    assert request["audio"] == b"RIFF"
+    assert request["audio"].obj is frame
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "speech_queue, frame",
+    [
+        (None, upload("COMMAND")),
+        (asyncio.Queue(), upload("UNKNOWN")),
+        (asyncio.Queue(), upload("BAD_REQUEST")),
+        (asyncio.Queue(), upload("COMMAND", audio=b"")),
+    ],
+)
+async def test_invalid_upload_is_rejected(mocker, queue, speech_queue, frame):
+    client = WebSocketClient("ws://localhost:8080", queue, speech_queue)
+    client._WebSocketClient__ws = mocker.AsyncMock()
+
+    await client._WebSocketClient__message_handler(frame)
+
+    assert speech_queue is None or speech_queue.empty()
+    sent = json.loads(client._WebSocketClient__ws.send.call_args.args[0])
+    assert sent["type"] == "EXTRACT_DATA_FROM_AUDIO_ERROR"
+    assert sent["message"]["request_id"]
+
+
+@pytest.mark.asyncio
+async def test_send_binary(client):
+    await client.send_binary(b"SRAF")
+
+    client._WebSocketClient__ws.send.assert_awaited_once_with(b"SRAF")
+
+
+def sent(ws):
+    return [c.args[0] for c in ws.send.await_args_list]
+
+
+@pytest.mark.asyncio
+async def test_json_messages_get_a_message_id(client):
+    message = {"type": "GENERATE_AUDIO_SUCCESS", "message": {"text": "ok"}}
+
+    await client.send_message(message)
+    await client.send_message({**message, "message_id": "fixed"})
+
+    first, second = [json.loads(m) for m in sent(client._WebSocketClient__ws)]
+    assert len(first["message_id"]) == 32
+    assert second["message_id"] == "fixed"
+    assert "message_id" not in message
+
+
+@pytest.mark.asyncio
+async def test_messages_are_buffered_and_replayed_in_order(mocker, queue):
+    client = WebSocketClient("ws://localhost:8080", queue)
+    await client.send_message("eins")
+    await client.send_binary(b"zwei")
+
+    ws = mocker.AsyncMock()
+    ws.recv.side_effect = asyncio.CancelledError
+    mocker.patch(
+        "speech_recognition.services.websocket_client.websockets.connect",
+        mocker.AsyncMock(return_value=ws),
+    )
+    await client.connect("sp")
+    await client.send_message("drei")
+
+    assert sent(ws) == ["sp", "eins", b"zwei", "drei"]
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_buffered(client):
+    ws = client._WebSocketClient__ws
+    ws.send.side_effect = [ConnectionClosedError(None, None), None, None, None]
+
+    await client.send_message("eins")
+    await client.send_message("zwei")
+
+    # The failed message is sent again before the next one
+    assert sent(ws) == ["eins", "eins", "zwei"]
+
+
+@pytest.mark.asyncio
+async def test_reconnect_backs_off_exponentially(mocker, monkeypatch, queue):
+    monkeypatch.setattr(
+        speech_recognition.config, "WEBSOCKET_RECONNECT_BASE_SECONDS", 1
+    )
+    monkeypatch.setattr(speech_recognition.config, "WEBSOCKET_RECONNECT_MAX_SECONDS", 5)
+    sleep = mocker.patch(
+        "speech_recognition.services.websocket_client.asyncio.sleep",
+        mocker.AsyncMock(),
+    )
+    uniform = mocker.patch(
+        "speech_recognition.services.websocket_client.random.uniform",
+        side_effect=lambda low, high: high,
+    )
+    ws = mocker.AsyncMock()
+    ws.recv.side_effect = asyncio.CancelledError
+    mocker.patch(
+        "speech_recognition.services.websocket_client.websockets.connect",
+        mocker.AsyncMock(side_effect=[OSError()] * 5 + [ws]),
+    )
+
+    await WebSocketClient("ws://localhost:8080", queue).connect()
+
+    assert [c.args[0] for c in sleep.await_args_list] == [1, 2, 4, 5, 5]
+    assert [c.args for c in uniform.call_args_list][:2] == [(0.5, 1), (1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_large_messages_are_serialized_in_a_thread(mocker, monkeypatch, client):
+    monkeypatch.setattr(speech_recognition.config, "WEBSOCKET_OFFLOAD_BYTES", 100)
+    to_thread = mocker.spy(
+        speech_recognition.services.websocket_client.asyncio, "to_thread"
+    )
+
+    await client.send_message({"type": "SMALL", "message": {"text": "ok"}})
+    to_thread.assert_not_called()
+    await client.send_message({"type": "LARGE", "message": {"text": "x" * 200}})
+    to_thread.assert_called_once()
+
+    assert json.loads(sent(client._WebSocketClient__ws)[1])["type"] == "LARGE"
+
+
+@pytest.mark.asyncio
+async def test_binary_audio_frames_are_ignored(client, queue):
+    await client._WebSocketClient__message_handler(b"SRAF\x00\x00\x00\x02{}")
+
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("subprotocol,expected", [("msgpack", bytes), (None, str)])
+async def test_codec_is_negotiated(mocker, monkeypatch, queue, subprotocol, expected):
+    pytest.importorskip("msgpack")
+    monkeypatch.setattr(speech_recognition.config, "WEBSOCKET_CODEC", "msgpack")
+    ws = mocker.AsyncMock()
+    ws.subprotocol = subprotocol
+    ws.recv.side_effect = asyncio.CancelledError
+    connect = mocker.patch(
+        "speech_recognition.services.websocket_client.websockets.connect",
+        mocker.AsyncMock(return_value=ws),
+    )
+    client = WebSocketClient("ws://localhost:8080", queue)
+
+    await client.connect()
+    await client.send_message({"type": "TEST"})
+
+    assert connect.call_args.kwargs["subprotocols"] == ["msgpack", "json"]
+    assert isinstance(sent(ws)[0], expected)
+
+
+@pytest.mark.asyncio
+async def test_missing_msgpack_falls_back_to_json(mocker, monkeypatch, queue):
+    monkeypatch.setattr(speech_recognition.config, "WEBSOCKET_CODEC", "msgpack")
+    monkeypatch.setattr(
+        speech_recognition.utils.message_codec, "msgpack", None, raising=True
+    )
+    ws = mocker.AsyncMock()
+    ws.recv.side_effect = asyncio.CancelledError
+    connect = mocker.patch(
+        "speech_recognition.services.websocket_client.websockets.connect",
+        mocker.AsyncMock(return_value=ws),
+    )
+
+    await WebSocketClient("ws://localhost:8080", queue).connect()
+
+    assert "subprotocols" not in connect.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_pull_mode_only_receives_jobs_with_credits(mocker, unused_port):
+    dispatcher = MockDispatcher()
+    server = await dispatcher.start("127.0.0.1", unused_port)
+    mocker.patch.object(
+        speech_recognition.config, "WEBSOCKET_URI", f"ws://127.0.0.1:{unused_port}"
+    )
+    nodes = []
+    for _ in range(2):
+        queue = asyncio.Queue()
+        credits = WorkCredits({"stt": 0, "tts": 1})
+        client = WebSocketClient(
+            speech_recognition.config.WEBSOCKET_URI, queue, credits=credits
+        )
+        nodes.append((client, queue))
+    for request_id in ("a", "b", "c"):
+        dispatcher.submit_text("Hallo", request_id)
+    try:
+        for client, _ in nodes:
+            await client.connect()
+        await asyncio.sleep(0.2)
+
+        # Every node got one job, the third one waits for a free credit
+        jobs = [queue.get_nowait() for _, queue in nodes]
+        assert sorted(job["request_id"] for job in jobs) == ["a", "b"]
+        assert all(queue.empty() for _, queue in nodes)
+        assert list(dispatcher.jobs["tts"]) and dispatcher.jobs["tts"][0][0] == "c"
+
+        # Finishing a job returns the credit, the node gets the next job
+        client, queue = nodes[0]
+        await client.send_message(
+            {
+                "type": "GENERATE_AUDIO_SUCCESS",
+                "message": {"text": "Hallo", "request_id": jobs[0]["request_id"]},
+            }
+        )
+        job = await asyncio.wait_for(queue.get(), 1)
+        assert job["request_id"] == "c"
+        result = json.loads(await dispatcher.results.get())
+        assert result["message"]["request_id"] == jobs[0]["request_id"]
+    finally:
+        for client, _ in nodes:
+            await client.close_connection()
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import logging
+import socket
+
+import pytest
+import websockets
+
+from speech_recognition.services.websocket_server import WebSocketServer
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.fair_queue import FairQueue
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def text_queue():
+    return FairQueue(lambda request: request.get("connection"))
+
+
+@pytest.fixture
+async def server(port, text_queue):
+    server = WebSocketServer("127.0.0.1", port, text_queue, asyncio.Queue())
+    task = asyncio.create_task(server.do_work())
+    await asyncio.sleep(0.1)
+    yield server
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def request(text, request_id):
+    return json.dumps(
+        {
+            "type": "GENERATE_AUDIO_REQUEST",
+            "message": {"text": text, "request_id": request_id},
+        }
+    )
+
+
+def result(request_id, **routing):
+    return {
+        "type": "GENERATE_AUDIO_SUCCESS",
+        "message": {"text": "Hallo", "request_id": request_id, **routing},
+    }
+
+
+@pytest.mark.asyncio
+async def test_results_are_routed_to_their_connection(server, port, text_queue):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as first:
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as second:
+            # Both clients use the same request id
+            await first.send(request("Eins", "r1"))
+            await second.send(request("Zwei", "r1"))
+            await asyncio.sleep(0.1)
+            requests = [text_queue.get_nowait() for _ in range(2)]
+            assert requests[0]["request_id"] != requests[1]["request_id"]
+
+            for r in reversed(requests):
+                await server.send_binary(
+                    AudioFrame.encode(
+                        {
+                            "type": "GENERATE_AUDIO_SUCCESS",
+                            "request_id": r["request_id"],
+                            "connection": r["connection"],
+                        },
+                        r["text"].encode(),
+                    )
+                )
+                await server.send_message(
+                    result(r["request_id"], connection=r["connection"])
+                )
+
+            for ws, text in ((first, b"Eins"), (second, b"Zwei")):
+                header, audio = AudioFrame.decode(await ws.recv())
+                assert (header["request_id"], audio) == ("r1", text)
+                assert "connection" not in header
+                message = json.loads(await ws.recv())
+                assert message["message"] == {"text": "Hallo", "request_id": "r1"}
+
+
+@pytest.mark.asyncio
+async def test_results_without_connection_are_sent_to_all(server, port):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as first:
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as second:
+            await asyncio.sleep(0.1)
+
+            # Request ids of files may look like routed ones
+            await server.send_message(result("1:person-test"))
+
+            for ws in (first, second):
+                message = json.loads(await ws.recv())
+                assert message["message"]["request_id"] == "1:person-test"
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests_are_answered_on_their_connection(server, port):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+        await ws.send("not json")
+        await ws.send(request(" ", "r1"))
+
+        message = json.loads(await ws.recv())
+        assert message["type"] == "GENERATE_AUDIO_ERROR"
+        assert message["message"]["request_id"] == "r1"
+
+
+@pytest.mark.asyncio
+async def test_results_of_closed_connections_are_dropped(server, port, text_queue):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+        await ws.send(request("Hallo", "r1"))
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(0.1)
+
+    MetricsHelper().reset()
+
+    await server.send_message(result("r1", connection="1"))
+
+    assert MetricsHelper().get("ws_server_dropped_results") == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_of_closed_connections_are_dropped(
+    server, port, text_queue
+):
+    async with websockets.connect(f"ws://127.0.0.1:{port}") as first:
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as second:
+            for i in range(3):
+                await first.send(request("Hallo", f"r{i}"))
+            await second.send(request("Hallo", "r1"))
+            await asyncio.sleep(0.1)
+            assert text_queue.qsize() == 4
+            MetricsHelper().reset()
+
+            await first.close()
+            await asyncio.sleep(0.1)
+
+            assert MetricsHelper().get("ws_server_dropped_requests") == 3
+            assert text_queue.qsize() == 1
+            assert text_queue.get_nowait()["connection"] == "2"
@@ -96,7 +96,11 @@ async def _send_and_assert_person_data(cwd, received_queue):
         resp = await received_queue.get()
         json_resp = json.loads(resp)
         log.debug(json_resp)
-        if json_resp["type"] == "EXTRACT_DATA_FROM_AUDIO_STARTING":
+        if json_resp["type"] in (
+            "EXTRACT_DATA_FROM_AUDIO_STARTING",
+            "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED",
+            "EXTRACT_DATA_FROM_AUDIO_PARTIAL",
+        ):
             continue
         if json_resp["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS":
             assert json_resp["message"]["text"] == {
@@ -126,7 +130,10 @@ async def _send_and_assert_command_yes(cwd, received_queue):
             resp = await received_queue.get()
             json_resp = json.loads(resp)
             log.debug(json_resp)
-            if json_resp["type"] == "EXTRACT_DATA_FROM_AUDIO_STARTING":
+            if json_resp["type"] in (
+                "EXTRACT_DATA_FROM_AUDIO_STARTING",
+                "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED",
+            ):
                 continue
             if json_resp["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS":
                 assert json_resp["message"]["text"] == {
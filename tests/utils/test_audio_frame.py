@@ -0,0 +1,42 @@
+import pytest
+
+from speech_recognition.utils.audio_frame import AudioFrame
+
+
+def test_encode_decode_roundtrip():
+    header = {"type": "GENERATE_AUDIO_SUCCESS", "request_id": "äöü", "format": "wav"}
+
+    frame = AudioFrame.encode(header, b"RIFF\x00\x01")
+
+    assert frame.startswith(b"SRAF")
+    assert AudioFrame.decode(frame) == (header, b"RIFF\x00\x01")
+
+
+def test_decode_without_copy():
+    frame = AudioFrame.encode({"type": "x"}, b"RIFF")
+
+    header, payload = AudioFrame.decode(frame, copy=False)
+
+    assert isinstance(payload, memoryview)
+    assert payload.obj is frame
+    assert payload == b"RIFF"
+
+
+def test_header_length_is_big_endian():
+    frame = AudioFrame.encode({}, b"")
+
+    assert frame == b"SRAF\x00\x00\x00\x02{}"
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        b"",
+        b"RIFF\x00\x00\x00\x02{}",
+        b"SRAF\x00\x00\x00\x10{}",
+        b"SRAF\x00\x00\x00\x02[]",
+    ],
+)
+def test_decode_rejects_malformed_frames(frame):
+    with pytest.raises(ValueError):
+        AudioFrame.decode(frame)
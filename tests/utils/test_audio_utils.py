@@ -1,6 +1,10 @@
 import logging
+import wave
 
+import numpy as np
+import pydub
 import pytest
+from pydub.generators import Sine
 
 import speech_recognition
 from speech_recognition.exceptions.transcription_error import TranscriptionError
@@ -116,3 +120,119 @@ def test_filetype_not_supported(tmp_path):
     helper = AudioHelper()
     with pytest.raises(TranscriptionError):
         helper.convert_audio_to_wav(str(path))
+
+
+# --- split_on_silence tests ---
+def test_split_on_silence_cuts_in_pauses(tmp_path):
+    # 3 tones of 1 second each, separated by 1 second of silence
+    tone = Sine(440).to_audio_segment(duration=1000, volume=-10)
+    pause = pydub.AudioSegment.silent(duration=1000)
+    audio = tone + pause + tone + pause + tone
+    infile = tmp_path / "tones.wav"
+    audio.export(infile, format="wav")
+
+    segments = AudioHelper.split_on_silence(str(infile), max_segment_ms=3500)
+
+    # The first two tones fit into one segment, the cut is in the middle of the pause
+    assert [len(segment) for segment in segments] == [3500, 1500]
+
+
+def test_split_on_silence_keeps_short_audio(tmp_path):
+    audio = Sine(440).to_audio_segment(duration=1000, volume=-10)
+    infile = tmp_path / "tone.wav"
+    audio.export(infile, format="wav")
+
+    segments = AudioHelper.split_on_silence(str(infile), max_segment_ms=30000)
+
+    assert len(segments) == 1
+    assert len(segments[0]) == 1000
+
+
+def test_to_samples():
+    audio = Sine(440).to_audio_segment(duration=1000, volume=-10).set_channels(2)
+
+    samples = AudioHelper.to_samples(audio, 16000)
+
+    assert samples.shape == (16000,)
+    assert samples.dtype == np.float32
+    assert -1 <= samples.min() < 0 < samples.max() <= 1
+
+
+# --- in memory decoding tests ---
+def test_decode_audio(tmp_path):
+    infile = tmp_path / "tone.wav"
+    Sine(440).to_audio_segment(duration=1000, volume=-10).export(infile, format="wav")
+
+    samples = AudioHelper.decode_audio(memoryview(infile.read_bytes()), 16000)
+
+    assert samples.shape == (16000,)
+    assert samples.dtype == np.float32
+    assert -1 <= samples.min() < 0 < samples.max() <= 1
+
+
+def test_decode_audio_failure():
+    with pytest.raises(TranscriptionError):
+        AudioHelper.decode_audio(b"not audio", 16000)
+
+
+def test_decode_audio_without_ffmpeg(mocker):
+    mocker.patch(
+        "speech_recognition.utils.audio_helper.subprocess.run",
+        side_effect=FileNotFoundError("ffmpeg"),
+    )
+
+    with pytest.raises(TranscriptionError):
+        AudioHelper.decode_audio(b"RIFF", 16000)
+
+
+def test_is_samples_empty():
+    tone = Sine(440).to_audio_segment(duration=1000, volume=-10)
+    samples = AudioHelper.to_samples(tone, 16000)
+
+    assert not AudioHelper.is_samples_empty(samples, 16000)
+    assert AudioHelper.is_samples_empty(np.zeros(16000, dtype=np.float32), 16000)
+    assert AudioHelper.is_samples_empty(samples[:1000], 16000)
+
+
+def test_split_on_silence_accepts_segments():
+    tone = Sine(440).to_audio_segment(duration=1000, volume=-10)
+    samples = AudioHelper.to_samples(tone + tone, 16000)
+
+    segments = AudioHelper.split_on_silence(
+        AudioHelper.to_segment(samples, 16000), max_segment_ms=30000
+    )
+
+    assert [len(segment) for segment in segments] == [2000]
+
+
+# --- concat_wav tests ---
+def write_wav(path, frames, rate=22050):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(frames)
+    return str(path)
+
+
+def test_concat_wav(tmp_path):
+    files = [
+        write_wav(tmp_path / "a.wav", b"\x01\x00" * 100),
+        write_wav(tmp_path / "b.wav", b"\x02\x00" * 50),
+    ]
+
+    AudioHelper.concat_wav(files, str(tmp_path / "out.wav"))
+
+    with wave.open(str(tmp_path / "out.wav"), "rb") as f:
+        assert f.getframerate() == 22050
+        assert f.readframes(f.getnframes()) == b"\x01\x00" * 100 + b"\x02\x00" * 50
+
+
+def test_concat_wav_rejects_different_formats(tmp_path):
+    files = [
+        write_wav(tmp_path / "a.wav", b"\x01\x00"),
+        write_wav(tmp_path / "b.wav", b"\x01\x00", rate=16000),
+    ]
+
+    with pytest.raises(ValueError):
+        AudioHelper.concat_wav(files, str(tmp_path / "out.wav"))
@@ -0,0 +1,75 @@
+import logging
+
+import pytest
+
+from speech_recognition.utils.command_classifier import CommandClassifier
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsHelper().reset()
+
+
+@pytest.mark.parametrize(
+    "test_input,expected",
+    [
+        ("Ja.", "YES"),
+        (" Ja, bitte.", "YES"),
+        ("Genau!", "YES"),
+        ("Na klar", "YES"),
+        ("Auf jeden Fall.", "YES"),
+        ("Ja, das ist richtig.", "YES"),
+        ("Kein Problem", "YES"),
+        ("Nein.", "NO"),
+        ("Nein, danke.", "NO"),
+        ("Auf keinen Fall!", "NO"),
+        ("Das stimmt nicht.", "NO"),
+        ("Nicht einverstanden", "NO"),
+        ("Lieber nicht", "NO"),
+        ("Das ist nicht richtig", "NO"),
+        ("Nein, nicht", "NO"),
+        ("Bitte nicht", "NO"),
+    ],
+)
+def test_classify_clear_answers(test_input, expected):
+    assert CommandClassifier().classify(test_input) == {"result": expected}
+
+
+@pytest.mark.parametrize(
+    "test_input",
+    [
+        "",
+        "Ja, nein, vielleicht",
+        "Max Mustermann",
+        "Ich weiß es nicht so genau",
+        "Ja ja ja ja ja ja ja ja ja",
+        "Ich bin nicht sicher",
+        "Sicher",
+        "Weiß nicht",
+        "Ja, richtig, nicht?",
+        "Das ist nicht falsch",
+        "Ja, stimmt nicht",
+    ],
+)
+def test_classify_ambiguous_falls_back(test_input):
+    assert CommandClassifier().classify(test_input) is None
+
+
+def test_classify_records_hit_rate():
+    classifier = CommandClassifier()
+    classifier.classify("Ja")
+    classifier.classify("Max Mustermann")
+
+    metrics = MetricsHelper()
+    assert metrics.get("command_classifier_requests") == 2
+    assert metrics.get("command_classifier_hits") == 1
+    assert (
+        metrics.ratio("command_classifier_hits", "command_classifier_requests") == 0.5
+    )
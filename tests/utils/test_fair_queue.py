@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from speech_recognition.utils.fair_queue import FairQueue
+
+
+def by_connection(item):
+    return item[0]
+
+
+@pytest.mark.asyncio
+async def test_sources_are_served_in_turn():
+    queue = FairQueue(by_connection)
+    for item in [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("c", 1), ("b", 2)]:
+        queue.put_nowait(item)
+
+    assert queue.qsize() == 6
+    assert [await queue.get() for _ in range(6)] == [
+        ("a", 1),
+        ("b", 1),
+        ("c", 1),
+        ("a", 2),
+        ("b", 2),
+        ("a", 3),
+    ]
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_items():
+    queue = FairQueue(by_connection)
+    getter = asyncio.create_task(queue.get())
+    await asyncio.sleep(0)
+
+    await queue.put(("a", 1))
+
+    assert await asyncio.wait_for(getter, 1) == ("a", 1)
+
+
+def test_maxsize():
+    queue = FairQueue(by_connection, maxsize=1)
+    queue.put_nowait(("a", 1))
+
+    assert queue.full()
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait(("b", 1))
+
+
+@pytest.mark.asyncio
+async def test_removed_group_is_not_served():
+    queue = FairQueue(by_connection, maxsize=3)
+    for item in [("a", 1), ("b", 1), ("a", 2)]:
+        queue.put_nowait(item)
+    putter = asyncio.create_task(queue.put(("c", 1)))
+    await asyncio.sleep(0)
+
+    assert queue.remove("a") == 2
+    assert queue.remove("d") == 0
+
+    await asyncio.wait_for(putter, 1)
+    assert queue.qsize() == 2
+    assert [await queue.get() for _ in range(2)] == [("b", 1), ("c", 1)]
+    queue.task_done()
+    queue.task_done()
+    await asyncio.wait_for(queue.join(), 1)
@@ -0,0 +1,66 @@
+import pytest
+
+from speech_recognition.utils import message_codec
+from speech_recognition.utils.message_codec import (
+    JsonCodec,
+    MessageCodec,
+    MsgPackCodec,
+    payload_size,
+)
+
+MESSAGE = {
+    "type": "EXTRACT_DATA_FROM_AUDIO_SUCCESS",
+    "message": {"text": {"firstName": "Jürgen", "age": 42, "tags": [None, 1.5]}},
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_roundtrip(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(message_codec, "orjson", None)
+    codec = JsonCodec()
+
+    encoded = codec.encode(MESSAGE)
+
+    assert isinstance(encoded, str)
+    assert codec.decode(encoded) == MESSAGE
+    assert codec.decode(encoded.encode("utf-8")) == MESSAGE
+
+
+def test_json_decode_error():
+    with pytest.raises(ValueError):
+        JsonCodec().decode("{not json")
+
+
+def test_msgpack_roundtrip():
+    pytest.importorskip("msgpack")
+    codec = MessageCodec.create("msgpack")
+
+    encoded = codec.encode(MESSAGE)
+
+    assert isinstance(encoded, bytes)
+    assert codec.decode(encoded) == MESSAGE
+    with pytest.raises(ValueError):
+        codec.decode("text")
+
+
+def test_msgpack_requires_library(monkeypatch):
+    monkeypatch.setattr(message_codec, "msgpack", None)
+
+    with pytest.raises(ImportError):
+        MsgPackCodec()
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        MessageCodec.create("xml")
+
+
+def test_payload_size():
+    assert payload_size(MESSAGE, 1000) == sum(
+        len(s)
+        for s in ("type", MESSAGE["type"], "message", "text", "firstName", "Jürgen")
+        + ("age", "tags")
+    ) + 3 * 8
+    # Counting stops once the limit is exceeded
+    assert 50 < payload_size({"a": "x" * 100, "b": "y" * 100}, 50) < 202
@@ -0,0 +1,37 @@
+import pytest
+
+from speech_recognition.utils.metrics_helper import MetricsHelper
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsHelper().reset()
+
+
+def test_counters_are_shared_between_instances():
+    MetricsHelper().increment("requests")
+    MetricsHelper().increment("requests", 2)
+
+    assert MetricsHelper().get("requests") == 3
+
+
+def test_ratio_without_total_is_zero():
+    metrics = MetricsHelper()
+    assert metrics.ratio("hits", "requests") == 0.0
+
+    metrics.increment("requests", 4)
+    metrics.increment("hits")
+    assert metrics.ratio("hits", "requests") == 0.25
+
+
+def test_observe_and_snapshot():
+    metrics = MetricsHelper()
+    assert metrics.average("duration") is None
+
+    metrics.observe("duration", 1.0)
+    metrics.observe("duration", 3.0)
+
+    assert metrics.average("duration") == 2.0
+    snapshot = metrics.snapshot()
+    assert snapshot["duration_count"] == 2
+    assert snapshot["duration_avg"] == 2.0
@@ -0,0 +1,83 @@
+import logging
+
+import pytest
+
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.outbox import Outbox
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsHelper().reset()
+
+
+def drain(outbox):
+    messages = []
+    while (message := outbox.peek()) is not None:
+        messages.append(message)
+        outbox.pop()
+    return messages
+
+
+def test_messages_are_kept_in_order():
+    outbox = Outbox(10)
+    outbox.put("eins")
+    outbox.put(b"SRAF\x00")
+    outbox.put("zwei")
+
+    assert len(outbox) == 3
+    assert drain(outbox) == ["eins", b"SRAF\x00", "zwei"]
+    assert outbox.peek() is None
+
+
+def test_oldest_message_is_dropped_when_full():
+    outbox = Outbox(2)
+    for message in ("a", "b", "c"):
+        outbox.put(message)
+
+    assert drain(outbox) == ["b", "c"]
+    assert MetricsHelper().get("ws_outbox_dropped") == 1
+
+
+def test_messages_survive_restart(tmp_path):
+    file = str(tmp_path / "outbox.jsonl")
+    outbox = Outbox(10, file)
+    for message in ("a", b"\x00\xff", "c"):
+        outbox.put(message)
+
+    assert drain(Outbox(10, file)) == ["a", b"\x00\xff", "c"]
+
+
+def test_sent_messages_are_removed_on_flush(tmp_path):
+    file = str(tmp_path / "outbox.jsonl")
+    outbox = Outbox(10, file)
+    for message in ("a", "b"):
+        outbox.put(message)
+
+    outbox.pop()
+    # Until flushed, a restart sends the message again
+    assert drain(Outbox(10, file)) == ["a", "b"]
+    outbox.flush()
+    assert drain(Outbox(10, file)) == ["b"]
+
+
+def test_partially_written_line_is_skipped(tmp_path):
+    file = tmp_path / "outbox.jsonl"
+    file.write_text('{"text": "a"}\n{"text": "b', encoding="utf-8")
+
+    assert drain(Outbox(10, str(file))) == ["a"]
+
+
+def test_loaded_messages_are_bounded(tmp_path):
+    file = str(tmp_path / "outbox.jsonl")
+    outbox = Outbox(10, file)
+    for message in "abc":
+        outbox.put(message)
+
+    assert drain(Outbox(2, file)) == ["b", "c"]
@@ -0,0 +1,50 @@
+import pytest
+
+from speech_recognition.utils.partial_json_parser import PartialJsonParser
+
+
+def test_fields_are_returned_once_complete():
+    parser = PartialJsonParser()
+
+    assert parser.feed('```json\n{"firstname": "Ma') == {}
+    assert parser.feed('x", "lastname"') == {"firstname": "Max"}
+    assert parser.feed(': "Muster, mann", "phone_number": null') == {
+        "lastname": "Muster, mann"
+    }
+    assert parser.feed("}\n```") == {"phone_number": None}
+
+
+def test_nested_values_and_escaped_quotes():
+    parser = PartialJsonParser()
+
+    result = parser.feed('{"a": {"b": [1, 2]}, "c": "say \\"hi\\", ok"}')
+
+    assert result == {"a": {"b": [1, 2]}, "c": 'say "hi", ok'}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7])
+def test_any_chunking_gives_the_same_fields(chunk_size):
+    text = '{"result": "YES", "error": null}'
+    parser = PartialJsonParser()
+
+    fields = {}
+    for i in range(0, len(text), chunk_size):
+        fields.update(parser.feed(text[i : i + chunk_size]))
+
+    assert fields == {"result": "YES", "error": None}
+
+
+def test_text_after_the_object_is_ignored():
+    parser = PartialJsonParser()
+
+    assert parser.feed('{"result": "NO"} {"result": "YES"}') == {"result": "NO"}
+
+
+def test_is_finished_after_closing_brace():
+    parser = PartialJsonParser()
+
+    parser.feed('{"a": {"b": 1}')
+    assert not parser.is_finished()
+
+    parser.feed("}")
+    assert parser.is_finished()
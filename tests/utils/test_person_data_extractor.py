@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+
+from speech_recognition.utils.person_data_extractor import PersonDataExtractor
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def extractor():
+    return PersonDataExtractor()
+
+
+def test_extract_spoken_transcript(extractor):
+    text = (
+        "Hallo, mein Name ist Max Mustermann, ich bin am fünfzehnten Mai "
+        "neunzehnhundertfünfundneunzig geboren. Meine Telefonnummer ist null eins "
+        "sieben sechs eins zwei drei vier fünf sechs sieben. Meine E-Mail ist "
+        "max punkt mustermann at gmail punkt com. Ich bin männlich."
+    )
+
+    assert extractor.extract(text) == {
+        "firstname": "Max",
+        "lastname": "Mustermann",
+        "sex": "M",
+        "date_of_birth": "1995-05-15",
+        "phone_number": "01761234567",
+        "email_address": "max.mustermann@gmail.com",
+    }
+
+
+def test_extract_written_transcript(extractor):
+    text = (
+        "Ich heiße Erika Musterfrau, geboren am 01.02.1980, Handy 0176 1234567, "
+        "E-Mail-Adresse: erika@web.de, weiblich."
+    )
+
+    assert extractor.extract(text) == {
+        "firstname": "Erika",
+        "lastname": "Musterfrau",
+        "sex": "W",
+        "date_of_birth": "1980-02-01",
+        "phone_number": "0176 1234567",
+        "email_address": "erika@web.de",
+    }
+
+
+def test_extract_leaves_unclear_fields_empty(extractor):
+    # Single name, a postal code and an email without introduction are left to the LLM
+    text = "Mein Name ist Max, ich wohne in der Hauptstraße 37 87435 Kempten, max mustermann at gmx punkt de"
+
+    result = extractor.extract(text)
+
+    assert all(value is None for value in result.values())
+
+
+def test_extract_ignores_titles_and_house_numbers(extractor):
+    # A title isn't a first name, a house number isn't a phone number
+    text = "Mein Name ist Doktor Müller, meine Hausnummer ist 37 87435 Kempten"
+
+    result = extractor.extract(text)
+
+    assert all(value is None for value in result.values())
+
+
+def test_extract_names_after_title(extractor):
+    result = extractor.extract("Mein Name ist Dr. Erika Musterfrau")
+
+    assert (result["firstname"], result["lastname"]) == ("Erika", "Musterfrau")
+
+
+@pytest.mark.parametrize(
+    "test_input,expected",
+    [
+        ("fünf", 5),
+        ("zwo", 2),
+        ("einundzwanzig", 21),
+        ("neunzehnhundertfünfundneunzig", 1995),
+        ("zweitausendeins", 2001),
+        ("dritter", 3),
+        ("fünfzehnten", 15),
+        ("Meister", None),
+        ("Achtung", None),
+    ],
+)
+def test_parse_number(extractor, test_input, expected):
+    assert extractor.parse_number(test_input) == expected
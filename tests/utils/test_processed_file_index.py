@@ -0,0 +1,128 @@
+import logging
+import os
+import threading
+
+import pytest
+
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "in" / "person-test.wav"
+    path.parent.mkdir()
+    path.write_bytes(b"RIFF")
+    return str(path)
+
+
+def test_file_is_claimed_once(audio_file):
+    index = ProcessedFileIndex()
+
+    assert index.claim(audio_file)
+    assert not index.claim(audio_file)
+
+
+def test_processed_file_is_not_claimed_again(audio_file):
+    index = ProcessedFileIndex()
+    index.claim(audio_file)
+
+    index.mark_processed(audio_file)
+
+    assert index.is_processed(audio_file)
+    assert not index.claim(audio_file)
+    assert len(index) == 1
+
+
+def test_released_file_can_be_claimed_again(audio_file):
+    index = ProcessedFileIndex()
+    index.claim(audio_file)
+
+    index.release(audio_file)
+
+    assert not index.is_processed(audio_file)
+    assert index.claim(audio_file)
+
+
+def test_failing_file_is_given_up_after_max_attempts(tmp_path, audio_file):
+    file = str(tmp_path / "processed.jsonl")
+    index = ProcessedFileIndex(file, max_attempts=2)
+    index.claim(audio_file)
+    index.release(audio_file)
+
+    # The failure survives a restart
+    index = ProcessedFileIndex(file, max_attempts=2)
+    assert index.claim(audio_file)
+    index.release(audio_file)
+
+    assert index.is_processed(audio_file)
+    assert ProcessedFileIndex(file, max_attempts=2).is_processed(audio_file)
+
+
+def test_changed_file_is_processed_again(audio_file):
+    index = ProcessedFileIndex()
+    index.claim(audio_file)
+    index.mark_processed(audio_file)
+
+    with open(audio_file, "ab") as f:
+        f.write(b"more audio")
+
+    assert not index.is_processed(audio_file)
+    assert index.claim(audio_file)
+
+
+def test_processed_files_survive_restart(tmp_path, audio_file):
+    file = str(tmp_path / "data" / "processed.jsonl")
+    ProcessedFileIndex(file).mark_processed(audio_file)
+
+    index = ProcessedFileIndex(file)
+
+    assert index.is_processed(audio_file)
+    assert not index.claim(audio_file)
+
+
+def test_partially_written_line_is_skipped(tmp_path, audio_file):
+    file = str(tmp_path / "processed.jsonl")
+    ProcessedFileIndex(file).mark_processed(audio_file)
+    with open(file, "a", encoding="utf-8") as f:
+        f.write('{"name": "command-te')
+
+    assert ProcessedFileIndex(file).is_processed(audio_file)
+
+
+def test_compact_drops_removed_files(tmp_path, audio_file):
+    file = str(tmp_path / "processed.jsonl")
+    removed_file = os.path.join(os.path.dirname(audio_file), "command-test.wav")
+    with open(removed_file, "wb") as f:
+        f.write(b"RIFF")
+    index = ProcessedFileIndex(file)
+    index.mark_processed(audio_file)
+    index.mark_processed(removed_file)
+    os.remove(removed_file)
+
+    index.compact(os.path.dirname(audio_file))
+
+    assert len(index) == 1
+    assert len(ProcessedFileIndex(file)) == 1
+    with open(file, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+
+def test_concurrent_claims_claim_once(audio_file):
+    index = ProcessedFileIndex()
+    claims = []
+    threads = [
+        threading.Thread(target=lambda: claims.append(index.claim(audio_file)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert claims.count(True) == 1
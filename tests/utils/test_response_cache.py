@@ -0,0 +1,112 @@
+import logging
+
+import pytest
+
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsHelper().reset()
+
+
+def key(transcript, req_type="COMMAND", model="model", version="v1"):
+    return ResponseCache.make_key(req_type, transcript, model, version)
+
+
+def test_key_folds_case_punctuation_and_whitespace():
+    assert key(" Ja, bitte.") == key("ja   bitte")
+    # Punctuation inside of words is kept
+    assert key("max.muster@web.de") != key("maxmuster@web.de")
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        key("Ja", req_type="PERSON_DATA"),
+        key("Ja", model="other-model"),
+        key("Ja", version="v2"),
+    ],
+)
+def test_key_depends_on_request_model_and_prompt(other):
+    assert key("Ja") != other
+
+
+def test_get_and_put_records_hit_ratio():
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    assert cache.get(key("Ja")) is None
+
+    cache.put(key("Ja"), {"result": "YES"})
+
+    assert cache.get(key("ja.")) == {"result": "YES"}
+    assert MetricsHelper().ratio("llm_cache_hits", "llm_cache_requests") == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"result": "YES"})
+    cache.put("b", {"result": "NO"})
+    # Touch "a" so "b" is the least recently used
+    cache.get("a")
+    cache.put("c", {"result": "YES"})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+def test_expired_entry_is_a_miss(mocker):
+    mock_time = mocker.patch("speech_recognition.utils.response_cache.time.time")
+    mock_time.return_value = 1000
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", {"result": "YES"})
+
+    mock_time.return_value = 1061
+
+    assert cache.get("a") is None
+
+
+def test_cache_is_persisted(tmp_path):
+    file = str(tmp_path / "cache" / "llm_cache.json")
+    ResponseCache(max_entries=10, ttl_seconds=60, file=file).put("a", {"result": "NO"})
+
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, file=file)
+
+    assert cache.get("a") == {"result": "NO"}
+
+
+def test_cache_file_is_appended_and_compacted(tmp_path):
+    file = tmp_path / "llm_cache.jsonl"
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, file=str(file))
+    for i in range(4):
+        cache.put(str(i), {"result": "YES"})
+    assert len(file.read_text().splitlines()) == 4
+
+    # The file holds twice the entries, so it is rewritten
+    cache.put("4", {"result": "NO"})
+    assert len(file.read_text().splitlines()) == 2
+
+    cache = ResponseCache(max_entries=2, ttl_seconds=60, file=str(file))
+    assert cache.get("3") is not None
+    assert cache.get("4") == {"result": "NO"}
+
+
+def test_bad_cache_entries_are_skipped(tmp_path):
+    file = tmp_path / "llm_cache.jsonl"
+    ResponseCache(max_entries=10, ttl_seconds=60, file=str(file)).put(
+        "a", {"result": "NO"}
+    )
+    with file.open("a", encoding="utf-8") as f:
+        f.write('["b", 1, 2, 3]\n{"key": "c", "created": "x", "value": {}}\n{"key"')
+
+    cache = ResponseCache(max_entries=10, ttl_seconds=60, file=str(file))
+
+    assert len(cache) == 1
+    assert cache.get("a") == {"result": "NO"}
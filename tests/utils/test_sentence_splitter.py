@@ -0,0 +1,36 @@
+import pytest
+
+from speech_recognition.utils.sentence_splitter import SentenceSplitter
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("Hallo. Wie geht es?  Gut!", ["Hallo.", "Wie geht es?", "Gut!"]),
+        ("Nur ein Satz", ["Nur ein Satz"]),
+        ("", []),
+        ('Er sagte: "Ja." Dann ging er.', ['Er sagte: "Ja."', "Dann ging er."]),
+        ("Was? 12 Uhr… Okay.", ["Was?", "12 Uhr…", "Okay."]),
+        # A lowercase word doesn't start a new sentence
+        (
+            "Das ist Version 2.0 oder so. na gut.",
+            ["Das ist Version 2.0 oder so. na gut."],
+        ),
+    ],
+)
+def test_split(text, expected):
+    assert SentenceSplitter.split(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Ihr Termin ist am 3. Mai.",
+        "Bitte wenden Sie sich an Dr. Müller.",
+        "Sie heißen Max M. Mustermann.",
+        "Z. B. in der Hauptstr. 7 in Köln.",
+        "Bitte nennen Sie ggf. Ihre Nr. Danke",
+    ],
+)
+def test_periods_inside_sentences(text):
+    assert SentenceSplitter.split(text) == [text]
@@ -0,0 +1,107 @@
+import logging
+import os
+import time
+
+import pytest
+
+from speech_recognition.utils.metrics_helper import MetricsHelper
+from speech_recognition.utils.tts_cache import TTSCache
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    MetricsHelper().reset()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+def generated(tmp_path, name, size=10):
+    file = tmp_path / name
+    file.write_bytes(name.encode().ljust(size, b"\0"))
+    return str(file)
+
+
+def test_key_folds_whitespace_but_keeps_punctuation():
+    key = TTSCache.make_key
+
+    assert key(" Guten  Tag. ", "voice") == key("Guten Tag.", "voice")
+    assert key("Guten Tag.", "voice") != key("Guten Tag?", "voice")
+    assert key("Guten Tag.", "voice") != key("Guten Tag.", "other-voice")
+
+
+def test_voice_id_changes_with_model_file(tmp_path):
+    model = tmp_path / "voice.onnx"
+    model.write_bytes(b"model")
+    before = TTSCache.voice_id(str(tmp_path), "voice.onnx")
+
+    model.write_bytes(b"new model")
+
+    assert TTSCache.voice_id(str(tmp_path), "voice.onnx") != before
+    assert TTSCache.voice_id(str(tmp_path), "other.onnx") != before
+
+
+def test_put_and_get(tmp_path, cache_dir):
+    cache = TTSCache(str(cache_dir), 1000)
+    key = TTSCache.make_key("Hallo", "voice")
+    output = tmp_path / "output.wav"
+
+    assert not cache.get(key, str(output))
+    cache.put(key, generated(tmp_path, "generated.wav"))
+
+    assert cache.contains(key)
+    assert cache.get(key, str(output))
+    assert output.read_bytes().startswith(b"generated.wav")
+    # Removing the output doesn't remove the cached file
+    output.unlink()
+    assert cache.get(key, str(output))
+    assert MetricsHelper().ratio("tts_cache_hits", "tts_cache_requests") == 2 / 3
+
+
+def test_least_recently_used_is_evicted(tmp_path, cache_dir):
+    cache = TTSCache(str(cache_dir), 25)
+    for name in ("a", "b"):
+        cache.put(name, generated(tmp_path, name))
+    cache.get("a", str(tmp_path / "out.wav"))
+
+    cache.put("c", generated(tmp_path, "c"))
+
+    assert cache.contains("a") and cache.contains("c")
+    assert not cache.contains("b")
+    assert not (cache_dir / "b.wav").exists()
+    assert cache.size_bytes() == 20
+    assert MetricsHelper().get("tts_cache_evictions") == 1
+
+
+def test_entries_are_loaded_in_order_of_last_use(tmp_path, cache_dir):
+    cache = TTSCache(str(cache_dir), 25)
+    for name in ("a", "b"):
+        cache.put(name, generated(tmp_path, name))
+    past = time.time() - 60
+    os.utime(cache_dir / "b.wav", (past, past))
+    (cache_dir / "x.1234.tmp").write_bytes(b"partial")
+
+    cache = TTSCache(str(cache_dir), 25)
+    cache.put("c", generated(tmp_path, "c"))
+
+    assert len(cache) == 2
+    assert not cache.contains("b")
+    assert not (cache_dir / "x.1234.tmp").exists()
+
+
+def test_missing_cached_file_is_a_miss(tmp_path, cache_dir):
+    cache = TTSCache(str(cache_dir), 1000)
+    cache.put("a", generated(tmp_path, "a"))
+    (cache_dir / "a.wav").unlink()
+
+    assert not cache.get("a", str(tmp_path / "out.wav"))
+    assert not cache.contains("a")
+    assert cache.size_bytes() == 0
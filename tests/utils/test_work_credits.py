@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from speech_recognition.utils.work_credits import WorkCredits
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+def test_jobs_take_credits_until_released():
+    credits = WorkCredits({"stt": 2, "tts": 1})
+
+    credits.acquire("stt", "a")
+    credits.acquire("tts", "b")
+
+    assert credits.free() == {"stt": 1, "tts": 0}
+    assert credits.release("b") == "tts"
+    assert credits.release("b") is None
+    assert credits.release("unknown") is None
+    assert credits.free() == {"stt": 1, "tts": 1}
+
+
+def test_free_credits_are_never_negative():
+    credits = WorkCredits({"tts": 1})
+
+    credits.acquire("tts", "a")
+    credits.acquire("tts", "b")
+
+    assert credits.free() == {"tts": 0}
+    credits.release("a")
+    assert credits.free() == {"tts": 0}
@@ -1,10 +1,14 @@
 import asyncio
 import os
+import time
 
 import pytest
 
+import speech_recognition
+
 from speech_recognition.exceptions.llm_processing_error import LLMProcessingError
 from speech_recognition.exceptions.transcription_error import TranscriptionError
+from speech_recognition.services.llm_service import RequestType
 from speech_recognition.workers.audio_extraction_worker import AudioExtractionWorker
 
 
@@ -121,16 +125,20 @@ async def test_successful_audio_extraction(
     except asyncio.CancelledError:
         pass
 
-    # The worker should send two messages: one starting and one success.
-    assert len(client.messages) == 2
+    # The worker should send three messages: starting, transcribed and success.
+    assert len(client.messages) == 3
 
-    starting_msg = client.messages[0]
-    success_msg = client.messages[1]
+    starting_msg, transcribed_msg, success_msg = client.messages
 
     file_name = file_path.split(os.sep)[-1]
     assert starting_msg["type"] == "EXTRACT_DATA_FROM_AUDIO_STARTING"
     assert file_name in starting_msg["message"]["text"]
 
+    # The transcript is sent with the ASR duration before the LLM result
+    assert transcribed_msg["type"] == "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED"
+    assert transcribed_msg["message"]["text"] == f"mocked transcription of {file_path}"
+    assert transcribed_msg["message"]["asr_seconds"] >= 0
+
     # Verify success message content
     assert success_msg["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
     result = success_msg["message"]["text"]
@@ -139,13 +147,125 @@ async def test_successful_audio_extraction(
     assert result["req_type"] == "VALID_REQUEST"
 
 
+@pytest.mark.asyncio
+async def test_uploaded_audio_extraction(
+    worker, speech_queue, client, asr_service, llm_service
+):
+    audio = memoryview(b"RIFF")
+    await speech_queue.put(
+        {"audio": audio, "req_type": RequestType.COMMAND, "request_id": "r1"}
+    )
+    asr_service.transcribe.return_value = "Licht an"
+    llm_service.generate_json_response.return_value = {"command": "light_on"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    # The uploaded audio is passed on as is
+    assert asr_service.transcribe.call_args.args[0] is audio
+    assert "upload r1" in client.messages[0]["message"]["text"]
+    assert client.messages[-1]["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_messages_carry_the_request_id(
+    worker, speech_queue, client, asr_service, llm_service
+):
+    await speech_queue.put(
+        {"file": os.path.join("in", "command-42.wav"), "req_type": "VALID_REQUEST"}
+    )
+    await speech_queue.put(
+        {"file": "command-43.wav", "req_type": "VALID_REQUEST", "request_id": 7}
+    )
+    asr_service.transcribe.return_value = "ja"
+    llm_service.generate_json_response.return_value = {"command": "yes"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    # Derived from the file name if the request has no id
+    assert [msg["message"]["request_id"] for msg in client.messages] == [
+        "command-42"
+    ] * 3 + ["7"] * 3
+
+
+@pytest.mark.asyncio
+async def test_upload_without_request_id_gets_one(
+    worker, speech_queue, client, asr_service, llm_service
+):
+    """
+    Test that uploaded audio without a request id is answered under a generated one.
+    """
+    await speech_queue.put({"audio": b"RIFF", "req_type": RequestType.COMMAND})
+    asr_service.transcribe.return_value = "Ja"
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    request_ids = {msg["message"]["request_id"] for msg in client.messages}
+    assert client.messages[-1]["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
+    assert len(request_ids) == 1
+    assert request_ids.pop()
+
+
+@pytest.mark.asyncio
+async def test_workers_complete_requests_out_of_order(
+    speech_queue, client, asr_service, llm_service
+):
+    workers = [
+        AudioExtractionWorker(speech_queue, asr_service, llm_service, client)
+        for _ in range(2)
+    ]
+    await speech_queue.put({"file": "slow.wav", "req_type": "VALID_REQUEST"})
+    await speech_queue.put({"file": "fast.wav", "req_type": "VALID_REQUEST"})
+
+    def transcribe(file):
+        time.sleep(0.2 if file == "slow.wav" else 0)
+        return file
+
+    asr_service.transcribe.side_effect = transcribe
+    llm_service.generate_json_response.side_effect = lambda text, req_type: text
+
+    tasks = [asyncio.create_task(worker.do_work()) for worker in workers]
+    await asyncio.sleep(0.4)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = [
+        msg["message"]
+        for msg in client.messages
+        if msg["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
+    ]
+    assert results == [
+        {"text": "fast.wav", "request_id": "fast"},
+        {"text": "slow.wav", "request_id": "slow"},
+    ]
+
+
 @pytest.mark.asyncio
 async def test_bad_request(worker, speech_queue, client):
     """
-    Test that a request with req_type "BAD_REQUEST" sends an error message.
+    Test that a request with req_type BAD_REQUEST sends an error message.
     """
     file_path = os.path.join("path", "to", "audio.wav")
-    request = {"file": file_path, "req_type": "BAD_REQUEST"}
+    request = {"file": file_path, "req_type": RequestType.BAD_REQUEST}
     await speech_queue.put(request)
 
     task = asyncio.create_task(worker.do_work())
@@ -222,3 +342,282 @@ async def test_llm_processing_error(mocker, worker, speech_queue, client, llm_se
     ]
     assert error_msgs, "Expected an error message upon LLM processing failure"
     assert "LLM processing failed" in error_msgs[0]["message"]["text"]
+
+
+@pytest.mark.asyncio
+async def test_person_data_sends_partial_results(
+    worker, speech_queue, client, asr_service, llm_service
+):
+    """
+    Test that fields passed to the on_field callback are sent before the final result.
+    """
+    file_path = os.path.join("path", "to", "person-test.wav")
+    request = {"file": file_path, "req_type": RequestType.PERSON_DATA}
+    await speech_queue.put(request)
+
+    asr_service.transcribe.return_value = "Ich bin Max"
+
+    def generate_json_response(text, req_type, on_field):
+        on_field("firstname", "Max")
+        return {"firstname": "Max"}
+
+    llm_service.generate_json_response.side_effect = generate_json_response
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    assert [msg["type"] for msg in client.messages] == [
+        "EXTRACT_DATA_FROM_AUDIO_STARTING",
+        "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED",
+        "EXTRACT_DATA_FROM_AUDIO_PARTIAL",
+        "EXTRACT_DATA_FROM_AUDIO_SUCCESS",
+    ]
+    assert client.messages[2]["message"]["text"] == {"firstname": "Max"}
+
+
+@pytest.mark.asyncio
+async def test_overlap_prefill_with_asr(
+    worker, speech_queue, client, asr_service, llm_service, monkeypatch
+):
+    """
+    Test that finalized segments are prefilled and the session is handed to the LLM.
+    """
+    monkeypatch.setattr(speech_recognition.config, "LLM_OVERLAP_PREFILL", True)
+    file_path = os.path.join("path", "to", "command-test.wav")
+    request = {"file": file_path, "req_type": RequestType.COMMAND}
+    await speech_queue.put(request)
+
+    asr_service.transcribe_segments.return_value = iter([" Ja,", " gerne", "."])
+    session = llm_service.create_prefill_session.return_value
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    asr_service.transcribe.assert_not_called()
+    llm_service.generate_json_response.assert_called_once_with(
+        " Ja, gerne.", RequestType.COMMAND, prefill_session=session
+    )
+    # Only transcripts ASR finalized are prefilled, the rest is left to the generation
+    for call in session.feed.call_args_list:
+        assert call.args[0] in [" Ja,", " Ja, gerne"]
+    assert client.messages[-1]["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_asr_seconds_exclude_prefill_session_creation(
+    worker, speech_queue, client, asr_service, llm_service, monkeypatch
+):
+    """
+    Test that loading the LLM for the prefill session isn't counted as ASR time.
+    """
+    monkeypatch.setattr(speech_recognition.config, "LLM_OVERLAP_PREFILL", True)
+    file_path = os.path.join("path", "to", "command-test.wav")
+    await speech_queue.put({"file": file_path, "req_type": RequestType.COMMAND})
+
+    session = llm_service.create_prefill_session.return_value
+
+    def create_prefill_session(req_type):
+        # Reloading the evicted LLM
+        time.sleep(0.3)
+        return session
+
+    llm_service.create_prefill_session.side_effect = create_prefill_session
+    asr_service.transcribe_segments.return_value = iter([" Ja."])
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.5)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    transcribed = client.messages[1]
+    assert transcribed["type"] == "EXTRACT_DATA_FROM_AUDIO_TRANSCRIBED"
+    assert transcribed["message"]["asr_seconds"] < 0.3
+
+
+@pytest.mark.asyncio
+async def test_overlap_prefill_doesnt_load_llm_for_commands(
+    worker, speech_queue, client, asr_service, llm_service, monkeypatch
+):
+    """
+    Test that COMMAND requests aren't prefilled while the LLM is unloaded.
+    """
+    monkeypatch.setattr(speech_recognition.config, "LLM_OVERLAP_PREFILL", True)
+    file_path = os.path.join("path", "to", "command-test.wav")
+    await speech_queue.put({"file": file_path, "req_type": RequestType.COMMAND})
+
+    llm_service.is_loaded.return_value = False
+    asr_service.transcribe.return_value = " Ja."
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    llm_service.create_prefill_session.assert_not_called()
+    llm_service.generate_json_response.assert_called_once_with(
+        " Ja.", RequestType.COMMAND
+    )
+    assert client.messages[-1]["type"] == "EXTRACT_DATA_FROM_AUDIO_SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_overlap_prefill_transcription_error(
+    worker, speech_queue, client, asr_service, llm_service, monkeypatch
+):
+    """
+    Test that a transcription error during the overlapped ASR sends an error message.
+    """
+    monkeypatch.setattr(speech_recognition.config, "LLM_OVERLAP_PREFILL", True)
+    file_path = os.path.join("path", "to", "command-test.wav")
+    request = {"file": file_path, "req_type": RequestType.COMMAND}
+    await speech_queue.put(request)
+
+    def transcribe_segments(file):
+        yield " Ja"
+        raise TranscriptionError("Transcription failed")
+
+    asr_service.transcribe_segments.side_effect = transcribe_segments
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    llm_service.generate_json_response.assert_not_called()
+    assert client.messages[-1]["type"] == "EXTRACT_DATA_FROM_AUDIO_ERROR"
+    assert "Transcription failed" in client.messages[-1]["message"]["text"]
+
+
+@pytest.mark.asyncio
+async def test_memory_manager_gates_intake(
+    speech_queue, client, asr_service, llm_service, mocker
+):
+    """
+    Test that the worker waits for memory before taking a request and reports finished jobs.
+    """
+    memory_manager = mocker.AsyncMock()
+    worker = AudioExtractionWorker(
+        speech_queue, asr_service, llm_service, client, memory_manager
+    )
+    file_path = os.path.join("path", "to", "command-test.wav")
+    await speech_queue.put({"file": file_path, "req_type": RequestType.COMMAND})
+
+    asr_service.transcribe.return_value = "Ja"
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    # Once before the request and once while waiting for the next one
+    assert memory_manager.wait_for_memory.await_count == 2
+    memory_manager.job_finished.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_processed_files_are_recorded(
+    speech_queue, client, asr_service, llm_service, mocker
+):
+    """
+    Test that processed files are recorded in the index, even bad requests, but not uploads.
+    """
+    processed_index = mocker.Mock()
+    worker = AudioExtractionWorker(
+        speech_queue, asr_service, llm_service, client, None, processed_index
+    )
+    command_file = os.path.join("path", "to", "command-test.wav")
+    bad_file = os.path.join("path", "to", "unknown-test.wav")
+    await speech_queue.put({"file": command_file, "req_type": RequestType.COMMAND})
+    await speech_queue.put({"file": bad_file, "req_type": RequestType.BAD_REQUEST})
+    await speech_queue.put(
+        {"audio": b"RIFF", "req_type": RequestType.COMMAND, "request_id": "up"}
+    )
+
+    asr_service.transcribe.return_value = "Ja"
+    llm_service.generate_json_response.return_value = {"result": "YES"}
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    assert [c.args[0] for c in processed_index.mark_processed.call_args_list] == [
+        command_file,
+        bad_file,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_files_are_only_recorded_if_permanent(
+    speech_queue, client, asr_service, llm_service, mocker
+):
+    """
+    Test that files failing with a transient error are released to be retried.
+    """
+    processed_index = mocker.Mock()
+    worker = AudioExtractionWorker(
+        speech_queue, asr_service, llm_service, client, None, processed_index
+    )
+    unsupported = os.path.join("path", "to", "command-unsupported.xyz")
+    asr_failure = os.path.join("path", "to", "command-asr.wav")
+    llm_failure = os.path.join("path", "to", "command-llm.wav")
+    invalid_json = os.path.join("path", "to", "command-json.wav")
+    for file in (unsupported, asr_failure, llm_failure, invalid_json):
+        await speech_queue.put({"file": file, "req_type": RequestType.COMMAND})
+
+    asr_service.transcribe.side_effect = [
+        TranscriptionError("File format is not supported.", permanent=True),
+        TranscriptionError("Error while transcribing"),
+        "Ja",
+        "Nein",
+    ]
+    llm_service.generate_json_response.side_effect = [
+        LLMProcessingError("Failed"),
+        LLMProcessingError("Invalid JSON output", permanent=True),
+    ]
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    assert [c.args[0] for c in processed_index.mark_processed.call_args_list] == [
+        unsupported,
+        invalid_json,
+    ]
+    assert [c.args[0] for c in processed_index.release.call_args_list] == [
+        asr_failure,
+        llm_failure,
+    ]
@@ -1,9 +1,12 @@
 import asyncio
 import os
+from unittest.mock import AsyncMock
 
 import pytest
 
 from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.utils.audio_frame import AudioFrame
+from speech_recognition.utils.metrics_helper import MetricsHelper
 from speech_recognition.workers.audio_generation_worker import AudioGenerationWorker
 
 
@@ -23,7 +26,11 @@ def client(mocker):
     async def send_message(message):
         client_mock.messages.append(message)
 
+    async def send_binary(frame):
+        client_mock.messages.append(frame)
+
     client_mock.send_message = send_message
+    client_mock.send_binary = send_binary
     return client_mock
 
 
@@ -51,7 +58,7 @@ async def test_successful_audio_generation(
     Test that a valid request to generate audio leads to a success message.
     """
     # Prepare a fake request payload (could be text or any dict as expected by tts_service.generate_audio)
-    request = "Some text to generate audio"
+    request = {"text": "Some text to generate audio", "request_id": "req-1"}
     await text_queue.put(request)
 
     # Configure the tts_service.generate_audio to return a fake file path.
@@ -75,6 +82,7 @@ async def test_successful_audio_generation(
     # The message should include only the file name portion.
     expected_filename = fake_file_path.split(os.sep)[-1]
     assert expected_filename in msg["message"]["text"]
+    assert msg["message"]["request_id"] == "req-1"
 
 
 @pytest.mark.asyncio
@@ -84,7 +92,7 @@ async def test_audio_generation_error(mocker, worker, text_queue, client, tts_se
     the worker sends an error message.
     """
     # Prepare a fake request.
-    request = "Some text to generate audio"
+    request = {"text": "Some text to generate audio", "request_id": "req-1"}
     await text_queue.put(request)
 
     # Configure generate_audio to raise an AudioGenerationError.
@@ -105,3 +113,176 @@ async def test_audio_generation_error(mocker, worker, text_queue, client, tts_se
     msg = client.messages[0]
     assert msg["type"] == "GENERATE_AUDIO_ERROR"
     assert error_message in msg["message"]["text"]
+    assert msg["message"]["request_id"] == "req-1"
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_queue(mocker, text_queue, client, tts_service):
+    """
+    Test that several workers drain the queue in parallel and record their throughput.
+    """
+    metrics = MetricsHelper()
+    metrics.reset()
+    running = []
+
+    async def generate_audio(text, voice):
+        running.append(text)
+        await asyncio.sleep(0.05)
+        return os.path.join("fake", f"{text}.wav")
+
+    tts_service.generate_audio.side_effect = generate_audio
+    workers = [
+        AudioGenerationWorker(text_queue, tts_service, client, worker_id)
+        for worker_id in range(2)
+    ]
+    for text in ("a", "b"):
+        await text_queue.put({"text": text, "request_id": text})
+
+    tasks = [asyncio.create_task(worker.do_work()) for worker in workers]
+    await asyncio.sleep(0.01)
+    # Both requests are handled at the same time
+    assert running == ["a", "b"]
+    await asyncio.sleep(0.1)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert len(client.messages) == 2
+    assert metrics.get("tts_worker_0_requests") == 1
+    assert metrics.get("tts_worker_1_requests") == 1
+    assert metrics.average("tts_worker_0_seconds") >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_sentences_are_streamed(mocker, worker, text_queue, client, tts_service):
+    """
+    Test that each sentence of a longer text is sent as a part before the whole text.
+    """
+    mocker.patch("speech_recognition.config.TTS_STREAM_SENTENCES", True)
+
+    async def generate_audio_parts(sentences, fan_out, voice):
+        for i in range(len(sentences)):
+            yield os.path.join("fake", f"part{i}.wav")
+
+    tts_service.generate_audio_parts = generate_audio_parts
+    tts_service.merge_audio = mocker.AsyncMock(
+        return_value=os.path.join("fake", "audio.wav")
+    )
+    await text_queue.put({"text": "Erster Satz. Zweiter Satz.", "request_id": "req-1"})
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert [msg["type"] for msg in client.messages] == [
+        "GENERATE_AUDIO_PART",
+        "GENERATE_AUDIO_PART",
+        "GENERATE_AUDIO_SUCCESS",
+    ]
+    assert client.messages[1]["message"]["file"] == "part1.wav"
+    assert client.messages[1]["message"]["sequence"] == 1
+    assert client.messages[1]["message"]["total"] == 2
+    tts_service.merge_audio.assert_awaited_once_with(
+        [os.path.join("fake", "part0.wav"), os.path.join("fake", "part1.wav")]
+    )
+    assert "audio.wav" in client.messages[2]["message"]["text"]
+    tts_service.generate_audio.assert_not_called()
+    # The client reads the part files, they are kept
+    tts_service.delete_audio.assert_not_called()
+
+
+@pytest.fixture
+def audio_encoder(mocker):
+    encoder = mocker.Mock()
+    encoder.format = "flac"
+    encoder.encode = mocker.AsyncMock(
+        side_effect=lambda file: f"audio of {file}".encode()
+    )
+    return encoder
+
+
+@pytest.mark.asyncio
+async def test_audio_is_sent_as_binary_frame(
+    text_queue, client, tts_service, audio_encoder
+):
+    """
+    Test that the audio is sent as binary frame before the success message.
+    """
+    worker = AudioGenerationWorker(text_queue, tts_service, client, 0, audio_encoder)
+    tts_service.generate_audio = AsyncMock(return_value=os.path.join("fake", "a.wav"))
+    await text_queue.put({"text": "Hallo", "request_id": "req-1"})
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    frame, msg = client.messages
+    header, payload = AudioFrame.decode(frame)
+    assert header == {
+        "type": "GENERATE_AUDIO_SUCCESS",
+        "request_id": "req-1",
+        "file": "a.wav",
+        "format": "flac",
+    }
+    assert payload == f"audio of {os.path.join('fake', 'a.wav')}".encode()
+    assert msg["type"] == "GENERATE_AUDIO_SUCCESS"
+    assert msg["message"]["request_id"] == "req-1"
+
+
+@pytest.mark.asyncio
+async def test_streamed_audio_is_sent_in_parts(
+    mocker, text_queue, client, tts_service, audio_encoder
+):
+    """
+    Test that streamed texts send each part as frame and no frame for the whole text.
+    """
+    mocker.patch("speech_recognition.config.TTS_STREAM_SENTENCES", True)
+    worker = AudioGenerationWorker(text_queue, tts_service, client, 0, audio_encoder)
+
+    async def generate_audio_parts(sentences, fan_out, voice):
+        for i in range(len(sentences)):
+            yield f"part{i}.wav"
+
+    tts_service.generate_audio_parts = generate_audio_parts
+    tts_service.merge_audio = AsyncMock(return_value="audio.wav")
+    tts_service.delete_audio = AsyncMock()
+    await text_queue.put({"text": "Erster Satz. Zweiter Satz.", "request_id": "req-1"})
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    frames = [m for m in client.messages if isinstance(m, bytes)]
+    headers = [AudioFrame.decode(frame)[0] for frame in frames]
+    assert [(h["type"], h["sequence"]) for h in headers] == [
+        ("GENERATE_AUDIO_PART", 0),
+        ("GENERATE_AUDIO_PART", 1),
+    ]
+    assert client.messages[-1]["type"] == "GENERATE_AUDIO_SUCCESS"
+    assert client.messages[-1]["message"]["parts"] == 2
+    # The parts were sent as frames, their files aren't needed anymore
+    tts_service.delete_audio.assert_awaited_once_with(["part0.wav", "part1.wav"])
+
+
+@pytest.mark.asyncio
+async def test_results_carry_the_connection(
+    text_queue, client, tts_service, audio_encoder
+):
+    """
+    Test that results of requests received by the embedded server carry their connection.
+    """
+    worker = AudioGenerationWorker(text_queue, tts_service, client, 0, audio_encoder)
+    tts_service.generate_audio = AsyncMock(return_value=os.path.join("fake", "a.wav"))
+    await text_queue.put({"text": "Hallo", "request_id": "3:r1", "connection": "3"})
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    frame, msg = client.messages
+    assert AudioFrame.decode(frame)[0]["connection"] == "3"
+    assert msg["message"]["connection"] == "3"
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import os
+
+import pytest
+
+from speech_recognition import config
+from speech_recognition.utils.processed_file_index import ProcessedFileIndex
+from speech_recognition.workers.backlog_scan_worker import BacklogScanWorker
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture(autouse=True)
+def no_stable_wait(monkeypatch):
+    monkeypatch.setattr(config, "FILE_STABLE_SECONDS", 0)
+
+
+@pytest.fixture
+def speech_queue():
+    return asyncio.Queue()
+
+
+@pytest.fixture
+def in_dir(tmp_path):
+    # Files with increasing modification times, in creation order
+    for age, name in enumerate(
+        ["person-a.wav", "command-b.wav", "unknown-c.wav", "command-d.wav"]
+    ):
+        path = tmp_path / name
+        path.write_bytes(b"RIFF")
+        os.utime(path, (1000 + age, 1000 + age))
+    return tmp_path
+
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def names(items):
+    return [os.path.basename(item["file"]) for item in items]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "order,expected",
+    [
+        ("oldest", ["person-a.wav", "command-b.wav", "unknown-c.wav", "command-d.wav"]),
+        ("newest", ["command-d.wav", "unknown-c.wav", "command-b.wav", "person-a.wav"]),
+        ("type", ["command-b.wav", "command-d.wav", "person-a.wav", "unknown-c.wav"]),
+    ],
+)
+async def test_backlog_is_queued_in_order(in_dir, order, expected):
+    # The worker only queues a file while the queue is empty, so take them right away
+    queue = asyncio.Queue()
+    consumed = []
+
+    async def consume():
+        while True:
+            consumed.append(await queue.get())
+
+    consumer = asyncio.create_task(consume())
+    worker = BacklogScanWorker(
+        queue, str(in_dir), ProcessedFileIndex(), order, poll_interval=0.01
+    )
+
+    await asyncio.wait_for(worker.do_work(), 1)
+    await asyncio.sleep(0)
+    consumer.cancel()
+
+    assert names(consumed) == expected
+    assert consumed[0]["request_id"] == expected[0].removesuffix(".wav")
+
+
+@pytest.mark.asyncio
+async def test_processed_and_partial_files_are_skipped(in_dir, speech_queue):
+    (in_dir / "person-e.wav.part").write_bytes(b"RIFF")
+    (in_dir / "subdir").mkdir()
+    index = ProcessedFileIndex()
+    index.mark_processed(str(in_dir / "person-a.wav"))
+    # Already queued by the file observer
+    index.claim(str(in_dir / "command-b.wav"))
+    worker = BacklogScanWorker(speech_queue, str(in_dir), index, poll_interval=0.01)
+
+    task = asyncio.create_task(worker.do_work())
+    queued = []
+    while not task.done() or not speech_queue.empty():
+        queued.extend(drain(speech_queue))
+        await asyncio.sleep(0.01)
+
+    assert names(queued) == ["unknown-c.wav", "command-d.wav"]
+
+
+@pytest.mark.asyncio
+async def test_waits_while_requests_are_queued(in_dir, speech_queue):
+    await speech_queue.put({"file": "live.wav"})
+    worker = BacklogScanWorker(
+        speech_queue, str(in_dir), ProcessedFileIndex(), poll_interval=0.01
+    )
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.05)
+    assert speech_queue.qsize() == 1
+
+    speech_queue.get_nowait()
+    await asyncio.sleep(0.05)
+    # Only one file of the backlog is queued at a time
+    assert names(drain(speech_queue)) == ["person-a.wav"]
+    task.cancel()
+
+
+def test_unknown_order_is_rejected(in_dir, speech_queue):
+    with pytest.raises(ValueError):
+        BacklogScanWorker(speech_queue, str(in_dir), ProcessedFileIndex(), "random")
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+import pytest
+
+from speech_recognition.exceptions.audio_generation_error import AudioGenerationError
+from speech_recognition.workers.tts_prewarm_worker import TTSPrewarmWorker
+
+
+@pytest.fixture(autouse=True)
+def disable_logging():
+    # Disables logging during tests
+    logging.disable(logging.CRITICAL)
+
+
+@pytest.fixture
+def text_queue():
+    return asyncio.Queue()
+
+
+@pytest.fixture
+def tts_service(mocker):
+    service = mocker.Mock()
+    service.prewarm = mocker.AsyncMock(return_value=True)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_all_phrases_are_prewarmed(text_queue, tts_service):
+    worker = TTSPrewarmWorker(text_queue, tts_service, ["Eins", "Zwei"])
+
+    await worker.do_work()
+
+    assert [c.args[0] for c in tts_service.prewarm.call_args_list] == ["Eins", "Zwei"]
+
+
+@pytest.mark.asyncio
+async def test_failed_phrase_is_skipped(text_queue, tts_service):
+    tts_service.prewarm.side_effect = [AudioGenerationError("failed"), True]
+    worker = TTSPrewarmWorker(text_queue, tts_service, ["Eins", "Zwei"])
+
+    await worker.do_work()
+
+    assert tts_service.prewarm.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_waits_while_requests_are_queued(text_queue, tts_service):
+    await text_queue.put("Anfrage")
+    worker = TTSPrewarmWorker(text_queue, tts_service, ["Eins"], poll_interval=0.01)
+
+    task = asyncio.create_task(worker.do_work())
+    await asyncio.sleep(0.05)
+    tts_service.prewarm.assert_not_called()
+
+    text_queue.get_nowait()
+    await asyncio.wait_for(task, 1)
+    tts_service.prewarm.assert_called_once_with("Eins")